@@ -0,0 +1,116 @@
+# Load test: local HTTP decision API (economizer.api)
+#
+# Starts the API in its own process -- pinned to one CPU where the platform allows -- in front of the
+# stand-in server (with a simulated upstream latency), then drives it from this process over keep-alive
+# connections:
+#
+#   * a cold burst: every connection asks for the same few uncached stations at once, showing how many
+#     upstream fetches the coalescing actually made;
+#   * a sustained run over many stations, reporting requests/s and p50/p99 latency.
+#
+# Usage: python benchmarks/bench_api.py [seconds] [connections]
+#
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from os import path
+
+root = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from corpus import stations
+from standin import StandIn
+#
+upstreamLatency = 0.05  # seconds per stand-in request
+#
+async def client(port, targets, latencies, deadline):
+# One keep-alive connection issuing requests back to back until the deadline (or targets run out)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for target in targets:
+            if time.perf_counter() >= deadline:
+                break
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start, status.split()[1]))
+    finally:
+        writer.close()
+#
+async def load(port, connections, seconds, targetsFor):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    await asyncio.gather(*(client(port, targetsFor(i), latencies, deadline) for i in range(connections)))
+    return latencies, time.perf_counter() - start
+#
+def percentile(values, p):
+    return sorted(values)[min(len(values) - 1, int(len(values) * p))]
+#
+def report(label, latencies, seconds):
+    times = [t for t, status in latencies]
+    errors = sum(1 for t, status in latencies if status != b"200")
+    print(f"{label:10} {len(times):>9} {len(times) / seconds:>9.0f} {statistics.median(times) * 1000:>8.2f} "
+          f"{percentile(times, 0.99) * 1000:>8.2f} {errors:>7}")
+#
+def stats(port):
+    async def get():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+        data = await reader.read()
+        writer.close()
+        return json.loads(data.split(b"\r\n\r\n", 1)[1])
+    return asyncio.run(get())
+#
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    codes = stations(200)
+    query = "&indoor_t=72&rh=50&window=200&width=30&height=20&quantity=2"
+    with StandIn(latency=upstreamLatency) as server:
+        pin = (lambda: os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})) if hasattr(os, "sched_setaffinity") else None
+        api = subprocess.Popen([sys.executable, "-m", "economizer.api", "--port", "0", "--no-cache",
+                                "--rooturl", server.rooturl], cwd=root, stderr=subprocess.PIPE, text=True,
+                               preexec_fn=pin)
+        try:
+            port = int(api.stderr.readline().rsplit(":", 1)[1].split("/")[0])
+            print(f" *** API on port {port} (1 CPU), upstream latency {upstreamLatency * 1000:.0f} ms, "
+                  f"{connections} connections, {os.cpu_count()} CPUs on host\n")
+            print(f"{'phase':10} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+            burstStations = codes[:4]
+            latencies, elapsed = asyncio.run(load(port, connections * 4, 60, lambda i: [
+                f"/decision?station={burstStations[i % len(burstStations)]}{query}"]))
+            report("cold burst", latencies, elapsed)
+            burst = stats(port)
+
+            def targets(i):
+                rng = random.Random(i)
+                return (f"/decision?station={rng.choice(codes)}{query}" for n in range(10 ** 9))
+            latencies, elapsed = asyncio.run(load(port, connections, seconds, targets))
+            report("sustained", latencies, elapsed)
+            total = stats(port)
+        finally:
+            api.terminate()
+            api.wait()
+    print(f"\ncold burst: {burst['requests']} requests for {len(burstStations)} stations -> "
+          f"{burst['fetches']} upstream fetches ({burst['coalesced']} coalesced)")
+    print(f"overall:    {total['requests']} requests, {total['fetches']} upstream fetches, "
+          f"{total['coalesced']} coalesced, {total['hits']} served from memory; "
+          f"stand-in saw {server.requests} requests")
+#
+if __name__ == "__main__":
+    main()
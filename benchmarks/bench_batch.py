@@ -0,0 +1,74 @@
+# Benchmark: batch evaluation of many zones from a config file
+#
+# Writes a synthetic zone file (random window sizes/orientations spread over many stations, each served
+# a distinct synthetic report by the stand-in server) and times economizer.batch end to end: reading,
+# concurrent station retrieval, chunked vectorized evaluation and CSV output.  Also checks that the sample
+# zone file (benchmarks/fixtures/zones.csv), whose last zone names a station with no observation, still
+# evaluates every other zone.
+#
+# Usage: python benchmarks/bench_batch.py [zones] [stations]
+#
+import csv
+import io
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import stationfile, stationfiles, stations
+from economizer import batch
+from economizer.batch import Evaluator, readzones, writeresults
+from standin import StandIn
+#
+def writezones(fileName, zoneCount, stationCodes, seed=1):
+    rng = random.Random(seed)
+    with open(fileName, 'w', newline='') as zoneFile:
+        writer = csv.writer(zoneFile)
+        writer.writerow(["name", "station", "indoor_temp", "indoor_rh", "window_width", "window_height",
+                         "window_quantity", "window_dir"])
+        for i in range(zoneCount):
+            writer.writerow([f"zone-{i}", rng.choice(stationCodes), rng.randint(65, 78), rng.randint(30, 60),
+                             rng.randint(20, 60), rng.randint(1, 30), rng.randint(1, 9), rng.randint(0, 359)])
+#
+def checkunavailable(server, directory):
+# Run the batch command on the sample zone file with one station unavailable (XAAA answers 404)
+    rng = random.Random(1)
+    fixture = path.join(path.dirname(path.abspath(__file__)), "fixtures", "zones.csv")
+    with open(fixture, newline='') as zoneFile:
+        codes = {row["station"] for row in csv.DictReader(zoneFile)} - {"XAAA"}
+    for code in codes:
+        server.update(code, stationfile(rng, code, datetime(2021, 6, 15, 12, 53, tzinfo=timezone.utc))[0])
+    fileName = path.join(directory, "results.csv")
+    status = batch.main([fixture, "--rooturl", server.rooturl, "--no-cache", "--output", fileName])
+    with open(fileName, newline='') as resultFile:
+        modes = {row["zone"]: row["mode"] for row in csv.DictReader(resultFile)}
+    assert status == 2, "the unavailable station is not reported"
+    assert modes.pop("missing") == "no observation"
+    assert len(modes) == 6 and "no observation" not in modes.values(), modes
+#
+def main():
+    zoneCount = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    stationCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    codes = stations(stationCount)
+    with StandIn() as server, tempfile.TemporaryDirectory() as directory:
+        for code, (body, truth) in zip(codes, stationfiles(stationCount)):
+            server.update(code, body)
+        fileName = path.join(directory, "zones.csv")
+        writezones(fileName, zoneCount, codes)
+        start = time.perf_counter()
+        errors = []
+        evaluator = Evaluator(rooturl=server.rooturl)
+        output = io.StringIO()
+        count = writeresults(evaluator.run(readzones(fileName, errors)), output)
+        seconds = time.perf_counter() - start
+        checkunavailable(server, directory)
+    print(f" *** {zoneCount} zones across {stationCount} stations (no observation cache)\n")
+    print(f"Batch: {seconds:.2f} s ({count / seconds:,.0f} zones/s), {server.requests} requests, "
+          f"{len(errors)} invalid zones, {len(evaluator.errors)} station errors")
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Benchmark: repeated polls with fresh connections vs. pooled keep-alive vs. pooled conditional GET
+#
+# Polls the same stations several times against the local stand-in server, as a controller checking
+# for a new hourly METAR would, and reports bytes transferred and latency for each strategy.
+#
+# Usage: python benchmarks/bench_conditional.py [stations] [polls] [latency seconds]
+#
+import statistics
+import sys
+import time
+import urllib.request
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from economizer.httpclient import HTTPClient
+from standin import StandIn
+#
+def urllibget(url):
+# One blocking request on a fresh connection, as getweather() does
+    with urllib.request.urlopen(urllib.request.Request(url), timeout=10) as resp:
+        return resp.read()
+#
+def poll(server, urls, polls, get):
+    bytesBefore = server.bytesSent
+    latencies = []
+    for _ in range(polls):
+        for url in urls:
+            start = time.perf_counter()
+            get(url)
+            latencies.append(time.perf_counter() - start)
+    return server.bytesSent - bytesBefore, latencies
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+    with StandIn(latency=latency) as server:
+        urls = [f"{server.decodedurl}K{i:03d}.TXT" for i in range(stationCount)]
+        pooled = HTTPClient(conditional=False)
+        conditional = HTTPClient()
+        strategies = [
+            ("fresh connection", urllibget),
+            ("keep-alive pool", lambda url: pooled.get(url).data),
+            ("pool + conditional", lambda url: conditional.get(url).data),
+        ]
+        print(f" *** {stationCount} decoded station files x {polls} polls, "
+              f"{latency * 1000:.0f} ms server latency\n")
+        print(f"{'strategy':>20} {'bytes':>10} {'bytes/poll':>11} {'mean ms':>8} {'p99 ms':>8} {'conns':>6}")
+        for name, get in strategies:
+            sentBytes, latencies = poll(server, urls, polls, get)
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            if get is urllibget:
+                conns = len(latencies)
+            else:
+                conns = (pooled if name == "keep-alive pool" else conditional).connectionsOpened
+            print(f"{name:>20} {sentBytes:>10} {sentBytes / len(latencies):11.0f} "
+                  f"{statistics.mean(latencies) * 1000:8.2f} {p99 * 1000:8.2f} {conns:>6}")
+        print(f"\n304 Not Modified responses: {conditional.notModified} of {conditional.requests}")
+        pooled.close()
+        conditional.close()
+#
+if __name__ == "__main__":
+    main()
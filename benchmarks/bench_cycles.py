@@ -0,0 +1,57 @@
+# Benchmark: streaming ingestion of a multi-megabyte NOAA cycle file
+#
+# Writes a synthetic cycle file (benchmarks/corpus.py) to a temporary directory and evaluates every
+# report in it, streamed from a file object and from a memory map, reporting throughput and the peak
+# Python memory allocated while doing so (mapped file pages are not counted).  The peak should stay
+# flat as the file grows.
+#
+# Usage: python benchmarks/bench_cycles.py [reports]
+#
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import writecycle
+from economizer.cycles import evaluatecycle
+from economizer.decision import Zone
+from economizer.sattable import loadtable
+#
+def run(label, name, source, zone, megabytes):
+# Time one pass, then measure peak allocations in a second pass (tracemalloc slows allocation down)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    start = time.perf_counter()
+    decisions = sum(1 for _ in evaluatecycle(source, zone))
+    seconds = time.perf_counter() - start
+    if hasattr(source, "seek"):
+        source.seek(0)
+    tracemalloc.start()
+    sum(1 for _ in evaluatecycle(source, zone))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label} {name:>7} {decisions:>9} {seconds:8.2f} {decisions / seconds:11,.0f} {megabytes / seconds:6.1f} "
+          f"{peak / 1e6:8.1f}")
+#
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [20000, 60000]
+    loadtable()
+    zone = Zone("office", None, 72, 50, 30, 20, 2, 200)
+    print(f"{'reports':>8} {'MB':>5} {'source':>7} {'decisions':>9} {'seconds':>8} {'reports/s':>11} {'MB/s':>6} "
+          f"{'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for reportCount in counts:
+            fileName = path.join(directory, "12Z.TXT")
+            megabytes = writecycle(fileName, reportCount) / 1e6
+            label = f"{reportCount:>8} {megabytes:5.1f}"
+            with open(fileName, 'rb') as stream:
+                run(label, "stream", stream, zone, megabytes)
+            run(label, "mmap", fileName, zone, megabytes)
+            os.remove(fileName)
+#
+if __name__ == "__main__":
+    main()
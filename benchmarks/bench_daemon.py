@@ -0,0 +1,106 @@
+# Benchmark: resident daemon vs. a cron job, CPU & wakeups per hour
+#
+# The daemon (economizer.daemon.Poller) runs against the stand-in server on a simulated clock: each
+# station publishes a new report a few minutes after every routine issuance, and the poller's sleeps
+# advance the clock instead of waiting.  The cron approach is timed for real -- one fresh interpreter
+# every 5 minutes running the batch evaluator over the same zones -- and scaled to an hour.
+# CPU includes the in-process stand-in server in both cases.
+#
+# Usage: python benchmarks/bench_daemon.py [stations] [hours]
+#
+import csv
+import heapq
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from os import path
+
+root = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from corpus import stationfile, stations
+from economizer.daemon import Poller
+from economizer.obscache import issuanceMinute
+from standin import StandIn
+#
+cronInterval = 5 * 60   # seconds between cron runs
+cronRuns = 3            # cron runs actually timed
+#
+def cpuseconds(who):
+    usage = resource.getrusage(who)
+    return usage.ru_utime + usage.ru_stime
+#
+class SimulatedClock:
+# Clock whose waits advance time and publish any reports issued meanwhile
+    def __init__(self, start, server, codes, hours, rng):
+        self.now = start
+        self.server = server
+        self.published = []
+        for hour in range(hours + 1):
+            issued = start - start % 3600 + hour * 3600 + issuanceMinute * 60
+            for code in codes:
+                heapq.heappush(self.published, (issued + rng.uniform(60, 600), code, issued))
+        self.rng = rng
+
+    def clock(self):
+        return self.now
+
+    def wait(self, seconds):
+        self.now += seconds
+        while self.published and self.published[0][0] <= self.now:
+            available, code, issued = heapq.heappop(self.published)
+            body, truth = stationfile(self.rng, code, datetime.fromtimestamp(issued, timezone.utc))
+            self.server.update(code, body)
+        return False
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    hours = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    codes = stations(stationCount)
+    with StandIn() as server, tempfile.TemporaryDirectory() as directory:
+        zoneFile = path.join(directory, "zones.csv")
+        with open(zoneFile, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "station", "indoor_temp", "indoor_rh", "window_width", "window_height",
+                             "window_quantity", "window_dir"])
+            for code in codes:
+                writer.writerow([f"zone-{code}", code, 72, 50, 30, 20, 2, 200])
+
+        # cron: a fresh interpreter (table load, new connections) every cronInterval
+        before = cpuseconds(resource.RUSAGE_SELF), cpuseconds(resource.RUSAGE_CHILDREN)
+        for run in range(cronRuns):
+            subprocess.run([sys.executable, "-m", "economizer.batch", zoneFile, "--rooturl", server.rooturl,
+                            "--no-cache", "--output", path.join(directory, "out.csv")],
+                           cwd=root, check=True, stderr=subprocess.DEVNULL)
+        cronCpu = (cpuseconds(resource.RUSAGE_SELF) - before[0] + cpuseconds(resource.RUSAGE_CHILDREN) - before[1])
+        cronCpuHour = cronCpu / cronRuns * 3600 / cronInterval
+
+        # daemon: simulated hours on one warm process
+        from economizer.batch import readzones
+        zones = list(readzones(zoneFile))
+        rng = random.Random(1)
+        start = 1623760000.0
+        sim = SimulatedClock(start, server, codes, hours, rng)
+        decisions = []
+        poller = Poller(zones, decisions.extend, rooturl=server.rooturl, clock=sim.clock, wait=sim.wait,
+                        rng=rng)
+        requests = server.requests
+        before = cpuseconds(resource.RUSAGE_SELF)
+        poller.run(until=start + hours * 3600)
+        daemonCpuHour = (cpuseconds(resource.RUSAGE_SELF) - before) / hours
+        poller.client.close()
+
+    print(f" *** {stationCount} stations, cron every {cronInterval // 60} min vs. daemon over {hours} simulated hours\n")
+    print(f"{'':8} {'CPU ms/hour':>12} {'wakeups/hour':>13} {'requests/hour':>14} {'evaluations/hour':>17}")
+    print(f"{'cron':8} {cronCpuHour * 1000:12.0f} {3600 // cronInterval:13d} {stationCount * 3600 // cronInterval:14d} "
+          f"{stationCount * 3600 // cronInterval:17d}")
+    print(f"{'daemon':8} {daemonCpuHour * 1000:12.0f} {poller.wakeups / hours:13.1f} "
+          f"{(server.requests - requests) / hours:14.1f} {len(decisions) / hours:17.1f}")
+    print(f"\ndaemon: {poller.polls} polls, {poller.unchanged} unchanged (304), {poller.updates} new observations, "
+          f"{poller.failures} failures")
+#
+if __name__ == "__main__":
+    main()
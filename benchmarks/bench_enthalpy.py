@@ -0,0 +1,65 @@
+# Benchmark: vectorized enthalpy engine vs. the scalar path used by the evaluator scripts
+#
+# Usage: python benchmarks/bench_enthalpy.py [records]
+#
+import csv
+import math
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from economizer import psychrometrics
+from economizer.sattable import defaultTableFileName
+#
+def scalarpath(dbTempSatTable, outdoorT, outdoorDp, indoorT, indoorRh, windKnots, windDir, windowDir, area):
+# One evaluation exactly as performed in metarEnthalpyEconomizer_Evaluator.py
+    rhOutdoor = float(dbTempSatTable[str(round(outdoorDp))]) / float(dbTempSatTable[str(round(outdoorT))])
+    x = float(dbTempSatTable[str(round(outdoorT))]) * rhOutdoor / 7000
+    OutdoorEnthalpy = (0.240 * outdoorT) + x * (0.444 * outdoorT + 1061)
+    x = float(dbTempSatTable[str(round(indoorT))]) * indoorRh / 7000
+    IndoorEnthalpy = (0.240 * indoorT) + x * (0.444 * indoorT + 1061)
+    windDirOffset = abs(windDir - windowDir)
+    if windDirOffset >= 90:
+        massFlowRate = 0
+    else:
+        massFlowRate = windKnots * 101.27 * abs(math.cos(math.radians(windDirOffset))) * area / 4.5
+    return massFlowRate * (IndoorEnthalpy - OutdoorEnthalpy)
+#
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = np.random.default_rng(1)
+    outdoorT = rng.uniform(20, 100, records)
+    outdoorDp = outdoorT - rng.uniform(0, 20, records)
+    indoorT = rng.uniform(60, 85, records)
+    indoorRh = rng.uniform(0.2, 0.7, records)
+    windKnots = rng.uniform(0, 25, records)
+    windDir = rng.uniform(0, 359, records)
+    windowDir = rng.uniform(0, 359, records)
+    area = rng.uniform(1, 12, records)
+
+    with open(defaultTableFileName, 'r', newline='') as lookupTable:
+        dbTempSatTable = {rows[0]: rows[1] for rows in csv.reader(lookupTable)}
+    table = psychrometrics.loadtable()
+
+    columns = [a.tolist() for a in (outdoorT, outdoorDp, indoorT, indoorRh, windKnots, windDir, windowDir, area)]
+    start = time.perf_counter()
+    for row in zip(*columns):
+        scalarpath(dbTempSatTable, *row)
+    scalarSeconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    psychrometrics.evaluate(outdoorT, indoorT, indoorRh, windKnots, windDir, windowDir, area,
+                            outdoorDewPoint=outdoorDp, table=table)
+    vectorSeconds = time.perf_counter() - start
+
+    print(f" *** {records} evaluations")
+    print(f"Scalar path:     {scalarSeconds:8.4f} s  ({records / scalarSeconds:14,.0f} evaluations/s)")
+    print(f"Vectorized path: {vectorSeconds:8.4f} s  ({records / vectorSeconds:14,.0f} evaluations/s)")
+    print(f"Speedup: {scalarSeconds / vectorSeconds:.1f}x")
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Benchmark: concurrent bulk station fetch vs. one blocking request at a time
+#
+# Runs against the local stand-in server (benchmarks/standin.py) with a simulated network latency.
+# Conditional requests are disabled so every request downloads the full file.
+#
+# Usage: python benchmarks/bench_fetch.py [latency seconds]
+#
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from economizer.fetch import fetchstation, fetchstations
+from economizer.httpclient import HTTPClient
+from standin import StandIn
+#
+def stationlist(count):
+    return [f"K{i:03d}" for i in range(count)]
+#
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.02
+    with StandIn(latency=latency) as server:
+        print(f" *** Stand-in server latency {latency * 1000:.0f} ms per request\n")
+        print(f"{'stations':>8} {'mode':>12} {'seconds':>9} {'stations/s':>11} {'errors':>7}")
+        for count in (10, 100, 1000):
+            stations = stationlist(count)
+            if count <= 100:
+                start = time.perf_counter()
+                with HTTPClient(conditional=False) as client:
+                    errors = sum(1 for s in stations if fetchstation(s, server.rooturl, client=client).error)
+                seconds = time.perf_counter() - start
+                print(f"{count:>8} {'sequential':>12} {seconds:9.3f} {count / seconds:11.1f} {errors:>7}")
+            for workers in (16, 64):
+                start = time.perf_counter()
+                with HTTPClient(conditional=False, maxIdlePerHost=workers) as client:
+                    errors = sum(1 for r in fetchstations(stations, server.rooturl, maxWorkers=workers, client=client)
+                                 if r.error)
+                seconds = time.perf_counter() - start
+                print(f"{count:>8} {f'{workers} workers':>12} {seconds:9.3f} {count / seconds:11.1f} {errors:>7}")
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Benchmark: fleet evaluation scaling from 1 to N processes
+#
+# A synthetic portfolio (buildings of random zones spread over stations with synthetic observations,
+# benchmarks/corpus.py) is evaluated with economizer.fleet on 1, 2, 4, ... up to the CPU count
+# (and at least 2) worker processes.  Observation retrieval is excluded; output goes to /dev/null.  A
+# building whose station has no observation is then checked to be counted as unevaluated, not to fail.
+#
+# Usage: python benchmarks/bench_fleet.py [zones] [buildings] [stations]
+#
+import os
+import random
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import stationfiles, stations
+from economizer.decision import Zone
+from economizer.fleet import evaluatefleet
+from economizer.metar import parseraw
+#
+def portfolio(zoneCount, buildingCount, codes, seed=1):
+    rng = random.Random(seed)
+    buildings = {}
+    for i in range(zoneCount):
+        building = f"building-{i % buildingCount}"
+        station = codes[hash(building) % len(codes)]
+        buildings.setdefault(building, []).append(
+            Zone(f"zone-{i}", station, rng.randint(65, 78), rng.randint(30, 60), rng.randint(20, 60),
+                 rng.randint(1, 30), rng.randint(1, 9), rng.randint(0, 359)))
+    return buildings
+#
+def main():
+    zoneCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    buildingCount = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    stationCount = int(sys.argv[3]) if len(sys.argv) > 3 else 100
+    codes = stations(stationCount)
+    observations = {code: parseraw(body) for code, (body, truth) in zip(codes, stationfiles(stationCount))}
+    buildings = portfolio(zoneCount, buildingCount, codes)
+    cpus = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] < max(cpus, 2):
+        counts.append(min(counts[-1] * 2, max(cpus, 2)))
+    print(f" *** {zoneCount:,} zones in {buildingCount:,} buildings, {stationCount} stations, {cpus} CPUs\n")
+    print(f"{'processes':>9} {'seconds':>8} {'zones/s':>10} {'speedup':>8}")
+    baseline = None
+    for processes in counts:
+        with open(os.devnull, 'w') as output:
+            start = time.perf_counter()
+            totals = evaluatefleet(buildings, observations, output, processes=processes)
+            seconds = time.perf_counter() - start
+        assert sum(t.zones for t in totals.values()) == zoneCount
+        baseline = baseline or seconds
+        print(f"{processes:>9} {seconds:8.2f} {zoneCount / seconds:10,.0f} {baseline / seconds:7.2f}x")
+    buildings["unavailable"] = [zone._replace(station="XAAA") for zone in buildings[next(iter(buildings))]]
+    with open(os.devnull, 'w') as output:
+        totals = evaluatefleet(buildings, dict(observations, XAAA=None), output, processes=2)
+    assert totals["unavailable"].unevaluatedZones == len(buildings["unavailable"])
+    assert sum(t.unevaluatedZones for t in totals.values()) == len(buildings["unavailable"])
+#
+if __name__ == "__main__":
+    main()
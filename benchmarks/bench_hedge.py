@@ -0,0 +1,73 @@
+# Benchmark: tail latency of one request per observation vs. deadline-bounded hedged retrieval
+#
+# Runs against the local stand-in server (benchmarks/standin.py) with injected delays: most requests
+# answer after the base latency, a few stall for a second and a few hang past the deadline.  Each
+# retrieval asks for KSBY; hedged retrievals also ask the decoded directory when the raw file is slow.
+# Conditional requests are disabled so every request downloads the full file.
+#
+# Usage: python benchmarks/bench_hedge.py [retrievals]
+#
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from economizer.fetch import fetchhedged, fetchstation
+from economizer.httpclient import HTTPClient
+from standin import StandIn
+#
+latency = 0.02          # seconds every request takes
+slowShare, slowDelay = 0.05, 1.0
+hungShare, hungDelay = 0.01, 12.0
+deadline = 3.0
+workers = 16
+#
+def delays(seed=1):
+    rng = random.Random(seed)
+
+    def delay(directory, station):
+        draw = rng.random()
+        return hungDelay if draw < hungShare else slowDelay if draw < hungShare + slowShare else 0.0
+    return delay
+#
+def run(label, retrieve, count):
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(retrieve, range(count)))
+        seconds = time.perf_counter() - start
+    elapsed = np.array([e for e, _ in results]) * 1000
+    failures = sum(1 for _, error in results if error)
+    p50, p90, p99 = np.percentile(elapsed, [50, 90, 99])
+    print(f"{label:>22} {p50:8.0f} {p90:8.0f} {p99:8.0f} {elapsed.max():8.0f} {failures:>9} {seconds:8.2f}")
+#
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f" *** {count} retrievals, {workers} at a time; {latency * 1000:.0f} ms latency, "
+          f"{slowShare:.0%} stall {slowDelay:g} s, {hungShare:.0%} hang {hungDelay:g} s; deadline {deadline:g} s\n")
+    print(f"{'':>22} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'failures':>9} {'seconds':>8}")
+    with StandIn(latency=latency, delay=delays()) as server:
+        urls = [server.rooturl + "KSBY.TXT", server.decodedurl + "KSBY.TXT"]
+        with HTTPClient(conditional=False, maxIdlePerHost=workers * 2) as client:
+            def single(_):
+                result = fetchstation("KSBY", server.rooturl, client=client)
+                return result.elapsed, result.error
+            run("single (10 s timeout)", single, count)
+
+            def bounded(_):
+                result = fetchhedged(urls[:1], deadline, client=client)
+                return result.elapsed, result.error
+            run("deadline + retries", bounded, count)
+
+            for hedgeAfter in (0.25, 0.1):
+                def hedged(_):
+                    result = fetchhedged(urls, deadline, hedgeAfter, client=client)
+                    return result.elapsed, result.error
+                run(f"hedged after {hedgeAfter * 1000:.0f} ms", hedged, count)
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# Benchmark: change-detection pipeline vs. full recompute
+#
+# Feeds rounds of station report files (benchmarks/corpus.py) in which only some stations' reports
+# changed since the previous round -- as when a server without conditional GET support is polled every
+# few minutes -- and compares re-parsing & re-evaluating every zone each round with economizer.incremental,
+# which fingerprints the reports and only re-parses & re-evaluates what changed.
+#
+# Usage: python benchmarks/bench_incremental.py [stations] [zones per station] [rounds] [changed fraction]
+#
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from corpus import stationfile, stations
+from economizer.decision import Decision, Zone, evaluatearrays, observationarrays, observationpressures
+from economizer.incremental import Pipeline
+from economizer.metar import parseraw
+from economizer.sattable import loadtable
+#
+def fullrecompute(reports, zones, arrays, table):
+# Every report parsed & every zone (arrays: a Zone of their fields) evaluated, as a cron job would
+    observations = {station: parseraw(raw) for station, raw in reports.items()}
+    rows = [observations[z.station] for z in zones]
+    outdoorT, dewPoint, speeds, dirs = observationarrays(rows)
+    values = evaluatearrays(outdoorT, dewPoint, speeds, dirs, arrays, table, observationpressures(rows))
+    return [Decision(z.name, z.station, o.get("observed"), *v)
+            for z, o, v in zip(zones, rows, zip(outdoorT.tolist(), dewPoint.tolist(),
+                                                *(a.tolist() for a in values[:4]), values[4]))]
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    perStation = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 60
+    fraction = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+    rng = random.Random(1)
+    codes = stations(stationCount)
+    zones = [Zone(f"{code}-{i}", code, rng.uniform(68, 76), rng.uniform(35, 60), 30, 20, rng.randint(1, 4),
+                  rng.randrange(0, 360, 10)) for code in codes for i in range(perStation)]
+    arrays = Zone("", None, *(np.array([getattr(z, f) for z in zones], dtype=float) for f in Zone._fields[2:]))
+    when = datetime(2021, 6, 15, 12, 53, tzinfo=timezone.utc)
+    reports = {code: stationfile(rng, code, when)[0] for code in codes}
+    roundReports = []
+    for r in range(rounds):
+        reports = dict(reports)
+        for code in rng.sample(codes, int(stationCount * fraction)):
+            reports[code] = stationfile(rng, code, when + timedelta(minutes=r + 1))[0]
+        roundReports.append(reports)
+
+    table = loadtable()
+    start = time.perf_counter()
+    for reports in roundReports:
+        fullrecompute(reports, zones, arrays, table)
+    fullTime = time.perf_counter() - start
+
+    pipeline = Pipeline(zones, table=table)
+    pipeline.updates(roundReports[0])
+    published = []
+    pipeline.subscribe(published.extend)
+    start = time.perf_counter()
+    for reports in roundReports:
+        pipeline.updates(reports)
+    pipelineTime = time.perf_counter() - start
+
+    print(f" *** {stationCount} stations x {perStation} zones, {rounds} rounds, "
+          f"{fraction:.0%} of reports changed per round\n")
+    print(f"Full recompute:  {fullTime / rounds * 1000:8.2f} ms/round ({len(zones)} decisions)")
+    print(f"Pipeline:        {pipelineTime / rounds * 1000:8.2f} ms/round "
+          f"({len(published) / rounds:.0f} changed decisions published; {fullTime / pipelineTime:.1f}x faster)")
+    print(f"\npipeline: {pipeline.reports} reports, {pipeline.unchanged} unchanged, {pipeline.parses} parsed, "
+          f"{pipeline.evaluations} zone evaluations")
+#
+if __name__ == "__main__":
+    main()
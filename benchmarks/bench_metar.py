@@ -0,0 +1,63 @@
+# Benchmark: single-pass METAR tokenizer vs. the fixed-offset slicing parser it replaced
+#
+# Parses a synthetic corpus (benchmarks/corpus.py) with both parsers, reporting throughput and how
+# many reports each one decodes correctly.
+#
+# Usage: python benchmarks/bench_metar.py [reports]
+#
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import stationfiles
+from economizer.metar import parseraw
+#
+def slicingparser(data):
+# The fixed-offset parser formerly inline in metarEnthalpyEconomizer_Evaluator.py
+    wxdata = str(data)
+    slash = wxdata.rindex('/')
+    temperatureC = float(wxdata[slash - 2:slash])
+    dewPointC = float(wxdata[slash + 1:slash + 3])
+    if "AUTO" in wxdata:
+        dirIdx, speedIdx = 38, 41
+    else:
+        dirIdx, speedIdx = 33, 36
+    windSpeedKnots = float(wxdata[speedIdx:speedIdx + 2])
+    windDir = wxdata[dirIdx:dirIdx + 3]
+    if windDir != 'VRB':
+        windDir = float(windDir)
+    return {"temperatureC": temperatureC, "dewPointC": dewPointC, "windDir": windDir,
+            "windSpeedKnots": windSpeedKnots}
+#
+def run(parser, files):
+    correct = failed = 0
+    start = time.perf_counter()
+    results = []
+    for data, _ in files:
+        try:
+            results.append(parser(data))
+        except ValueError:
+            results.append(None)
+    seconds = time.perf_counter() - start
+    for result, (_, truth) in zip(results, files):
+        if result is None:
+            failed += 1
+        elif all(result[k] == truth[k] for k in ("temperatureC", "dewPointC", "windDir", "windSpeedKnots")):
+            correct += 1
+    return seconds, correct, failed
+#
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    files = stationfiles(count)
+    megabytes = sum(len(data) for data, _ in files) / 1e6
+    print(f" *** {count} reports ({megabytes:.1f} MB)\n")
+    print(f"{'parser':>10} {'seconds':>8} {'reports/s':>11} {'MB/s':>6} {'correct':>8} {'errors':>7}")
+    for name, parser in (("slicing", slicingparser), ("tokenizer", parseraw)):
+        seconds, correct, failed = run(parser, files)
+        print(f"{name:>10} {seconds:8.3f} {count / seconds:11,.0f} {megabytes / seconds:6.1f} "
+              f"{correct / count:8.1%} {failed:>7}")
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Benchmark: instrumentation overhead
+#
+# Times the instrumented paths with the metrics registry enabled and disabled (alternating, best of
+# several repeats -- many short ones for the one-at-a-time paths):
+#
+#   * streaming a synthetic cycle file through economizer.cycles.evaluatecycle (batch-level spans);
+#   * parsing & evaluating one recorded observation at a time, as the daemon and API do (per-call
+#     parse/decode, evaluate, lookup, enthalpy & airflow spans);
+#
+# plus the raw cost of one span.
+#
+# Usage: python benchmarks/bench_metrics.py [records]
+#
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import writecycle
+from economizer import metrics
+from economizer.cycles import evaluatecycle
+from economizer.decision import Zone, decide
+from economizer.metar import parsedecoded, parseraw
+from suite import fixtures
+#
+zone = Zone("office", None, 72, 50, 30, 20, 2, 200)
+#
+def best(function, repeats=7):
+    times = {True: [], False: []}
+    for i in range(repeats):
+        for enabled in (True, False):
+            metrics.enable() if enabled else metrics.disable()
+            start = time.perf_counter()
+            function()
+            times[enabled].append(time.perf_counter() - start)
+    metrics.enable()
+    return min(times[True]), min(times[False])
+#
+def single(files, parse, name):
+# One observation at a time, timed like obscache.getobservation()
+    for data in files:
+        with metrics.span(name):
+            observation = parse(data)
+        decide([observation], zone)
+#
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(" *** Best of alternating runs\n")
+    print(f"{'':38} {'enabled s':>10} {'disabled s':>11} {'overhead':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = path.join(directory, "cycle.TXT")
+        writecycle(fileName, count)
+        on, off = best(lambda: sum(1 for d in evaluatecycle(fileName, zone)))
+        print(f"{f'cycle file, {count} reports':38} {on:10.3f} {off:11.3f} {(on / off - 1) * 100:8.1f}%")
+    for label, directory, parse, name in (("one at a time, raw", "stations", parseraw, "parse"),
+                                          ("one at a time, decoded", "decoded", parsedecoded, "decode")):
+        files = fixtures(directory) * (100 // len(fixtures(directory)))
+        on, off = best(lambda: single(files, parse, name), repeats=500)     # short runs: less noise in the best
+        print(f"{f'{label}, {len(files)} reports':38} {on:10.3f} {off:11.3f} {(on / off - 1) * 100:8.1f}%")
+    spans = 1000000
+    start = time.perf_counter()
+    for i in range(spans):
+        with metrics.span("bench"):
+            pass
+    print(f"\none span: {(time.perf_counter() - start) / spans * 1e9:.0f} ns")
+#
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Benchmark: columnar observation archive
+#
+# Writes a synthetic year of hourly reports per station (benchmarks/corpus.py) as an IEM CSV archive,
+# ingests it into a columnar archive, then compares a full replay from the text archive with one from the
+# columns, times a one station / one season query, and times the incremental append of a new cycle.
+#
+# Usage: python benchmarks/bench_obsarchive.py [stations]
+#
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import stations, writearchive
+from economizer.decision import Zone
+from economizer.obsarchive import ObservationArchive, columns, ingest, replaycolumns
+from economizer.replay import replay
+from economizer.sattable import loadtable
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    zone = Zone("", None, 72, 50)
+    table = loadtable()
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = path.join(directory, "archive.csv")
+        records = writearchive(fileName, stations(stationCount))
+        archive = ObservationArchive(path.join(directory, "columns"))
+        start = time.perf_counter()
+        ingest(archive, [fileName])
+        ingested = time.perf_counter() - start
+
+        start = time.perf_counter()
+        textTotals = replay(fileName, zone, table=table)
+        textTime = time.perf_counter() - start
+        start = time.perf_counter()
+        columnTotals = replaycolumns(archive, zone, table=table)
+        columnTime = time.perf_counter() - start
+        worst = max(abs(textTotals[s].coolingBtu - columnTotals[s].coolingBtu) / textTotals[s].coolingBtu
+                    for s in textTotals)
+
+        repeat = 1000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = archive.query("KSBY", "2020-06-01", "2020-09-01")
+            sum(float(values.sum()) for values in result.values())     # touch every value
+        queryTime = (time.perf_counter() - start) / repeat
+        rowBytes = sum(values.itemsize for values in result.values())
+        archiveBytes = sum(archive.count(s) for s in archive.stations()) * rowBytes
+
+        newCycle = [{"station": s, "observed": "2021/01/01 00:53", "temperatureC": 1.0, "dewPointC": -3.0,
+                     "windDir": 200.0, "windSpeedKnots": 8.0, "gustKnots": None, "altimeterInHg": 30.01}
+                    for s in stations(stationCount)]
+        start = time.perf_counter()
+        archive.append(newCycle)
+        appendTime = time.perf_counter() - start
+
+    print(f" *** {stationCount} station(s) x {records // stationCount} hourly records, "
+          f"{len(columns)} columns ({rowBytes} bytes per observation)\n")
+    print(f"Ingest text archive:           {ingested:.2f} s ({records / ingested:,.0f} observations/s)")
+    print(f"Replay from text archive:      {textTime:.2f} s")
+    print(f"Replay from columns:           {columnTime:.3f} s ({textTime / columnTime:.0f}x faster, "
+          f"largest cooling BTU difference {worst:.1e})")
+    print(f"Query KSBY Jun-Aug 2020:       {queryTime * 1000:.2f} ms, {len(result['minutes'])} rows, "
+          f"{len(result['minutes']) * rowBytes / 1024:,.0f} of {archiveBytes / 1024:,.0f} KiB read")
+    print(f"Append one cycle:              {appendTime * 1000:.1f} ms ({stationCount} observations)")
+#
+if __name__ == "__main__":
+    main()
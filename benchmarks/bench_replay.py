@@ -0,0 +1,35 @@
+# Benchmark: annual replay of archived hourly observations for many stations
+#
+# Writes a synthetic year of hourly reports per station (benchmarks/corpus.py, IEM CSV layout) and
+# times the chunked, vectorized replay over it.
+#
+# Usage: python benchmarks/bench_replay.py [stations]
+#
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import stations, writearchive
+from economizer.decision import Zone
+from economizer.replay import replay
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    zone = Zone("office", None, 72, 50, 30, 20, 2, 200)
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = path.join(directory, "archive.csv")
+        records = writearchive(fileName, stations(stationCount))
+        start = time.perf_counter()
+        totals = replay(fileName, zone)
+        seconds = time.perf_counter() - start
+    print(f" *** {stationCount} stations x 1 year = {records} hourly records\n")
+    print(f"Replay: {seconds:.2f} s ({records / seconds:,.0f} records/s, {seconds / stationCount:.3f} s per station-year)")
+    t = totals[stations(1)[0]]
+    print(f"{t.station}: {t.hours:.0f} hours, {t.economizerHours:.0f} economizer hours, "
+          f"{t.coolingBtu:,.0f} BTU free cooling, {t.heatingBtu:,.0f} BTU heating penalty")
+#
+if __name__ == "__main__":
+    main()
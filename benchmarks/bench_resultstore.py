@@ -0,0 +1,89 @@
+# Benchmark: SQLite results store
+#
+# Writes a synthetic year of hourly results for many station zones into a results database in batched
+# WAL transactions, compares that with one commit per row (rollback journal, as a naive writer would),
+# and times summary (daily totals plus edge days from raw results) & result queries over the database.
+#
+# Usage: python benchmarks/bench_resultstore.py [stations]
+#
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from corpus import stations
+from economizer.decision import Decision
+from economizer.resultstore import ResultStore, _insert
+#
+hours = 366 * 24
+repeats = 5
+#
+def decisions(codes, seed=1):
+# A year of hourly results for one zone per station, hour by hour (as the daemon writes them)
+    rng = np.random.default_rng(seed)
+    modes = np.array(["cooling", "heating", "ineffective", "calm"], dtype=object)
+    for hour in range(hours):
+        observed = str(np.datetime64("2020-01-01T00:53") + np.timedelta64(hour, "h")).replace("-", "/").replace("T", " ")
+        values = rng.uniform(0, 100, (len(codes), 6))
+        q = rng.normal(0, 5000, len(codes))
+        mode = modes[rng.integers(0, 4, len(codes))]
+        for i, code in enumerate(codes):
+            v = values[i]
+            yield Decision("office", code, observed, v[0], v[1], v[2], v[3], v[4] * 10, q[i], mode[i])
+#
+def best(function):
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+#
+def main():
+    codes = stations(int(sys.argv[1]) if len(sys.argv) > 1 else 250)
+    with tempfile.TemporaryDirectory() as directory:
+        # one commit per row, rollback journal
+        sample = list(decisions(codes[:10]))[:2000]
+        with ResultStore(path.join(directory, "rows.db")) as store:
+            store.connection.execute("PRAGMA journal_mode = DELETE")
+            store.connection.execute("PRAGMA synchronous = FULL")
+            rows = [store._values(d, i * 60, 1.0) for i, d in enumerate(sample)]
+            start = time.perf_counter()
+            for row in rows:
+                with store.connection:
+                    store.connection.execute(_insert, row)
+            perRow = (time.perf_counter() - start) / len(rows)
+        print(f" *** One commit per row: {perRow * 1e6:,.0f} us per result ({1 / perRow:,.0f} results/s)")
+
+        fileName = path.join(directory, "results.db")
+        start = time.perf_counter()
+        with ResultStore(fileName) as store:
+            store.add(decisions(codes))
+        seconds = time.perf_counter() - start
+        count = len(codes) * hours
+        print(f" *** Batched WAL transactions: {count:,} results in {seconds:.1f} s "
+              f"({seconds / count * 1e6:.1f} us per result, {count / seconds:,.0f} results/s), "
+              f"{path.getsize(fileName) / 2 ** 20:,.0f} MiB\n")
+
+        with ResultStore(fileName) as store:
+            queries = [
+                ("one station, one month summary", lambda: store.summary("2020-06-01", "2020-07-01", [codes[0]])),
+                ("one station, one year summary", lambda: store.summary(stations=[codes[0]])),
+                ("one station, one day of results", lambda: list(store.results(codes[0], "2020-06-01", "2020-06-02"))),
+                ("all stations, one day summary", lambda: store.summary("2020-06-01", "2020-06-02")),
+                ("all stations, one month summary", lambda: store.summary("2020-06-01", "2020-07-01")),
+            ]
+            print(f"{'query':<34}{'ms':>9}{'rows':>7}")
+            for label, query in queries:
+                ms, result = best(query)
+                print(f"{label:<34}{ms:9.2f}{len(result):>7}")
+            plan = store.connection.execute("EXPLAIN QUERY PLAN SELECT count(*) FROM results "
+                                            "WHERE station = ? AND observed >= ? AND observed < ?", (codes[0], 0, 1))
+            print("\n *** " + "; ".join(row[-1] for row in plan))
+#
+if __name__ == "__main__":
+    main()
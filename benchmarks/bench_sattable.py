@@ -0,0 +1,91 @@
+# Benchmark: saturation table load & lookup -- string-keyed dict vs. dense interpolated array, and the
+# generated 0.1 deg F table (generated, reloaded from its cache, and looked up at station pressure).
+# Also checks that a report from a high station (KDEN, 5,434 ft in stations.csv) is evaluated at its
+# station pressure: the same report from an unlisted station (taken to be at sea level) must differ.
+#
+# Usage: python benchmarks/bench_sattable.py [lookups]
+#
+import csv
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from economizer import psychrometrics, sattable
+from economizer.decision import Zone, decide, observationpressures
+from economizer.metar import parseraw
+#
+def timeit(func, repeat=20):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+#
+def loaddict():
+    with open(sattable.defaultTableFileName, 'r', newline='') as lookupTable:
+        return {rows[0]: rows[1] for rows in csv.reader(lookupTable)}
+#
+def main():
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    fileName = sattable.defaultTableFileName
+    sattable.loadtable(fileName)  # make sure the binary cache exists
+
+    def loadcsv():
+        sattable.readcsv(fileName)
+
+    def loadbinary():
+        sattable.SatTable.frombinary(np.load(sattable.cachefilename(fileName)))
+
+    print(" *** Table load (best of 20)")
+    print(f"CSV -> dict:         {timeit(loaddict) * 1e6:10.1f} us")
+    print(f"CSV -> SatTable:     {timeit(loadcsv) * 1e6:10.1f} us")
+    print(f".npy -> SatTable:    {timeit(loadbinary) * 1e6:10.1f} us")
+    print(f"Generate SatTable:   {timeit(sattable.generatetable) * 1e6:10.1f} us")
+    print(f"Generated .npy:      {timeit(lambda: sattable.loadgenerated()) * 1e6:10.1f} us")
+
+    dbTempSatTable = loaddict()
+    table = sattable.loadtable(fileName)
+    temps = np.random.default_rng(1).uniform(0, 120, lookups)
+    tempList = temps.tolist()
+
+    def dictlookup():
+        for t in tempList:
+            float(dbTempSatTable[str(round(t))])
+
+    def arraylookup():
+        table.lookup(temps)
+
+    generated = sattable.loadtable()
+    pressures = np.random.default_rng(2).uniform(14.2, 15.1, lookups)
+
+    def generatedlookup():
+        generated.lookup(temps, pressures)
+
+    dictSeconds = timeit(dictlookup, 3)
+    arraySeconds = timeit(arraylookup, 3)
+    print(f"\n *** {lookups} lookups")
+    print(f"dict[str(round(t))]: {dictSeconds:8.4f} s  ({lookups / dictSeconds:14,.0f} lookups/s)")
+    print(f"SatTable.lookup:     {arraySeconds:8.4f} s  ({lookups / arraySeconds:14,.0f} lookups/s)")
+    generatedSeconds = timeit(generatedlookup, 3)
+    print(f"Generated, pressure: {generatedSeconds:8.4f} s  ({lookups / generatedSeconds:14,.0f} lookups/s)")
+
+    print("\n *** Same report at KDEN (5,434 ft) & at sea level (unlisted station)")
+    zone = Zone("office", None, 72, 50, 30, 20, 2, 180)
+    results = {}
+    for station in ("KDEN", "XDEN"):
+        observation = parseraw(f"2021/06/15 12:53\n{station} 151253Z 18010KT 10SM CLR 25/05 A3002".encode())
+        pressure = observationpressures([observation])[0]
+        x = float(psychrometrics.humidityratio(observation["temperatureC"] * 9 / 5 + 32,
+                                               dewPoint=observation["dewPointC"] * 9 / 5 + 32, pressure=pressure))
+        d = decide([observation], zone)[0]
+        print(f"{station}: {pressure:6.2f} psia, humidity ratio {x:.5f} lb/lb, Q {d.Q:10,.0f} BTU/hr")
+        results[station] = (x, d.Q)
+    assert results["KDEN"] != results["XDEN"], "station elevation is not applied"
+#
+if __name__ == "__main__":
+    main()
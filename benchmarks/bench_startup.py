@@ -0,0 +1,60 @@
+# Benchmark: import time & cold start
+#
+# Each measurement runs in a fresh interpreter.  Importing the package (or either interactive script)
+# must not print, prompt, touch the network or read the lookup table; the first calculation pays for
+# NumPy and the table load (from the .npy cache, or by generating the table when the cache is bypassed).
+#
+# Usage: python benchmarks/bench_startup.py [runs]
+#
+import statistics
+import subprocess
+import sys
+from os import path
+
+root = path.dirname(path.dirname(path.abspath(__file__)))
+#
+_timer = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{setup}
+middle = time.perf_counter()
+{code}
+end = time.perf_counter()
+print((middle - start) * 1000, (end - middle) * 1000, 'numpy' in sys.modules)
+"""
+#
+cases = [
+    ("import economizer", "import economizer", ""),
+    ("import economizer.metar", "import economizer.metar", ""),
+    ("import economizer.psychrometrics", "import economizer.psychrometrics", ""),
+    ("import enthalpyEconomizer_Evaluator", "import enthalpyEconomizer_Evaluator", ""),
+    ("import metarEnthalpyEconomizer_Evaluator", "import metarEnthalpyEconomizer_Evaluator", ""),
+    ("first evaluate() (.npy cache)", "import economizer",
+     "economizer.evaluate(78, 72, 50, 8, 200, 200, 4.0, outdoorDewPoint=62)"),
+    ("first evaluate() (generated)", "import economizer",
+     "economizer.loadtable(useCache=False); economizer.evaluate(78, 72, 50, 8, 200, 200, 4.0, outdoorDewPoint=62)"),
+]
+#
+def measure(setup, code):
+    # stdin is closed so an import that prompts fails instead of hanging
+    result = subprocess.run([sys.executable, "-c", _timer.format(root=root, setup=setup, code=code)], cwd=root,
+                            stdin=subprocess.DEVNULL, capture_output=True, text=True, timeout=60)
+    lines = result.stdout.splitlines()
+    if result.returncode or len(lines) != 1:
+        raise RuntimeError(f"{setup}: side effects on import\n{result.stdout}{result.stderr}")
+    importMs, codeMs, numpyLoaded = lines[0].split()
+    return float(importMs), float(codeMs), numpyLoaded == "True"
+#
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    print(f" *** Median of {runs} fresh interpreters\n")
+    print(f"{'':40} {'import ms':>10} {'first call ms':>14} {'numpy':>6}")
+    for label, setup, code in cases:
+        samples = [measure(setup, code) for i in range(runs)]
+        importMs = statistics.median(s[0] for s in samples)
+        codeMs = statistics.median(s[1] for s in samples)
+        print(f"{label:40} {importMs:10.1f} {codeMs:14.1f} {'yes' if samples[0][2] else 'no':>6}")
+#
+if __name__ == "__main__":
+    main()
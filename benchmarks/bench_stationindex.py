@@ -0,0 +1,56 @@
+# Benchmark: nearest station lookup
+#
+# Builds a StationIndex of thousands of synthetic stations (scattered over the globe, denser over the
+# continental US) and times bulk k-nearest queries for building coordinates, single queries, and a brute
+# force search of every station for comparison.
+#
+# Usage: python benchmarks/bench_stationindex.py [stations] [buildings]
+#
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from economizer.stationindex import StationIndex, chordmiles, unitvectors
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    buildingCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    rng = np.random.default_rng(1)
+    us = stationCount * 3 // 8
+    latitudes = np.concatenate([rng.uniform(25, 49, us), np.degrees(np.arcsin(rng.uniform(-1, 1, stationCount - us)))])
+    longitudes = np.concatenate([rng.uniform(-125, -67, us), rng.uniform(-180, 180, stationCount - us)])
+    start = time.perf_counter()
+    index = StationIndex([f"S{i:05d}" for i in range(stationCount)], latitudes, longitudes)
+    built = time.perf_counter() - start
+    buildingLats = rng.uniform(25, 49, buildingCount)
+    buildingLons = rng.uniform(-125, -67, buildingCount)
+
+    print(f" *** {stationCount:,} stations, {buildingCount:,} buildings (index built in {built * 1000:.1f} ms, "
+          f"{(index.order.nbytes + index.starts.nbytes + index.vectors.nbytes) / 1024:,.0f} KiB)\n")
+    for k in (1, 3):
+        start = time.perf_counter()
+        found, miles = index.nearest(buildingLats, buildingLons, k)
+        seconds = time.perf_counter() - start
+        print(f"Bulk k={k}:        {seconds * 1000:8.1f} ms  ({seconds / buildingCount * 1e6:6.2f} us/building)")
+
+    sample = 2000
+    start = time.perf_counter()
+    squared = 2 - 2 * unitvectors(buildingLats[:sample], buildingLons[:sample]) @ index.vectors.T
+    brute = chordmiles(squared.min(axis=1))
+    seconds = (time.perf_counter() - start) / sample
+    found, miles = index.nearest(buildingLats[:sample], buildingLons[:sample])
+    print(f"Brute force k=1:  {seconds * buildingCount * 1000:8.1f} ms  ({seconds * 1e6:6.2f} us/building, "
+          f"{'same' if np.allclose(brute, miles[:, 0]) else 'DIFFERENT'} results)")
+
+    repeat = min(2000, len(buildingLats))
+    start = time.perf_counter()
+    for i in range(repeat):
+        index.lookup(buildingLats[i], buildingLons[i], 1)
+    print(f"Single query:     {(time.perf_counter() - start) / repeat * 1e6:8.1f} us")
+#
+if __name__ == "__main__":
+    main()
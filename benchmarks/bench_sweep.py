@@ -0,0 +1,61 @@
+# Benchmark: window orientation & opening size sweep
+#
+# Sweeps a synthetic year of hourly reports per station (benchmarks/corpus.py) over every orientation
+# and the default grid of opening sizes, and compares with the estimated time for the scalar path
+# (one evaluation per combination per observation, as in bench_enthalpy.py).
+#
+# Usage: python benchmarks/bench_sweep.py [stations]
+#
+import sys
+import tempfile
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from bench_enthalpy import scalarpath
+from corpus import stations, writearchive
+from economizer.decision import Zone
+from economizer.sattable import defaultTableFileName, readcsv
+from economizer.sweep import rank, sweepstations
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    widths, heights, quantities = np.arange(20, 61, 4), np.arange(1, 31), np.arange(1, 10)
+    orientations = np.arange(360.0)
+    combinations = len(orientations) * len(widths) * len(heights) * len(quantities)
+    with tempfile.TemporaryDirectory() as directory:
+        fileName = path.join(directory, "archive.csv")
+        records = writearchive(fileName, stations(stationCount))
+        start = time.perf_counter()
+        results = sweepstations(fileName, Zone("", None, 72, 50), orientations)
+        swept = time.perf_counter()
+        ranked = {station: rank(result, widths, heights, quantities) for station, result in results.items()}
+        done = time.perf_counter()
+
+    # scalar path rate, for comparison
+    table = readcsv(defaultTableFileName)
+    satTable = {str(int(table.firstTemp + i)): v for i, v in enumerate(table.values.tolist())}
+    count = 20000
+    t = time.perf_counter()
+    for i in range(count):
+        scalarpath(satTable, 78, 60, 72, 0.5, 8, (i * 7) % 360, i % 360, 4.0)
+    scalarRate = count / (time.perf_counter() - t)
+
+    evaluations = combinations * records
+    print(f" *** {stationCount} station(s) x {records // stationCount} hourly records, "
+          f"{combinations:,} combinations per station ({evaluations:,} evaluations)\n")
+    print(f"Read, parse & reduce per orientation: {swept - start:.2f} s")
+    print(f"Rank all combinations:                {done - swept:.3f} s")
+    print(f"Total:                                {done - start:.2f} s "
+          f"({evaluations / (done - start):,.0f} combination-observations/s)")
+    print(f"Scalar path estimate:                 {evaluations / scalarRate / 3600:,.1f} hours "
+          f"({scalarRate:,.0f} evaluations/s)")
+    best = ranked[stations(1)[0]][0]
+    print(f"\nBest for {best.station}: {best.windowDir:.0f} deg, {best.windowQuantity} x {best.windowWidthInches:.0f}\" x "
+          f"{best.windowHeightInches:.0f}\", net {best.netBtu:,.0f} BTU")
+#
+if __name__ == "__main__":
+    main()
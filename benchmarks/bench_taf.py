@@ -0,0 +1,63 @@
+# Benchmark: forecast horizon schedule from TAF files
+#
+# Writes a TAF & a METAR station file for each of hundreds of stations (benchmarks/corpus.py) to a
+# local directory, then times reading & parsing the forecasts and evaluating every forecast hour of
+# every zone in one vectorized call -- one forecast cycle.
+#
+# Usage: python benchmarks/bench_taf.py [stations] [zones per station] [hours]
+#
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from corpus import stationfile, stations, taf
+from economizer.decision import Zone
+from economizer.metar import parseraw
+from economizer.sattable import loadtable
+from economizer.taf import parsetaf, readdirectory, schedule
+#
+def main():
+    stationCount = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    perStation = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    hours = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    rng = random.Random(1)
+    codes = stations(stationCount)
+    issued = datetime(2021, 6, 15, 11, 38, tzinfo=timezone.utc)
+    observed = datetime(2021, 6, 15, 11, 53, tzinfo=timezone.utc)
+    zones = [Zone(f"{code}-{i}", code, rng.uniform(68, 76), rng.uniform(35, 60), 30, 20, rng.randint(1, 4),
+                  rng.randrange(0, 360, 10)) for code in codes for i in range(perStation)]
+    loadtable()
+    with tempfile.TemporaryDirectory() as directory:
+        tafDirectory, stationDirectory = path.join(directory, "tafs"), path.join(directory, "stations")
+        os.makedirs(tafDirectory)
+        os.makedirs(stationDirectory)
+        for code in codes:
+            with open(path.join(tafDirectory, code + ".TXT"), 'wb') as tafFile:
+                tafFile.write(taf(rng, code, issued))
+            with open(path.join(stationDirectory, code + ".TXT"), 'wb') as stationFile:
+                stationFile.write(stationfile(rng, code, observed)[0])
+        errors = []
+        start = time.perf_counter()
+        tafs = readdirectory(tafDirectory, parsetaf, errors)
+        observations = readdirectory(stationDirectory, parseraw, errors)
+        parsed = time.perf_counter()
+        result = schedule(tafs, observations, zones, hours)
+        done = time.perf_counter()
+
+    cooling = int((result.mode == "cooling").sum())
+    print(f" *** {stationCount} stations x {perStation} zones, {hours} forecast hours "
+          f"({len(result.zone):,} zone-hours, {len(errors)} files skipped)\n")
+    print(f"Read & parse TAF + METAR files: {(parsed - start) * 1000:8.1f} ms "
+          f"({stationCount / (parsed - start):,.0f} stations/s)")
+    print(f"Hourly series & evaluation:     {(done - parsed) * 1000:8.1f} ms "
+          f"({len(result.zone) / (done - parsed):,.0f} zone-hours/s)")
+    print(f"Forecast cycle:                 {(done - start) * 1000:8.1f} ms, {cooling:,} economizer zone-hours")
+#
+if __name__ == "__main__":
+    main()
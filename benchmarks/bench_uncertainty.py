@@ -0,0 +1,62 @@
+# Benchmark: Monte Carlo uncertainty bands of Q
+#
+# Times economizer.uncertainty.qband() for 10^4 to 10^6 draws on the recorded station files against the
+# same draws evaluated through decision.evaluatearrays() (float64, per-draw pressure correction) and
+# reduced with np.quantile, and prints each station's band.
+#
+# Usage: python benchmarks/bench_uncertainty.py
+#
+import glob
+import sys
+import time
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from economizer.decision import Zone, evaluatearrays, observationpressures
+from economizer.metar import parseraw
+from economizer.sattable import loadtable
+from economizer.uncertainty import drawinputs, qband
+#
+fixturePath = path.join(path.dirname(path.abspath(__file__)), "fixtures", "stations")
+zone = Zone("office", None, 72, 50, 30, 20, 2, 200)
+repeats = 5
+#
+def best(function):
+    times = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+#
+def reference(observation, draws, rng):
+# The same band through the general evaluation path, for comparison
+    outdoorT, dewPoint, speeds, dirs = drawinputs(observation, draws, rng).astype(float)
+    pressure = np.full(draws, observationpressures([observation])[0])
+    Q = evaluatearrays(outdoorT, dewPoint, speeds, dirs, zone, pressure=pressure)[3]
+    return np.quantile(Q[~np.isnan(Q)], [0.05, 0.5, 0.95])
+#
+def main():
+    table = loadtable()
+    with open(path.join(fixturePath, "KSBY.TXT"), 'rb') as fixture:
+        observation = parseraw(fixture.read())
+    print(" *** KSBY, 90% band\n")
+    print(f"{'draws':>9} {'qband ms':>9} {'evaluatearrays + np.quantile ms':>32}")
+    for draws in (10000, 100000, 1000000):
+        fast = best(lambda: qband(observation, zone, draws, rng=np.random.default_rng(1), table=table))
+        slow = best(lambda: reference(observation, draws, np.random.default_rng(1)))
+        print(f"{draws:>9,} {fast:9.1f} {slow:32.1f}")
+
+    print(f"\n{'station':<8}{'Q':>10}{'5%':>10}{'median':>10}{'95%':>10}{'cooling':>9}")
+    for fileName in sorted(glob.glob(path.join(fixturePath, "*.TXT"))):
+        with open(fileName, 'rb') as fixture:
+            observation = parseraw(fixture.read())
+        band = qband(observation, zone, 100000, rng=np.random.default_rng(1), table=table)
+        print(f"{band.station:<8}{band.Q:>10,.0f}{band.low:>10,.0f}{band.median:>10,.0f}{band.high:>10,.0f}"
+              f"{band.coolingShare:>9.0%}")
+#
+if __name__ == "__main__":
+    main()
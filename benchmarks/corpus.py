@@ -0,0 +1,144 @@
+# Synthetic METAR corpus for benchmarks
+#
+# Generates realistic, deterministic (seeded) METAR reports covering the variations real reports
+# contain -- AUTO & COR flags, gusts, VRB & variable-direction groups, negative (M) temperatures,
+# missing visibility/sky groups, remarks with T groups -- along with the values that were encoded,
+# so parsers can be checked as well as timed.
+#
+import math
+import random
+from datetime import datetime, timedelta, timezone
+#
+skies = ["CLR", "FEW030", "SCT045 BKN100", "OVC008", "BKN250", "FEW012 OVC030", "VV002"]
+weather = ["", "", "", "-RA", "BR", "+TSRA", "-SN", "HZ"]
+#
+def stations(count):
+# Distinct four letter station identifiers: the recorded Delmarva stations first, then K000, K001, ...
+    recorded = ["KGED", "KSBY", "KWAL", "KOXB", "KDOV", "KILG", "K33N", "KCGE", "KESN"]
+    return (recorded + [f"K{i:03d}" for i in range(max(0, count - len(recorded)))])[:count]
+#
+def _tgroup(value):
+    return f"{1 if value < 0 else 0}{abs(round(value * 10)):03d}"
+#
+def report(rng, station, when, temperature=None):
+# One METAR report (without the station file date header) and the values it encodes
+    if temperature is None:
+        temperature = rng.uniform(-25, 38)
+    dewPoint = temperature - rng.uniform(0, 15)
+    windDir = rng.choice(["VRB"] + [d for d in range(10, 370, 10)])
+    windSpeed = 0 if rng.random() < 0.08 else rng.randint(2, 30)
+    gust = windSpeed + rng.randint(5, 15) if windSpeed > 10 and rng.random() < 0.3 else None
+    if windSpeed == 0:
+        windDir = 0
+    altimeter = rng.randint(2930, 3070)
+    tokens = [station, when.strftime("%d%H%MZ")]
+    if rng.random() < 0.05:
+        tokens.append("COR")
+    if rng.random() < 0.4:
+        tokens.append("AUTO")
+    windText = "VRB" if windDir == "VRB" else f"{windDir:03d}"
+    tokens.append(f"{windText}{windSpeed:02d}" + (f"G{gust:02d}" if gust else "") + "KT")
+    if windDir != "VRB" and windSpeed > 6 and rng.random() < 0.15:
+        tokens.append(f"{(windDir - 60) % 360:03d}V{(windDir + 60) % 360:03d}")
+    tokens.append(rng.choice(["10SM", "10SM", "7SM", "3SM", "1/2SM", "M1/4SM"]))
+    wx = rng.choice(weather)
+    if wx:
+        tokens.append(wx)
+    tokens.append(rng.choice(skies))
+    t = round(temperature)
+    d = round(dewPoint)
+    tokens.append(f"{'M' if t < 0 else ''}{abs(t):02d}/{'M' if d < 0 else ''}{abs(d):02d}")
+    tokens.append(f"A{altimeter}")
+    tokens.extend(["RMK", "AO2" if "AUTO" in tokens else "AO1", f"SLP{rng.randint(0, 999):03d}",
+                   f"T{_tgroup(temperature)}{_tgroup(dewPoint)}"])
+    truth = {
+        "station": station,
+        "temperatureC": float(t) if t else 0.0,
+        "dewPointC": float(d) if d else 0.0,
+        "windDir": "VRB" if windDir == "VRB" else float(windDir),
+        "windSpeedKnots": float(windSpeed),
+        "gustKnots": float(gust) if gust else None,
+        "altimeterInHg": altimeter / 100,
+    }
+    return " ".join(tokens), truth
+#
+def stationfile(rng, station, when):
+# Contents of a metar/stations/ file: date header line followed by the report
+    text, truth = report(rng, station, when)
+    return f"{when:%Y/%m/%d %H:%M}\n{text}\n".encode(), truth
+#
+def stationfiles(count, seed=1, when=datetime(2021, 6, 15, 12, 53, tzinfo=timezone.utc)):
+# count station files (bytes) and their encoded values
+    rng = random.Random(seed)
+    codes = stations(min(count, 1009))
+    return [stationfile(rng, codes[i % len(codes)], when - timedelta(hours=i // len(codes)))
+            for i in range(count)]
+#
+def writecycle(fileName, count, seed=1, when=datetime(2021, 6, 15, 12, 0, tzinfo=timezone.utc)):
+# Write a metar/cycles/ style file of count reports (one per station) and return its size in bytes
+    rng = random.Random(seed)
+    codes = stations(count) if count <= 1009 else [f"K{i // 26 ** 2 % 26 + 65:c}{i // 26 % 26 + 65:c}{i % 26 + 65:c}"
+                                                   for i in range(count)]
+    size = 0
+    with open(fileName, 'wb') as cycleFile:
+        for i, station in enumerate(codes):
+            issued = when + timedelta(minutes=rng.randint(0, 59))
+            text, _ = report(rng, station, issued)
+            record = f"{issued:%Y/%m/%d %H:%M}\n{text}\n\n".encode()
+            cycleFile.write(record)
+            size += len(record)
+    return size
+#
+def writearchive(fileName, stationCodes, year=2020, seed=1):
+# Write a year of hourly reports for each station in the Iowa Environmental Mesonet CSV layout
+# (station,valid,metar) with seasonal & diurnal temperature swings; returns the record count
+    rng = random.Random(seed)
+    start = datetime(year, 1, 1, 0, 53, tzinfo=timezone.utc)
+    hours = int((datetime(year + 1, 1, 1, tzinfo=timezone.utc) - start).total_seconds() // 3600) + 1
+    count = 0
+    with open(fileName, 'w', newline='') as archive:
+        archive.write("station,valid,metar\n")
+        for station in stationCodes:
+            for hour in range(hours):
+                when = start + timedelta(hours=hour)
+                seasonal = 13 - 12 * math.cos(2 * math.pi * (when.timetuple().tm_yday - 15) / 365)
+                diurnal = 5 * math.cos(2 * math.pi * (when.hour - 20) / 24)
+                text, _ = report(rng, station, when, seasonal + diurnal + rng.gauss(0, 3))
+                archive.write(f"{station[1:]},{when:%Y-%m-%d %H:%M},{text}\n")
+                count += 1
+    return count
+#
+def taf(rng, station, issued):
+# A TAF station file (bytes) issued at issued (on the hour) for the 30 hours that follow, with FM,
+# BECMG & TEMPO groups and (half the time) TX/TN groups
+    start = issued + timedelta(minutes=(60 - issued.minute) % 60)
+    end = start + timedelta(hours=30)
+
+    def wind():
+        if rng.random() < 0.05:
+            return "00000KT"
+        speed = rng.randint(3, 25)
+        gust = f"G{speed + rng.randint(6, 15):02d}" if speed > 12 and rng.random() < 0.4 else ""
+        return f"{'VRB' if rng.random() < 0.08 else f'{rng.randrange(10, 370, 10):03d}'}{speed:02d}{gust}KT"
+
+    lines = [f"{issued:%Y/%m/%d %H:%M}",
+             f"TAF {station} {issued:%d%H%M}Z {start:%d%H}/{end:%d%H} {wind()} P6SM {rng.choice(skies)}"]
+    when = start
+    while True:
+        when += timedelta(hours=rng.randint(3, 8))
+        if when >= end - timedelta(hours=2):
+            break
+        kind = rng.random()
+        if kind < 0.6:
+            lines.append(f"      FM{when:%d%H}00 {wind()} P6SM {rng.choice(skies)}")
+        elif kind < 0.8:
+            lines.append(f"      BECMG {when:%d%H}/{when + timedelta(hours=2):%d%H} {wind()} P6SM {rng.choice(skies)}")
+        else:
+            lines.append(f"      TEMPO {when:%d%H}/{when + timedelta(hours=3):%d%H} {wind()} 3SM -SHRA BKN025")
+    if rng.random() < 0.5:
+        high = rng.randint(15, 35)
+        low = high - rng.randint(6, 14)
+        highAt = start.replace(hour=19) + timedelta(days=1 if start.hour > 19 else 0)
+        lowAt = start.replace(hour=10) + timedelta(days=1 if start.hour > 10 else 0)
+        lines[-1] += (f" TX{high:02d}/{highAt:%d%H}Z TN{'M' if low < 0 else ''}{abs(low):02d}/{lowAt:%d%H}Z")
+    return ("\n".join(lines) + "\n").encode()
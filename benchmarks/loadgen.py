@@ -0,0 +1,199 @@
+# Load generator: the evaluators' fetch, parse & evaluate path at a target request rate
+#
+# Runs against the local stand-in server (benchmarks/standin.py), with injected latency, errors, re-issued
+# files & limited bandwidth, or against any server given with --url.  Requests are issued open loop --
+# request i is due at start + i / rate whether or not earlier ones have finished -- so a slow fetch layer
+# shows up as queueing & latency rather than as a lower offered load.  Each request retrieves one file,
+# parses it and evaluates it against one zone, as the evaluators do:
+#
+#     stations   a raw METAR station file through the pooled client (economizer.fetch.fetchstation),
+#                round robin over --stations station codes
+#     decoded    a decoded station file, likewise
+#     cycles     an hourly cycle file of --cycle-reports reports, streamed (economizer.cycles.evaluatecycle)
+#
+# Reported: offered & achieved rates, errors by message, 304 answers, bytes served, stage timings from
+# economizer.metrics, and latency percentiles & a histogram -- from when each request was due (response
+# time, including any wait for a free worker) and from when it started (service time).
+#
+# Usage: python benchmarks/loadgen.py [--rate 200] [--duration 10] [--path stations|decoded|cycles]
+#                                     [--stations 100] [--workers 64] [--latency 0.02] [--error-rate 0.01]
+#                                     [--change-rate 0.1] [--bandwidth 50000] [--no-conditional] [--url URL]
+#
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import numpy as np
+
+from corpus import stations, writecycle
+from economizer import metrics
+from economizer.cycles import evaluatecycle
+from economizer.decision import Zone, decide
+from economizer.fetch import fetchstation
+from economizer.httpclient import HTTPClient
+from economizer.obscache import sources
+from economizer.sattable import loadtable
+from standin import StandIn
+#
+zone = Zone("office", None, 72, 50, 30, 20, 2, 200)
+bucketEdges = [m * 10 ** e for e in range(5) for m in (1, 1.5, 2, 3, 5, 7)][:-5]    # histogram bucket tops, 1 ms to 10 s
+barWidth = 50
+#
+class Driver:
+# Issues requests on a thread pool at a fixed rate & collects (due, started, finished, error, notModified)
+    def __init__(self, request, rate, workers):
+        self.request = request
+        self.rate = rate
+        self.workers = workers
+        self.samples = []
+        self.lag = 0.0          # latest any request was handed to the pool after it was due (s)
+        self._lock = threading.Lock()
+
+    def _run(self, i, due):
+        started = time.perf_counter()
+        try:
+            error, notModified = self.request(i)
+        except Exception as e:      # a failure of the path under test is a result, not a crash of the driver
+            error, notModified = f"{type(e).__name__}: {e}", False
+        finished = time.perf_counter()
+        with self._lock:
+            self.samples.append((due, started, finished, error, notModified))
+
+    def run(self, duration):
+        count = int(round(self.rate * duration))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            self.start = time.perf_counter()
+            for i in range(count):
+                due = self.start + i / self.rate
+                ahead = due - time.perf_counter()
+                if ahead > 0:
+                    time.sleep(ahead)
+                else:
+                    self.lag = max(self.lag, -ahead)
+                pool.submit(self._run, i, due)
+        self.end = time.perf_counter()
+        return self.samples
+#
+def stationrequest(baseurl, directory, codes, client, table):
+    rooturl = baseurl + directory + "/"
+    parse = sources[directory][1]
+
+    def request(i):
+        result = fetchstation(codes[i % len(codes)], rooturl, client=client)
+        if result.error:
+            return result.error, False
+        try:
+            with metrics.span("parse" if directory == "stations" else "decode"):
+                observation = parse(result.data)
+        except ValueError as e:
+            return f"parse: {e}", result.notModified
+        decide([observation], zone, table)
+        return None, result.notModified
+    return request
+#
+def cyclerequest(baseurl):
+    url = baseurl + "cycles/12Z.TXT"
+
+    def request(i):
+        try:
+            for _ in evaluatecycle(url, zone):
+                pass
+        except OSError as e:
+            return str(getattr(e, "reason", e)), False
+        return None, False
+    return request
+#
+def histogram(milliseconds):
+    counts = np.bincount(np.searchsorted(bucketEdges, milliseconds), minlength=len(bucketEdges) + 1)
+    scale = barWidth / max(counts.max(), 1)
+    labels = [f"<= {edge:,g} ms" for edge in bucketEdges] + [f"> {bucketEdges[-1]:,g} ms"]
+    first, last = np.flatnonzero(counts)[[0, -1]]
+    for label, n in list(zip(labels, counts))[first:last + 1]:
+        print(f"{label:>13} {n:>8} {'#' * int(np.ceil(n * scale))}")
+#
+def report(driver, server):
+    samples = driver.samples
+    due, started, finished = (np.array([s[i] for s in samples]) for i in range(3))
+    errors = {}
+    for s in samples:
+        if s[3]:
+            errors[s[3]] = errors.get(s[3], 0) + 1
+    seconds = driver.end - driver.start
+    print(f" *** {len(samples):,} requests in {seconds:.2f} s: offered {driver.rate:,.0f}/s, "
+          f"achieved {len(samples) / seconds:,.0f}/s; dispatch lag at most {driver.lag * 1000:.1f} ms")
+    print(f" *** {len(samples) - sum(errors.values()):,} evaluated "
+          f"({sum(1 for s in samples if s[4]):,} from 304 Not Modified), {sum(errors.values()):,} errors")
+    for message, n in sorted(errors.items(), key=lambda e: -e[1]):
+        print(f"       {n:>8}  {message}")
+    if server is not None:
+        print(f" *** Server: {server.requests:,} requests, {server.bytesSent / 2 ** 20:,.1f} MiB sent, "
+              f"statuses {dict(sorted(server.statuses.items()))}")
+
+    print(f"\n{'ms':>17} {'p50':>8} {'p90':>8} {'p99':>8} {'p99.9':>8} {'max':>8}")
+    for label, values in (("response time", (finished - due) * 1000), ("service time", (finished - started) * 1000)):
+        p50, p90, p99, p999 = np.percentile(values, [50, 90, 99, 99.9])
+        print(f"{label:>17} {p50:8.1f} {p90:8.1f} {p99:8.1f} {p999:8.1f} {values.max():8.1f}")
+    print("\n *** Response time histogram")
+    histogram((finished - due) * 1000)
+
+    spans = metrics.snapshot()["spans"]
+    print(f"\n{'stage':>17} {'count':>8} {'mean ms':>8} {'max ms':>8}")
+    for name, s in spans.items():
+        print(f"{name:>17} {s['count']:>8} {s['seconds'] / s['count'] * 1000:8.3f} {s['max'] * 1000:8.1f}")
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/loadgen.py",
+                                     description="Drive the fetch, parse & evaluate path at a target request rate")
+    parser.add_argument("--rate", type=float, default=200.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--path", choices=("stations", "decoded", "cycles"), default="stations",
+                        help="files requested & evaluated")
+    parser.add_argument("--stations", type=int, default=100, help="distinct station files requested")
+    parser.add_argument("--cycle-reports", type=int, default=5000, help="reports in the served cycle file")
+    parser.add_argument("--workers", type=int, default=64, help="requests in flight at most")
+    parser.add_argument("--no-conditional", action="store_true",
+                        help="no conditional requests (the server never answers 304)")
+    parser.add_argument("--url", default=None,
+                        help="observation root of another server (.../data/observations/metar/) instead of "
+                             "the stand-in")
+    parser.add_argument("--latency", type=float, default=0.02, help="stand-in: seconds every request stalls")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stand-in: share of requests answered 503")
+    parser.add_argument("--change-rate", type=float, default=0.0,
+                        help="stand-in: share of requests finding the file re-issued")
+    parser.add_argument("--bandwidth", type=float, default=None, help="stand-in: bytes per second per response")
+    parser.add_argument("--seed", type=int, default=1, help="stand-in: random seed for errors & re-issues")
+    args = parser.parse_args(argv)
+
+    table = loadtable()
+    standin = None if args.url else StandIn(args.latency, errorRate=args.error_rate, changeRate=args.change_rate,
+                                            bandwidth=args.bandwidth, conditional=not args.no_conditional,
+                                            seed=args.seed)
+    with nullcontext() if standin is None else standin as server, tempfile.TemporaryDirectory() as directory, \
+            HTTPClient(conditional=not args.no_conditional, maxIdlePerHost=args.workers) as client:
+        if server is not None and args.path == "cycles":
+            fileName = path.join(directory, "12Z.TXT")
+            writecycle(fileName, args.cycle_reports)
+            with open(fileName, 'rb') as cycle:
+                server.update("12Z", cycle.read(), "cycles")
+        baseurl = args.url or server.baseurl
+        if args.path == "cycles":
+            request = cyclerequest(baseurl)
+        else:
+            request = stationrequest(baseurl, args.path, stations(args.stations), client, table)
+        print(f" *** {args.path} at {args.rate:g}/s for {args.duration:g} s, {args.workers} workers, "
+              f"against {baseurl}\n")
+        metrics.registry.reset()
+        driver = Driver(request, args.rate, args.workers)
+        driver.run(args.duration)
+    report(driver, server)
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
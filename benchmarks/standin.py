@@ -0,0 +1,249 @@
+# Local stand-in for tgftp.nws.noaa.gov
+#
+# Serves the recorded observation files in benchmarks/fixtures/ over HTTP on 127.0.0.1 so the fetch
+# layer can be exercised and benchmarked without touching the National Weather Service.  Station
+# codes without a fixture are answered with a copy of the KSBY report re-labelled for that station,
+# so any number of distinct stations can be requested; cycle files (cycles/00Z.TXT ... 23Z.TXT) without
+# a fixture are answered with the 12Z one.
+#
+# Responses carry ETag & Last-Modified validators and conditional requests for an unchanged file are
+# answered with 304 Not Modified (unless conditional is False).  Connections are kept alive (HTTP/1.1)
+# and every byte written back to clients is counted in bytesSent, every status in statuses.  Faults
+# can be injected:
+#
+#     latency      seconds every request stalls before it is answered
+#     delay        called with the directory & station of every request, returns extra seconds to stall
+#                  (to inject slow or hung responses)
+#     errorRate    share of requests answered 503 Service Unavailable
+#     changeRate   share of requests that find the file re-issued (new validators, so no 304)
+#     bandwidth    bytes per second each response body is written at
+#
+# Usage (as a library):
+#
+#     with StandIn(latency=0.02) as server:
+#         fetchstations(["KSBY", "KGED"], rooturl=server.rooturl)
+#
+# or as a server for the evaluators (--rooturl http://127.0.0.1:8000/data/observations/metar/stations/):
+#
+#     python benchmarks/standin.py [--port 8000] [--latency 0.05] [--error-rate 0.01] [--bandwidth 20000]
+#
+import argparse
+import hashlib
+import random
+import re
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+#
+fixturePath = path.join(path.dirname(path.abspath(__file__)), "fixtures")
+stationPattern = re.compile(r"^/data/observations/metar/(stations|decoded|cycles)/([A-Z0-9]{3,4})\.TXT$")
+templates = {"stations": "KSBY", "decoded": "KSBY", "cycles": "12Z"}
+writeSize = 1460        # bytes written at a time when the bandwidth is limited
+#
+class _CountingWriter:
+    def __init__(self, wfile, server):
+        self._wfile = wfile
+        self._server = server
+
+    def write(self, data):
+        self._server.standin.countbytes(len(data))
+        return self._wfile.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._wfile, name)
+#
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers & body are separate writes on kept-alive connections
+
+    def setup(self):
+        super().setup()
+        self.wfile = _CountingWriter(self.wfile, self.server)
+
+    def do_GET(self):
+        standin = self.server.standin
+        standin.countrequest()
+        match = stationPattern.match(self.path)
+        directory, station = match.groups() if match else (None, None)
+        stall = standin.latency + (standin.delay(directory, station) if standin.delay and match else 0.0)
+        if stall:
+            time.sleep(stall)
+        if standin.errorRate and standin.draw() < standin.errorRate:
+            self.reply(503)
+            return
+        if match and standin.changeRate and standin.draw() < standin.changeRate:
+            standin.reissue(directory, station)
+        entry = standin.entry(directory, station) if match else None
+        if entry is None:
+            self.reply(404)
+            return
+        body, etag, lastModified = entry
+        if standin.conditional and (self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers and self.headers.get("If-Modified-Since") == lastModified)):
+            standin.countstatus(304)
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", lastModified)
+            self.end_headers()
+            return
+        standin.countstatus(200)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", lastModified)
+        self.end_headers()
+        if not standin.bandwidth:
+            self.wfile.write(body)
+            return
+        start = time.perf_counter()
+        for offset in range(0, len(body), writeSize):
+            end = min(offset + writeSize, len(body))
+            ahead = start + end / standin.bandwidth - time.perf_counter()    # when the chunk has "arrived"
+            if ahead > 0:
+                time.sleep(ahead)
+            self.wfile.write(body[offset:end])
+
+    def reply(self, status):
+        self.server.standin.countstatus(status)
+        self.send_error(status)
+
+    def log_message(self, format, *args):
+        pass
+#
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # listen() backlog -- the default of 5 drops bursts of connections
+
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):     # not a client that gave up waiting
+            super().handle_error(request, client_address)
+#
+class StandIn:
+# Threaded HTTP server running in the background for the life of a with-block
+    def __init__(self, latency=0.0, port=0, fixtures=fixturePath, delay=None, errorRate=0.0, changeRate=0.0,
+                 bandwidth=None, conditional=True, seed=None):
+        self.latency = latency
+        self.delay = delay
+        self.errorRate = errorRate
+        self.changeRate = changeRate
+        self.bandwidth = bandwidth
+        self.conditional = conditional
+        self.fixtures = fixtures
+        self.requests = 0
+        self.bytesSent = 0
+        self.statuses = {}
+        self._files = {}
+        self._issues = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.httpd = _Server(("127.0.0.1", port), _Handler)
+        self.httpd.standin = self
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def baseurl(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/data/observations/metar/"
+
+    @property
+    def rooturl(self):
+        return self.baseurl + "stations/"
+
+    @property
+    def decodedurl(self):
+        return self.baseurl + "decoded/"
+
+    @property
+    def cyclesurl(self):
+        return self.baseurl + "cycles/"
+
+    def countrequest(self):
+        with self._lock:
+            self.requests += 1
+
+    def countbytes(self, count):
+        with self._lock:
+            self.bytesSent += count
+
+    def countstatus(self, status):
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def draw(self):
+        with self._lock:
+            return self._random.random()
+
+    def observation(self, directory, station):
+    # Contents of a fixture file, or the KSBY (12Z) fixture re-labelled for an unknown station (hour)
+        entry = self.entry(directory, station)
+        return entry[0] if entry else None
+
+    def entry(self, directory, station):
+    # (body, etag, lastModified) for a station file, or None when it is "missing from the server"
+        key = (directory, station)
+        if key not in self._files:
+            fileName = path.join(self.fixtures, directory, station + ".TXT")
+            if path.exists(fileName):
+                with open(fileName, 'rb') as fixture:
+                    body = fixture.read()
+            elif station.startswith("X"):
+                body = None  # Stations beginning with X are "missing from the server"
+            else:
+                template = self.observation(directory, templates[directory])
+                body = template and (template if directory == "cycles" else template.replace(b"KSBY", station.encode()))
+            self.update(station, body, directory)
+        return self._files[key]
+
+    def update(self, station, body, directory="stations"):
+    # Publish a new observation for a station (None removes it from the server)
+        if body is None:
+            self._files[(directory, station)] = None
+        else:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            self._files[(directory, station)] = (body, etag, formatdate(usegmt=True))
+
+    def reissue(self, directory, station):
+    # Re-issue a file with the same contents but new validators, as when the server rewrites it
+        entry = self.entry(directory, station)
+        if entry is not None:
+            with self._lock:
+                self._issues += 1
+                issue = self._issues
+            self._files[(directory, station)] = (entry[0], f'{entry[1][:-1]}-{issue}"', formatdate(usegmt=True))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/standin.py",
+                                     description="Serve the recorded NOAA observation files locally")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every request stalls")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    parser.add_argument("--change-rate", type=float, default=0.0, help="share of requests finding the file re-issued")
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes per second per response")
+    parser.add_argument("--no-conditional", action="store_true", help="never answer 304 Not Modified")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for injected errors & re-issues")
+    args = parser.parse_args(argv)
+
+    with StandIn(args.latency, args.port, errorRate=args.error_rate, changeRate=args.change_rate,
+                 bandwidth=args.bandwidth, conditional=not args.no_conditional, seed=args.seed) as server:
+        print(f" *** Serving {server.rooturl}, {server.decodedurl} & {server.cyclesurl} (Ctrl-C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    print(f" *** {server.requests} requests, {server.bytesSent:,} bytes sent, statuses {server.statuses}")
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
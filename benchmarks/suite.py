@@ -0,0 +1,219 @@
+# Benchmark suite with stored results
+#
+# Times the core operations against the recorded observation files in benchmarks/fixtures/ -- the
+# decoded files read by enthalpyEconomizer_Evaluator.py and the raw METAR station files read by
+# metarEnthalpyEconomizer_Evaluator.py -- at 1, 1,000 and 1,000,000 records:
+#
+#     table.csv / table.npy           loading the saturation table (parse the CSV / reload the .npy cache)
+#     table.generate                  computing the generated -40 to 120 deg F table
+#     parse.raw / parse.decoded       parsing station files
+#     lookup, enthalpy, airflow       the psychrometric kernels on arrays of conditions
+#     evaluate.raw / evaluate.decoded end to end: parse each file & evaluate it (a batch at a time)
+#     uncertainty                     a Monte Carlo band of Q with that many draws (economizer.uncertainty)
+#
+# Each run is saved to benchmarks/results/<time>-<commit>.json (machine, Python & NumPy versions,
+# best & median seconds per call) and compared with the previous saved run, flagging changes beyond
+# the threshold.  Results are only comparable between runs on the same machine.
+#
+# Usage: python benchmarks/suite.py [--sizes 1,1000] [--filter parse] [--no-save]
+#                                   [--against FILE] [--threshold 0.1]
+#        python benchmarks/suite.py --show OLD.json NEW.json
+#
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from os import path
+
+root = path.dirname(path.dirname(path.abspath(__file__)))
+sys.path.insert(0, root)
+
+import numpy as np
+
+from economizer import psychrometrics, sattable
+from economizer.decision import Zone, decide
+from economizer.metar import parsedecoded, parseraw
+from economizer.uncertainty import qband
+#
+fixturePath = path.join(path.dirname(path.abspath(__file__)), "fixtures")
+resultsPath = path.join(path.dirname(path.abspath(__file__)), "results")
+defaultSizes = (1, 1000, 1000000)
+batchSize = 4096        # observations per decide() call in the end to end benchmarks
+minTime = 0.2           # seconds -- calls per repeat are raised until a repeat takes this long
+repeats = 5             # repeats per benchmark (1 once a single call exceeds maxTime)
+maxTime = 2.0
+#
+zone = Zone("office", None, 72, 50, 30, 20, 2, 200)
+#
+def fixtures(directory):
+    files = []
+    for fileName in sorted(glob.glob(path.join(fixturePath, directory, "*.TXT"))):
+        with open(fileName, 'rb') as fixture:
+            files.append(fixture.read())
+    return files
+#
+def records(directory, count):
+# count recorded files, cycling through the fixtures
+    files = fixtures(directory)
+    return [files[i % len(files)] for i in range(count)]
+#
+def conditions(count):
+    rng = np.random.default_rng(1)
+    outdoorT = rng.uniform(20, 100, count)
+    return {
+        "outdoorT": outdoorT,
+        "x": rng.uniform(0.002, 0.02, count),
+        "speeds": rng.uniform(0, 25, count),
+        "dirs": rng.uniform(0, 359, count),
+    }
+#
+def endtoend(files, parse):
+    batch = []
+    for data in files:
+        batch.append(parse(data))
+        if len(batch) >= batchSize:
+            decide(batch, zone)
+            batch = []
+    decide(batch, zone)
+#
+def loadcsv(count):
+    sattable._tables.clear()
+    sattable.loadtable(sattable.defaultTableFileName, useCache=False)
+#
+def loadnpy(count):
+    sattable._tables.clear()
+    sattable.loadtable(sattable.defaultTableFileName)
+#
+def generate(count):
+    sattable._tables.clear()
+    sattable.loadtable(useCache=False)
+#
+# name -> (setup(size) returning the argument, timed function of that argument, fixed sizes or None)
+benchmarks = {
+    "table.csv": (lambda n: n, loadcsv, (1,)),
+    "table.npy": (lambda n: n, loadnpy, (1,)),
+    "table.generate": (lambda n: n, generate, (1,)),
+    "parse.raw": (lambda n: records("stations", n), lambda files: [parseraw(f) for f in files], None),
+    "parse.decoded": (lambda n: records("decoded", n), lambda files: [parsedecoded(f) for f in files], None),
+    "lookup": (conditions, lambda c: sattable.loadtable().lookup(c["outdoorT"]), None),
+    "enthalpy": (conditions, lambda c: psychrometrics.enthalpy(c["outdoorT"], c["x"]), None),
+    "airflow": (conditions, lambda c: psychrometrics.airflow(c["speeds"], c["dirs"], 200, 8.33), None),
+    "evaluate.raw": (lambda n: records("stations", n), lambda files: endtoend(files, parseraw), None),
+    "evaluate.decoded": (lambda n: records("decoded", n), lambda files: endtoend(files, parsedecoded), None),
+    "uncertainty": (lambda n: (parseraw(fixtures("stations")[0]), n),
+                    lambda a: qband(a[0], zone, a[1], rng=np.random.default_rng(1)), None),
+}
+#
+def measure(function, argument):
+# (best, median) seconds per call
+    start = time.perf_counter()
+    function(argument)
+    first = time.perf_counter() - start
+    number = max(1, int(minTime / first)) if first > 0 else 1000
+    samples = []
+    for i in range(1 if first > maxTime else repeats):
+        start = time.perf_counter()
+        for n in range(number):
+            function(argument)
+        samples.append((time.perf_counter() - start) / number)
+    return min(samples), statistics.median(samples), number, len(samples)
+#
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+#
+def run(sizes, pattern=None):
+    sattable.loadtable()  # make sure the .npy cache exists
+    results = {}
+    for name, (setup, function, only) in benchmarks.items():
+        if pattern and pattern not in name:
+            continue
+        for size in (only or sizes):
+            argument = setup(size)
+            best, median, number, repeat = measure(function, argument)
+            key = f"{name}[{size}]"
+            results[key] = {"best": best, "median": median, "number": number, "repeat": repeat, "records": size}
+            print(f"{key:26} {best * 1e3:12.4f} ms {size / best:16,.0f} records/s", flush=True)
+    sattable._tables.clear()
+    return results
+#
+def latest(exclude=None):
+    files = sorted(glob.glob(path.join(resultsPath, "*.json")))
+    files = [f for f in files if f != exclude]
+    return files[-1] if files else None
+#
+def compare(old, new, threshold):
+# Print each benchmark present in both runs with its ratio new/old of best times
+    print(f"\n *** {new.get('commit', '?')} ({new.get('time', '?')}) vs. {old.get('commit', '?')} ({old.get('time', '?')})")
+    if old.get("machine") != new.get("machine"):
+        print(" *** Warning: runs are from different machines")
+    print(f"{'benchmark':26} {'old ms':>12} {'new ms':>12} {'ratio':>7}")
+    changed = 0
+    for key, result in new["results"].items():
+        if key not in old["results"]:
+            continue
+        before, after = old["results"][key]["best"], result["best"]
+        ratio = after / before
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, changed = "  slower", changed + 1
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(f"{key:26} {before * 1e3:12.4f} {after * 1e3:12.4f} {ratio:7.2f}{flag}")
+    return changed
+#
+def load(fileName):
+    with open(fileName, 'r') as resultFile:
+        return json.load(resultFile)
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Economizer benchmark suite")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in defaultSizes),
+                        help="comma separated record counts")
+    parser.add_argument("--filter", default=None, help="only benchmarks whose name contains this")
+    parser.add_argument("--no-save", action="store_true", help="don't store this run")
+    parser.add_argument("--against", default=None, help="stored run to compare with (default: the previous one)")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change reported as slower/faster")
+    parser.add_argument("--show", nargs=2, metavar=("OLD", "NEW"), help="compare two stored runs without running")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        compare(load(args.show[0]), load(args.show[1]), args.threshold)
+        return 0
+
+    sizes = tuple(int(s) for s in args.sizes.split(","))
+    now = datetime.now(timezone.utc)
+    run_ = {
+        "commit": commit(),
+        "time": now.isoformat(timespec="seconds"),
+        "machine": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+    }
+    print(f" *** {run_['commit']} on {run_['machine']} (Python {run_['python']}, NumPy {run_['numpy']})\n")
+    run_["results"] = run(sizes, args.filter)
+
+    previous = args.against or latest()
+    if not args.no_save:
+        os.makedirs(resultsPath, exist_ok=True)
+        fileName = path.join(resultsPath, f"{now:%Y%m%dT%H%M%S}-{run_['commit']}.json")
+        with open(fileName, 'w') as resultFile:
+            json.dump(run_, resultFile, indent=1)
+        print(f"\n *** Saved {path.relpath(fileName, root)}")
+    if previous:
+        compare(load(previous), run_, args.threshold)
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+# economizer - importable core of the economizer control weather conditions evaluator
+#
+# The interactive scripts (enthalpyEconomizer_Evaluator.py & metarEnthalpyEconomizer_Evaluator.py)
+# evaluate one station against one set of indoor conditions at a time.  The modules in this package
+# perform the same psychrometric & heat flow calculations on whole arrays of conditions at once.
+#
+# Importing the package has no side effects and does not import NumPy: the names below are resolved
+# from their modules on first use, and the saturation table itself is only read (and then memoized)
+# the first time a humidity ratio is looked up.  python benchmarks/bench_startup.py keeps this honest.
+#
+import importlib
+#
+_exports = {
+    "SatTable": "economizer.sattable",
+    "loadtable": "economizer.sattable",
+    "humidityratio": "economizer.psychrometrics",
+    "enthalpy": "economizer.psychrometrics",
+    "airflow": "economizer.psychrometrics",
+    "heatflow": "economizer.psychrometrics",
+    "evaluate": "economizer.psychrometrics",
+    "parseraw": "economizer.metar",
+    "parsedecoded": "economizer.metar",
+}
+#
+__all__ = list(_exports)
+#
+def __getattr__(name):
+    if name not in _exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_exports[name]), name)
+    globals()[name] = value
+    return value
+#
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
@@ -0,0 +1,240 @@
+# Local HTTP decision API
+#
+# A small asyncio HTTP/1.1 server answering
+#
+#     GET /decision?station=KSBY&indoor_t=72&rh=50&window=200&width=30&height=20&quantity=2
+#
+# with the economizer decision for that station & zone as JSON (the economizer.batch result columns).
+# Only station is required; the zone parameters default to the Zone defaults and are validated against
+# the interactive evaluator's ranges (400 on bad input, 502 when the observation can't be retrieved,
+# 500 on any other failure).
+# With draws=100000 (and optionally level=90) the answer also carries a Monte Carlo confidence interval
+# of Q (economizer.uncertainty), computed on a worker thread.
+#
+# Observations are held in memory until the station's next METAR is expected.  Concurrent requests for
+# a station that isn't held are coalesced: the first starts one upstream fetch & parse (on a worker
+# thread, through the on-disk observation cache) and every other request for that station awaits the
+# same result.  GET /stats reports fetch, coalescing and request counts, and GET /metrics the stage
+# timings & counters (economizer.metrics) in Prometheus text format.
+#
+# Usage: python -m economizer.api [--host 127.0.0.1] [--port 8080]
+#
+import argparse
+import asyncio
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from economizer import fetch, metrics
+from economizer.batch import _round, makezone, resultColumns, resultrow
+from economizer.decision import Zone, decide
+from economizer.obscache import ObservationCache, getobservation, nextissuance
+from economizer.sattable import loadtable
+from economizer.uncertainty import defaultLevel, qband
+#
+defaultPort = 8080
+maxHeaderLines = 100
+#
+# query parameter -> zone file column (economizer.batch), with defaults for the optional ones
+parameters = {
+    "station": ("station", None),
+    "indoor_t": ("indoor_temp", Zone._field_defaults["indoorDBTemp"]),
+    "rh": ("indoor_rh", Zone._field_defaults["indoorRh"]),
+    "width": ("window_width", Zone._field_defaults["windowWidthInches"]),
+    "height": ("window_height", Zone._field_defaults["windowHeightInches"]),
+    "quantity": ("window_quantity", Zone._field_defaults["windowQuantity"]),
+    "window": ("window_dir", Zone._field_defaults["windowDir"]),
+}
+#
+_reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            500: "Internal Server Error", 502: "Bad Gateway"}
+#
+class ObservationStore:
+# Observations held until the next expected issuance, with one in-flight fetch per station
+    def __init__(self, source="stations", cache=None, rooturl=None, client=None, maxWorkers=fetch.defaultWorkers):
+        self.source = source
+        self.cache = cache
+        self.rooturl = rooturl
+        self.client = client
+        self.executor = ThreadPoolExecutor(max_workers=maxWorkers)
+        self._held = {}         # station -> Observation
+        self._inflight = {}     # station -> Future of an Observation
+        self.hits = self.fetches = self.coalesced = 0
+
+    def _fetch(self, station):
+        return getobservation(station, self.source, cache=self.cache, rooturl=self.rooturl, client=self.client)
+
+    def _done(self, station, future):
+        del self._inflight[station]
+        if not future.cancelled() and future.exception() is None:
+            self._held[station] = future.result()
+
+    async def get(self, station):
+    # Observation for a station; raises OSError / ValueError like getobservation()
+        station = fetch.stationcode(station)
+        observation = self._held.get(station)
+        if observation is not None and time.time() < nextissuance(observation.fetched):
+            self.hits += 1
+            return observation
+        future = self._inflight.get(station)
+        if future is None:
+            self.fetches += 1
+            future = asyncio.get_running_loop().run_in_executor(self.executor, self._fetch, station)
+            self._inflight[station] = future
+            future.add_done_callback(lambda f: self._done(station, f))
+        else:
+            self.coalesced += 1
+        # shielded so a client hanging up doesn't cancel the fetch other requests are waiting on
+        return await asyncio.shield(future)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+#
+class DecisionServer:
+# asyncio HTTP/1.1 server (keep-alive) for /decision and /stats
+    def __init__(self, store, host="127.0.0.1", port=defaultPort):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.server = None
+
+    async def decision(self, query):
+        record = {}
+        for name, (column, default) in parameters.items():
+            record[column] = query.get(name, default)
+        if not record["station"]:
+            return 400, {"error": "station is required"}
+        try:
+            zone = makezone(record, record["station"])
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        try:
+            observation = await self.store.get(zone.station)
+        except (OSError, ValueError) as e:
+            return 502, {"error": str(e)}
+        d = decide([observation.parsed], zone)[0]
+        result = dict(zip(resultColumns, resultrow(d)))
+        if query.get("draws"):
+            try:
+                draws, level = int(query["draws"]), float(query.get("level", defaultLevel * 100)) / 100
+            except ValueError:
+                return 400, {"error": "draws & level must be numbers"}
+            try:
+                band = await asyncio.get_running_loop().run_in_executor(self.store.executor, qband,
+                                                                        observation.parsed, zone, draws, level)
+            except ValueError as e:
+                return 400, {"error": str(e)}
+            result.update(q_mean=_round(band.mean, 1), q_low=_round(band.low, 1), q_median=_round(band.median, 1),
+                          q_high=_round(band.high, 1), level=band.level, cooling_share=round(band.coolingShare, 4))
+        return 200, result
+
+    def stats(self):
+        return 200, {"requests": self.requests, "hits": self.store.hits, "fetches": self.store.fetches,
+                     "coalesced": self.store.coalesced}
+
+    async def respond(self, method, target):
+        if method != "GET":
+            return 405, {"error": f"{method} not allowed"}
+        parts = urlsplit(target)
+        if parts.path == "/decision":
+            return await self.decision(dict(parse_qsl(parts.query)))
+        if parts.path == "/stats":
+            return self.stats()
+        if parts.path == "/metrics":
+            return 200, metrics.prometheus()
+        return 404, {"error": f"{parts.path} not found"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine:
+                    break
+                try:
+                    method, target, version = requestLine.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                for i in range(maxHeaderLines):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                connection = headers.get("connection", "").lower()
+                keepAlive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                try:
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    length = None
+
+                self.requests += 1
+                if length is None:
+                    # the end of the request body is unknown, so the connection can't be reused
+                    status, payload, keepAlive = 400, {"error": "invalid Content-Length"}, False
+                else:
+                    if length:
+                        await reader.readexactly(length)
+                    try:
+                        status, payload = await self.respond(method, target)
+                    except Exception as e:  # answer rather than drop a connection other requests may be using
+                        print(f" *** Error answering {target}: {type(e).__name__}: {e}", file=sys.stderr)
+                        status, payload = 500, {"error": "internal error"}
+                if isinstance(payload, str):
+                    body, contentType = payload.encode(), "text/plain; version=0.0.4"
+                else:
+                    body, contentType = json.dumps(payload).encode(), "application/json"
+                writer.write(f"HTTP/1.1 {status} {_reasons[status]}\r\n"
+                             f"Content-Type: {contentType}\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n".encode() + body)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        loadtable()     # load the table before the first request rather than during it
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.api",
+                                     description="HTTP API returning economizer decisions as JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=defaultPort, help="port to listen on (0 for any)")
+    parser.add_argument("--source", choices=("stations", "decoded"), default="stations",
+                        help="NOAA observation directory to read")
+    parser.add_argument("--rooturl", default=None, help="alternate URL of the observation directory")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk observation cache")
+    args = parser.parse_args(argv)
+
+    store = ObservationStore(args.source, None if args.no_cache else ObservationCache(), args.rooturl)
+    server = DecisionServer(store, args.host, args.port)
+
+    async def serve():
+        await server.start()
+        print(f" *** Serving decisions on http://{server.host}:{server.port}/decision", file=sys.stderr, flush=True)
+        async with server.server:
+            await server.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
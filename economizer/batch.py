@@ -0,0 +1,310 @@
+# Non-interactive batch evaluation of many zones
+#
+# Reads a CSV or JSON file of zones -- indoor conditions, window openings & weather station -- instead
+# of prompting for them, retrieves each station's current observation once (concurrently, through the
+# observation cache) and streams one result per zone to stdout or a file.
+#
+# CSV columns (JSON objects use the same keys; a JSON file may hold a list, one object per line or
+# pretty-printed objects):
+#
+#     name,station,indoor_temp,indoor_rh,window_width,window_height,window_quantity,window_dir
+#     office-101,KSBY,72,50,30,20,2,200
+#
+# A zone may give its building's latitude & longitude columns instead of a station; it is then assigned
+# the nearest station in stations.csv (economizer.stationindex).  With --fallback, a station whose
+# observation file is missing is replaced by the nearest listed station that has one.
+#
+# Zones are read, evaluated & written a chunk at a time, so tens of thousands of zones are handled
+# in bounded memory with no interaction.
+#
+# Usage: python -m economizer.batch zones.csv [--output results.csv] [--format csv|jsonl] [--store results.db]
+#
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from economizer import fetch, metrics
+from economizer.decision import Decision, Zone, evaluatearrays, fahrenheit, observationpressures
+from economizer.obscache import ObservationCache, getobservation
+from economizer.resultstore import ResultStore
+from economizer.sattable import standardPressure
+from economizer.stationindex import defaultStationsFileName, loadstations
+#
+chunkSize = 10000       # zones evaluated per vectorized call
+#
+# Acceptable ranges, as enforced by the interactive evaluator's prompts
+limits = {
+    "indoorDBTemp": (0, 120),
+    "indoorRh": (0, 100),
+    "windowWidthInches": (20, 60),
+    "windowHeightInches": (1, 30),
+    "windowQuantity": (1, 9),
+    "windowDir": (0, 359),
+}
+#
+columns = {
+    "name": "name",
+    "station": "station",
+    "indoor_temp": "indoorDBTemp",
+    "indoor_rh": "indoorRh",
+    "window_width": "windowWidthInches",
+    "window_height": "windowHeightInches",
+    "window_quantity": "windowQuantity",
+    "window_dir": "windowDir",
+}
+#
+resultColumns = ["zone", "station", "observed", "outdoor_temp_f", "outdoor_dew_point_f", "outdoor_enthalpy",
+                 "indoor_enthalpy", "mass_flow_lb_hr", "q_btu_hr", "mode"]
+#
+def makezone(record, lineNumber):
+# Zone from one CSV row / JSON object; raises ValueError naming the zone & field when invalid
+    values = {}
+    for key, field in columns.items():
+        if key not in record or record[key] in ("", None):
+            if field == "name":
+                values[field] = f"zone-{lineNumber}"
+                continue
+            raise ValueError(f"zone {record.get('name', lineNumber)}: missing {key}")
+        values[field] = record[key]
+    values["station"] = fetch.stationcode(str(values["station"]).strip())
+    values["name"] = str(values["name"])
+    for field, (low, high) in limits.items():
+        try:
+            values[field] = int(values[field]) if field == "windowQuantity" else float(values[field])
+        except (TypeError, ValueError):
+            raise ValueError(f"zone {values['name']}: {field} must be a number") from None
+        if not low <= values[field] <= high:
+            raise ValueError(f"zone {values['name']}: {field} must be between {low} & {high} (inclusive)")
+    return Zone(**values)
+#
+def readrecords(fileName, errors=None):
+# (record number, record dict) for each zone in a CSV or JSON (list, JSON lines or pretty-printed
+# objects) file, unvalidated.  Malformed JSON is reported with its line number in errors when given
+# (the next object starting a line is read after it), else raised.
+    with (sys.stdin if fileName == "-" else open(fileName, 'r', newline='', encoding='utf-8-sig')) as zoneFile:
+        first = zoneFile.read(1)
+        if first in ("[", "{"):
+            records = _jsonrecords(first + zoneFile.read(), fileName, errors)
+        else:
+            records = csv.DictReader(_prepend(first, zoneFile))
+        yield from enumerate(records, 1)
+#
+def _jsonrecords(text, fileName, errors):
+    decoder = json.JSONDecoder()
+    position = 0
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position == len(text):
+            return
+        try:
+            value, position = decoder.raw_decode(text, position)
+        except json.JSONDecodeError as e:
+            message = f"{'stdin' if fileName == '-' else fileName} line {e.lineno}: invalid JSON ({e.msg})"
+            if errors is None:
+                raise ValueError(message) from None
+            errors.append(message)
+            position = text.find("\n{", e.pos)
+            if position < 0:
+                return
+            continue
+        yield from value if isinstance(value, list) else [value]
+#
+def readzones(fileName, errors=None, stationIndex=None):
+# Zones from a CSV or JSON (list or JSON lines) file, one at a time.  Invalid zones are skipped
+# (and their messages appended to errors when given).  With a StationIndex, zones with latitude &
+# longitude but no station are assigned their nearest station, a chunk at a time.
+    for chunk in _chunks(readrecords(fileName, errors), chunkSize):
+        if stationIndex is not None:
+            locate([record for _, record in chunk], stationIndex)
+        for lineNumber, record in chunk:
+            try:
+                yield makezone(record, lineNumber)
+            except ValueError as e:
+                if errors is not None:
+                    errors.append(str(e))
+#
+def locate(records, stationIndex):
+# Fill in the nearest station of each record with latitude & longitude but no station, in one query
+    located = []
+    for record in records:
+        if record.get("station") in ("", None) and record.get("latitude") not in ("", None):
+            try:
+                located.append((record, float(record["latitude"]), float(record["longitude"])))
+            except (KeyError, TypeError, ValueError):
+                continue    # reported by makezone as a missing station
+    if located:
+        found, _ = stationIndex.nearest([r[1] for r in located], [r[2] for r in located])
+        for (record, _, _), i in zip(located, found[:, 0]):
+            record["station"] = stationIndex.codes[i]
+#
+def _prepend(first, lines):
+    firstLine = first + next(lines, "")
+    yield firstLine
+    yield from lines
+#
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+#
+class Evaluator:
+# Evaluates chunks of zones, retrieving each station's observation the first time it is needed
+    def __init__(self, source="stations", cache=None, rooturl=None, maxWorkers=fetch.defaultWorkers,
+                 stationIndex=None, fallbacks=0):
+        self.source = source
+        self.cache = cache
+        self.rooturl = rooturl
+        self.maxWorkers = maxWorkers
+        self.stationIndex = stationIndex
+        self.fallbacks = fallbacks
+        self.observations = {}  # station -> parsed observation (None when unavailable)
+        self.errors = {}
+        self.substitutes = {}   # station -> nearby station whose observation is used instead
+
+    def _get(self, station):
+        try:
+            return station, getobservation(station, self.source, cache=self.cache, rooturl=self.rooturl).parsed, None
+        except (OSError, ValueError) as e:
+            return station, None, str(e)
+
+    def prefetch(self, stations):
+    # Retrieve every station not seen before, concurrently
+        missing = [s for s in set(stations) if s not in self.observations]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.maxWorkers, len(missing))) as pool:
+            for station, parsed, error in pool.map(self._get, missing):
+                self.observations[station] = parsed
+                if error:
+                    self.errors[station] = error
+        if self.fallbacks and self.stationIndex is not None:
+            for station in missing:
+                if self.observations[station] is None:
+                    self._fallback(station)
+
+    def _fallback(self, station):
+    # Use the nearest listed station with an observation in place of an unavailable one
+        for neighbor in self.stationIndex.neighbors(station, self.fallbacks):
+            if neighbor not in self.observations:
+                _, self.observations[neighbor], error = self._get(neighbor)
+                if error:
+                    self.errors[neighbor] = error
+            if self.observations[neighbor] is not None:
+                self.observations[station] = self.observations[neighbor]
+                self.substitutes[station] = neighbor
+                return
+
+    def evaluate(self, zones):
+    # Decisions for a chunk of zones in one vectorized call
+        self.prefetch(z.station for z in zones)
+        observed = [self.observations[z.station] for z in zones]
+        have = np.fromiter((o is not None for o in observed), bool, len(zones))
+        blank = {"temperatureC": 0.0, "dewPointC": 0.0, "windSpeedKnots": 0.0, "windDir": 0.0}
+        rows = [o if o is not None else blank for o in observed]
+        outdoorT = fahrenheit([o["temperatureC"] for o in rows])
+        dewPoint = fahrenheit([o["dewPointC"] for o in rows])
+        speeds = np.array([o["windSpeedKnots"] for o in rows], dtype=float)
+        dirs = np.array([np.nan if o["windDir"] == "VRB" else o["windDir"] for o in rows], dtype=float)
+        arrays = Zone("", None, *(np.array([getattr(z, f) for z in zones], dtype=float) for f in Zone._fields[2:]))
+        pressure = np.full(len(zones), standardPressure)
+        if have.any():
+            pressure[have] = observationpressures([o for o in observed if o is not None])
+        outdoorH, indoorH, massFlowRate, Q, mode = evaluatearrays(outdoorT, dewPoint, speeds, dirs, arrays,
+                                                                  pressure=pressure)
+        mode[~have] = "no observation"
+        return [Decision(z.name, o["station"] if o else z.station, o.get("observed") if o else None, *values)
+                for z, o, values in zip(zones, observed, zip(
+                    np.where(have, outdoorT, np.nan).tolist(), np.where(have, dewPoint, np.nan).tolist(),
+                    np.where(have, outdoorH, np.nan).tolist(), indoorH.tolist(),
+                    np.where(have, massFlowRate, np.nan).tolist(), np.where(have, Q, np.nan).tolist(), mode))]
+
+    def run(self, zones, size=chunkSize):
+    # Decisions for any number of zones, a chunk at a time
+        for chunk in _chunks(zones, size):
+            yield from self.evaluate(chunk)
+#
+def _round(value, digits):
+    return None if value != value else round(value, digits) + 0.0     # no "-0.0"
+#
+def resultrow(d):
+# One decision as a list of resultColumns values (rounded; None for missing values)
+    return [d.zone, d.station, d.observed, _round(d.outdoorDBTemp, 1), _round(d.outdoorDewPoint, 1),
+            _round(d.outdoorEnthalpy, 2), _round(d.indoorEnthalpy, 2), _round(d.massFlowRate, 1),
+            _round(d.Q, 1), d.mode]
+#
+def writeresults(decisions, output, format="csv", header=True):
+# Stream decisions as CSV rows (after a header row unless header is False) or JSON lines; returns the
+# number written
+    count = 0
+    writer = csv.writer(output, lineterminator="\n") if format == "csv" else None
+    if writer and header:
+        writer.writerow(resultColumns)
+    for d in decisions:
+        row = resultrow(d)
+        if writer:
+            writer.writerow(row)
+        else:
+            output.write(json.dumps(dict(zip(resultColumns, row))) + "\n")
+        count += 1
+    return count
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.batch",
+                                     description="Evaluate a file of zones against current weather observations")
+    parser.add_argument("zones", help="CSV or JSON zone file ('-' for stdin)")
+    parser.add_argument("--output", "-o", default="-", help="results file (default stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="results format")
+    parser.add_argument("--source", choices=("stations", "decoded"), default="stations",
+                        help="NOAA observation directory to read")
+    parser.add_argument("--rooturl", default=None, help="alternate URL of the observation directory")
+    parser.add_argument("--workers", type=int, default=fetch.defaultWorkers, help="concurrent station downloads")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk observation cache")
+    parser.add_argument("--stations", default=defaultStationsFileName,
+                        help="station metadata CSV used to place zones given by latitude & longitude")
+    parser.add_argument("--fallback", type=int, default=0,
+                        help="nearest stations to try when a station's observation is missing (default none)")
+    parser.add_argument("--metrics", default=None,
+                        help="write stage timings & counters here when done (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--store", default=None, help="also add the results to this SQLite results database")
+    args = parser.parse_args(argv)
+
+    zoneErrors = []
+    stationIndex = loadstations(args.stations)
+    evaluator = Evaluator(args.source, None if args.no_cache else ObservationCache(), args.rooturl, args.workers,
+                          stationIndex, args.fallback)
+    decisions = evaluator.run(readzones(args.zones, zoneErrors, stationIndex))
+    store = ResultStore(args.store) if args.store else None
+    if store is not None:
+        decisions = store.stored(decisions)
+    try:
+        if args.output == "-":
+            count = writeresults(decisions, sys.stdout, args.format)
+        else:
+            with open(args.output, 'w', newline='') as output:
+                count = writeresults(decisions, output, args.format)
+    finally:
+        if store is not None:
+            store.close()
+    for message in zoneErrors:
+        print(f" *** Skipped {message}", file=sys.stderr)
+    for station, message in sorted(evaluator.errors.items()):
+        print(f" *** {message}", file=sys.stderr)
+    for station, neighbor in sorted(evaluator.substitutes.items()):
+        print(f" *** Using {neighbor} observations for {station}", file=sys.stderr)
+    print(f" *** {count} zones evaluated against {len(evaluator.observations)} stations", file=sys.stderr)
+    if args.metrics:
+        metrics.write(args.metrics)
+    return 2 if zoneErrors or evaluator.errors else 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
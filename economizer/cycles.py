@@ -0,0 +1,144 @@
+# Streaming ingestion of NOAA hourly cycle files
+#
+# metar/cycles/NNZ.TXT holds every report received during hour NN (UTC) for every station in the
+# country, one record per report separated by blank lines:
+#
+#     2021/06/15 12:53
+#     KSBY 151253Z 21008KT 10SM CLR 24/18 A3002 RMK AO2 SLP165 T02390178
+#
+#     2021/06/15 12:54
+#     KGED 151254Z AUTO 20006KT 10SM CLR 24/19 A3001 RMK AO2 SLP162 T02390189
+#
+# records() splits such a file record by record with a generator, reading a fixed-size chunk at a time,
+# so memory use stays constant however large the file is.  Local files are memory-mapped and each
+# record is parsed in place.  evaluatecycle() feeds every observation into the economizer evaluation,
+# batching a bounded number of observations per vectorized call, so one download or local file
+# yields decisions for every station.
+#
+# Usage: python -m economizer.cycles FILE_OR_URL [--indoor-temp 72] [--indoor-rh 50] ...
+#
+import argparse
+import csv
+import mmap
+import sys
+import urllib.request
+from itertools import islice
+
+from economizer import fetch, metrics
+from economizer.decision import Zone, decide
+from economizer.metar import parseraw
+#
+cyclesurl = "https://tgftp.nws.noaa.gov/data/observations/metar/cycles/"
+#
+chunkSize = 1 << 16     # bytes read from a stream at a time
+batchSize = 4096        # observations per vectorized evaluation
+#
+def _spans(buffer, start, end):
+# (start, end) offsets of the non-blank records in buffer[start:end]
+    while start < end:
+        stop = buffer.find(b"\n\n", start, end)
+        if stop < 0:
+            stop = end
+        if buffer[start:stop].strip():
+            yield start, stop
+        start = stop + 2
+#
+def records(stream, size=chunkSize):
+# Yield each record (bytes) of a cycle file read from a binary stream, one chunk at a time
+    pending = b""
+    while True:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        pending = (pending + chunk).replace(b"\r\n", b"\n")
+        last = pending.rfind(b"\n\n")
+        if last < 0:
+            continue
+        for start, stop in _spans(pending, 0, last):
+            yield pending[start:stop]
+        pending = pending[last + 2:]
+    if pending.strip():
+        yield pending.strip()
+#
+def observations(source, errors=None):
+# Parsed observations from a cycle file path, URL or binary stream.  Reports that cannot be parsed
+# are skipped (and appended to the errors list when one is given).
+    if hasattr(source, "read"):
+        spans = ((record, 0, None) for record in records(source))
+        yield from _parse(spans, errors)
+    elif source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source, timeout=fetch.defaultTimeout) as resp:
+            yield from observations(resp, errors)
+    else:
+        with open(source, 'rb') as cycleFile:
+            try:
+                mapped = mmap.mmap(cycleFile.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return
+            with mapped:
+                if mapped.find(b"\r\n", 0, chunkSize) >= 0:
+                    yield from observations(cycleFile, errors)  # CRLF files are normalized while streaming
+                    return
+                spans = ((mapped, start, stop) for start, stop in _spans(mapped, 0, len(mapped)))
+                yield from _parse(spans, errors)
+#
+def _parse(spans, errors):
+    for buffer, start, stop in spans:
+        try:
+            yield parseraw(buffer, start, stop)
+        except ValueError as e:
+            metrics.count("parse_failures")
+            if errors is not None:
+                errors.append(str(e))
+#
+def evaluatecycle(source, zone, latestOnly=False, errors=None):
+# Decisions for every observation in a cycle file, evaluated a batch at a time.
+# With latestOnly, only the last report seen for each station is evaluated (this holds one
+# observation per station in memory rather than one batch).
+    if latestOnly:
+        latest = {}
+        with metrics.span("parse"):
+            for observation in observations(source, errors):
+                latest[observation["station"]] = observation
+        stream = iter(latest.values())
+    else:
+        stream = observations(source, errors)
+    while True:
+        with metrics.span("parse"):     # reading & parsing the next batch
+            batch = list(islice(stream, batchSize))
+        if not batch:
+            break
+        yield from decide(batch, zone)
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.cycles",
+                                     description="Economizer decisions for every station in a NOAA cycle file")
+    parser.add_argument("source", help="cycle file path, URL, or hour (e.g. 12 for 12Z.TXT from noaa.gov)")
+    parser.add_argument("--indoor-temp", type=float, default=72.0, help="indoor dry bulb temperature (deg F)")
+    parser.add_argument("--indoor-rh", type=float, default=50.0, help="indoor relative humidity (%%)")
+    parser.add_argument("--window-width", type=float, default=30.0, help="window opening width (inches)")
+    parser.add_argument("--window-height", type=float, default=20.0, help="window opening height (inches)")
+    parser.add_argument("--quantity", type=int, default=1, help="quantity of window openings")
+    parser.add_argument("--window-dir", type=float, default=180.0, help="window compass direction (degrees)")
+    parser.add_argument("--latest", action="store_true", help="only the latest report for each station")
+    args = parser.parse_args(argv)
+
+    source = args.source
+    if source.isdigit():
+        source = f"{cyclesurl}{int(source):02d}Z.TXT"
+    zone = Zone("", None, args.indoor_temp, args.indoor_rh, args.window_width, args.window_height,
+                args.quantity, args.window_dir)
+    errors = []
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(["station", "observed", "outdoor_temp_f", "outdoor_dew_point_f", "outdoor_enthalpy",
+                     "indoor_enthalpy", "mass_flow_lb_hr", "q_btu_hr", "mode"])
+    for d in evaluatecycle(source, zone, latestOnly=args.latest, errors=errors):
+        writer.writerow([d.station, d.observed, round(d.outdoorDBTemp, 1), round(d.outdoorDewPoint, 1),
+                         round(d.outdoorEnthalpy, 2), round(d.indoorEnthalpy, 2), round(d.massFlowRate, 1),
+                         round(d.Q, 1), d.mode])
+    if errors:
+        print(f" *** {len(errors)} reports could not be parsed", file=sys.stderr)
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# Resident polling service
+#
+# Running an evaluator from cron every few minutes pays for interpreter startup, the table load and a
+# fresh connection each time, mostly to find the same observation as last time.  This service stays
+# resident instead: the saturation table is loaded once, connections are kept alive & revalidated
+# with conditional GETs, and each station is polled on the METAR schedule --
+#
+#   * shortly after its next routine report is expected on the server (economizer.obscache.nextissuance)
+#     plus a random jitter, drawn once per process so many daemons don't all poll at the same second;
+#   * if the report hasn't changed yet (304 / same report), again after a retry delay that
+#     doubles up to maxRetry, until the new report lands.
+#
+# Stations falling due within a few seconds of each other are polled together on one wakeup.
+#
+# Each report is fingerprinted (economizer.incremental): an unchanged report is not parsed again, and
+# only decisions that changed are written (one JSON line or CSV row per zone).  Between polls the
+# process sleeps.
+#
+# Usage: python -m economizer.daemon zones.csv [--output decisions.jsonl] [--jitter 60] [--retry 120] [--store results.db]
+#
+import argparse
+import heapq
+import random
+import signal
+import sys
+import threading
+import time
+
+from economizer import fetch, metrics
+from economizer.batch import readzones, writeresults
+from economizer.httpclient import HTTPClient
+from economizer.incremental import Pipeline
+from economizer.obscache import nextissuance, sources
+from economizer.resultstore import ResultStore
+from economizer.sattable import loadtable
+#
+defaultJitter = 60      # seconds of random delay added to each scheduled poll
+defaultRetry = 120      # seconds before re-polling a station whose new report hasn't appeared
+defaultMaxRetry = 900   # longest retry delay
+defaultWindow = 30      # seconds -- stations due this soon are polled on the same wakeup
+#
+class Poller:
+# Schedules station polls around METAR issuance and re-evaluates zones when observations change;
+# onPoll, when given, is called after each round of polls.  clock, wait & rng may be replaced
+# (e.g. by a simulated clock for benchmarking).
+    def __init__(self, zones, onDecisions, source="stations", rooturl=None, client=None, cache=None,
+                 jitter=defaultJitter, retry=defaultRetry, maxRetry=defaultMaxRetry, window=defaultWindow,
+                 clock=time.time, wait=None, rng=None, maxWorkers=fetch.defaultWorkers, onPoll=None):
+        self.zones = {}
+        for zone in zones:
+            self.zones.setdefault(zone.station, []).append(zone)
+        self.onDecisions = onDecisions
+        self.source = source
+        self.rooturl = rooturl or sources[source][0]
+        self.client = client or HTTPClient()
+        self.cache = cache
+        self.jitter = jitter
+        self.retry = retry
+        self.maxRetry = maxRetry
+        self.window = window
+        self.clock = clock
+        self._stop = threading.Event()
+        self.wait = wait or self._stop.wait
+        self.rng = rng or random.Random()
+        self.offset = self.rng.uniform(0, jitter)
+        self.maxWorkers = maxWorkers
+        self.onPoll = onPoll
+        self.pipeline = Pipeline(zones, source)
+        self.delays = {}        # station -> current retry delay
+        self.schedule = [(clock(), station) for station in self.zones]
+        heapq.heapify(self.schedule)
+        self.polls = self.unchanged = self.updates = self.failures = self.wakeups = 0
+
+    def stop(self):
+        self._stop.set()
+
+    def reschedule(self, station, now, changed):
+        if changed:
+            self.delays[station] = self.retry
+            when = nextissuance(now) + self.offset
+        else:
+            delay = self.delays.get(station, self.retry)
+            self.delays[station] = min(delay * 2, self.maxRetry)
+            when = now + delay
+        heapq.heappush(self.schedule, (when, station))
+
+    def poll(self, stations):
+    # Fetch the given stations (concurrently) and pass changed reports through the pipeline
+        results = list(fetch.fetchstations(stations, self.rooturl, self.maxWorkers, client=self.client))
+        reports = {r.station: r.data for r in results if not r.error and not r.notModified}
+        before = {station: self.pipeline.fingerprints.get(station) for station in reports}
+        errors = {}
+        fresh = self.pipeline.updates(reports, errors)
+        now = self.clock()
+        for result in results:
+            self.polls += 1
+            changed = result.station in reports and self.pipeline.fingerprints.get(result.station) != before[result.station]
+            if result.error or result.station in errors:
+                self.failures += 1
+            elif changed:
+                self.updates += 1
+                if self.cache is not None:
+                    self.cache.put(result.station, self.source, result.data, self.pipeline.observations[result.station])
+            else:
+                self.unchanged += 1
+            self.reschedule(result.station, now, changed)
+        if fresh:
+            self.onDecisions(fresh)
+        if self.onPoll:
+            self.onPoll()
+
+    def run(self, until=None):
+    # Poll until stop() is called (or the clock passes until)
+        loadtable()     # warm the table before the first poll
+        while self.schedule and not self._stop.is_set():
+            when = self.schedule[0][0]
+            if until is not None and when >= until:
+                break
+            delay = when - self.clock()
+            if delay > 0:
+                self.wakeups += 1
+                if self.wait(delay):
+                    break
+                continue
+            now = self.clock()
+            due = []
+            while self.schedule and self.schedule[0][0] <= now + self.window:
+                due.append(heapq.heappop(self.schedule)[1])
+            self.poll(due)
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.daemon",
+                                     description="Resident service re-evaluating zones as new observations are issued")
+    parser.add_argument("zones", help="CSV or JSON zone file (see economizer.batch)")
+    parser.add_argument("--output", "-o", default="-", help="decisions file, appended to (default stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="jsonl", help="decisions format")
+    parser.add_argument("--source", choices=("stations", "decoded"), default="stations",
+                        help="NOAA observation directory to read")
+    parser.add_argument("--rooturl", default=None, help="alternate URL of the observation directory")
+    parser.add_argument("--jitter", type=float, default=defaultJitter, help="largest random delay added to polls (s)")
+    parser.add_argument("--retry", type=float, default=defaultRetry, help="first re-poll delay for late reports (s)")
+    parser.add_argument("--max-retry", type=float, default=defaultMaxRetry, help="longest re-poll delay (s)")
+    parser.add_argument("--metrics", default=None,
+                        help="rewrite stage timings & counters here after every poll (.prom for Prometheus text)")
+    parser.add_argument("--store", default=None, help="also add the decisions to this SQLite results database")
+    args = parser.parse_args(argv)
+
+    zoneErrors = []
+    zones = list(readzones(args.zones, zoneErrors))
+    unique = {}
+    for zone in zones:
+        if (zone.station, zone.name) in unique:
+            zoneErrors.append(f"zone {zone.name}: another zone for {zone.station} has the same name")
+        else:
+            unique[zone.station, zone.name] = zone
+    zones = list(unique.values())
+    for message in zoneErrors:
+        print(f" *** Skipped {message}", file=sys.stderr)
+    if not zones:
+        print(" *** No zones to evaluate", file=sys.stderr)
+        return 2
+    output = sys.stdout if args.output == "-" else open(args.output, 'a', newline='')
+    header = args.format == "csv" and (output is sys.stdout or output.tell() == 0)
+    store = ResultStore(args.store) if args.store else None
+
+    def ondecisions(decisions):
+        nonlocal header
+        writeresults(decisions, output, args.format, header=header)
+        header = False
+        output.flush()
+        if store is not None:
+            store.add(decisions)
+            store.flush()
+
+    poller = Poller(zones, ondecisions, args.source, args.rooturl, jitter=args.jitter, retry=args.retry,
+                    maxRetry=args.max_retry, onPoll=(lambda: metrics.write(args.metrics)) if args.metrics else None)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *a: poller.stop())
+    print(f" *** Polling {len(poller.zones)} stations for {len(zones)} zones", file=sys.stderr)
+    try:
+        poller.run()
+    finally:
+        poller.client.close()
+        if output is not sys.stdout:
+            output.close()
+        if store is not None:
+            store.close()
+    print(f" *** {poller.polls} polls ({poller.unchanged} unchanged, {poller.failures} failed), "
+          f"{poller.updates} new observations, {poller.wakeups} wakeups", file=sys.stderr)
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
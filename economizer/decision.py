@@ -0,0 +1,98 @@
+# Economizer decisions for parsed observations
+#
+# Turns parsed METAR observations (economizer.metar) and a zone's indoor conditions & window openings
+# into the same heat flow result the interactive evaluator prints, computed for a whole list of
+# observations in one vectorized call.
+#
+from collections import namedtuple
+
+import numpy as np
+
+from economizer import metrics, psychrometrics
+from economizer.sattable import loadtable
+from economizer.stationindex import loadstations
+#
+class Zone(namedtuple("Zone", ["name", "station", "indoorDBTemp", "indoorRh", "windowWidthInches",
+                               "windowHeightInches", "windowQuantity", "windowDir"],
+                      defaults=("", None, 72.0, 50.0, 30.0, 20.0, 1, 180.0))):
+# Indoor conditions (deg F, RH %) & window openings (inches, quantity, compass degrees) of one zone
+    __slots__ = ()
+
+    @property
+    def windowArea(self):
+    # Total window opening area in sqft
+        return self.windowWidthInches / 12 * self.windowHeightInches / 12 * self.windowQuantity
+#
+Decision = namedtuple("Decision", ["zone", "station", "observed", "outdoorDBTemp", "outdoorDewPoint",
+                                   "outdoorEnthalpy", "indoorEnthalpy", "massFlowRate", "Q", "mode"])
+#
+def fahrenheit(degC):
+    return 9 / 5 * np.asarray(degC, dtype=float) + 32
+#
+def observationarrays(observations):
+# Columns (outdoor temp F, dew point F, wind speed knots, wind direction with NaN for VRB)
+# of a list of parsed observations
+    count = len(observations)
+    temps = np.fromiter((o["temperatureC"] for o in observations), float, count)
+    dewPoints = np.fromiter((o["dewPointC"] for o in observations), float, count)
+    speeds = np.fromiter((o["windSpeedKnots"] for o in observations), float, count)
+    dirs = np.fromiter((np.nan if o["windDir"] == "VRB" else o["windDir"] for o in observations), float, count)
+    return fahrenheit(temps), fahrenheit(dewPoints), speeds, dirs
+#
+def observationpressures(observations, stationIndex=None):
+# Station pressure (psia) of each parsed observation from its altimeter setting & the station's field
+# elevation in stations.csv (sea level for unlisted stations; standard pressure when the altimeter is missing)
+    count = len(observations)
+    index = stationIndex if stationIndex is not None else loadstations()
+    altimeters = np.fromiter((np.nan if o.get("altimeterInHg") is None else o["altimeterInHg"] for o in observations),
+                             float, count)
+    elevations = {station: index.elevation(station) for station in {o.get("station") for o in observations}}
+    return psychrometrics.stationpressure(altimeters, np.fromiter((elevations[o.get("station")] for o in observations),
+                                                                  float, count))
+#
+def modes(Q, windSpeedKnots, windDir, massFlowRate, valid):
+# Economizer mode for each result, as reported by the interactive evaluator
+    mode = np.where(Q < 0, "heating", "cooling").astype(object)
+    mode[massFlowRate == 0] = "ineffective"
+    mode[np.isnan(windDir)] = "variable"
+    mode[windSpeedKnots == 0] = "calm"
+    mode[~valid] = "out of range"
+    return mode
+#
+@metrics.timed("evaluate")
+def evaluatearrays(outdoorT, dewPoint, speeds, dirs, zone, table=None, pressure=None):
+# Vectorized evaluation of outdoor condition columns (deg F, deg F, knots, degrees with NaN for VRB,
+# and optionally station pressure in psia) against one zone -- or against a Zone whose fields are
+# arrays of the same length.  Returns (outdoorEnthalpy, indoorEnthalpy, massFlowRate, Q, mode) arrays;
+# conditions outside the saturation table give NaN enthalpy & Q and mode "out of range".
+#
+# Each psychrometric stage is timed with one span per call, covering every row at once.
+    table = table if table is not None else loadtable()
+    valid = ((outdoorT >= table.firstTemp) & (outdoorT <= table.lastTemp)
+             & (dewPoint >= table.firstTemp) & (dewPoint <= table.lastTemp))
+    clippedT = np.clip(outdoorT, table.firstTemp, table.lastTemp)
+    with metrics.span("lookup"):
+        outdoorX = psychrometrics.humidityratio(clippedT, dewPoint=np.clip(dewPoint, table.firstTemp, table.lastTemp),
+                                                table=table, pressure=pressure)
+        indoorX = psychrometrics.humidityratio(zone.indoorDBTemp, rh=zone.indoorRh / 100, table=table,
+                                               pressure=pressure)
+    with metrics.span("enthalpy"):
+        outdoorH = psychrometrics.enthalpy(clippedT, outdoorX)
+        indoorH = psychrometrics.enthalpy(zone.indoorDBTemp, indoorX)
+    with metrics.span("airflow"):
+        massFlowRate = psychrometrics.airflow(speeds, np.nan_to_num(dirs), zone.windowDir, zone.windowArea)
+    massFlowRate = np.where(np.isnan(dirs), 0.0, massFlowRate)
+    Q = np.where(valid, massFlowRate * (indoorH - outdoorH), np.nan)
+    return np.where(valid, outdoorH, np.nan), indoorH, massFlowRate, Q, modes(Q, speeds, dirs, massFlowRate, valid)
+#
+def decide(observations, zone, table=None):
+# Decisions for a list of parsed observations against one zone
+    if not observations:
+        return []
+    outdoorT, dewPoint, speeds, dirs = observationarrays(observations)
+    outdoorH, indoorH, massFlowRate, Q, mode = evaluatearrays(outdoorT, dewPoint, speeds, dirs, zone, table,
+                                                              observationpressures(observations))
+    return [Decision(zone.name, o["station"], o.get("observed"), t, d, h, hi, m, q, md)
+            for o, t, d, h, hi, m, q, md in zip(observations, outdoorT.tolist(), dewPoint.tolist(), outdoorH.tolist(),
+                                                np.broadcast_to(indoorH, Q.shape).tolist(), massFlowRate.tolist(),
+                                                Q.tolist(), mode)]
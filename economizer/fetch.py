@@ -0,0 +1,182 @@
+# Concurrent retrieval of weather observation files from the National Weather Service
+#
+# fetchstations() pulls any number of station files from rooturl at once on a bounded thread pool,
+# with a timeout on every request, and yields each result as soon as it completes.
+#
+# Requests go through a pooled keep-alive HTTPClient (economizer.httpclient), so repeated polls reuse
+# connections and unchanged observation files come back as 304 Not Modified without a body.
+#
+# fetchhedged() retrieves one observation within a total deadline from several equivalent files (the
+# decoded & raw directories carry the same report; a neighbouring station is a last resort): the next
+# file is also requested when the first is slow to answer, the first good answer wins, and failed
+# requests are retried with exponential backoff while the deadline allows.
+#
+# Usage: python -m economizer.fetch KSBY KGED KDOV ...
+#
+import heapq
+import random
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+from economizer import metrics
+from economizer.httpclient import HTTPError, defaultclient
+#
+# URLs for current weather observations
+rooturl = "https://tgftp.nws.noaa.gov/data/observations/metar/stations/"
+decodedurl = "https://tgftp.nws.noaa.gov/data/observations/metar/decoded/"
+#
+defaultTimeout = 10     # seconds per request
+defaultWorkers = 16     # concurrent requests
+defaultDeadline = 8.0   # seconds for a hedged retrieval, retries included
+defaultHedgeAfter = 1.0 # seconds without an answer before the next file is also requested
+defaultBackoff = 0.25   # seconds before the first retry of a failed request (doubled for each retry)
+#
+FetchResult = namedtuple("FetchResult", ["station", "url", "data", "error", "elapsed", "notModified"])
+HedgedResult = namedtuple("HedgedResult", ["url", "index", "data", "value", "error", "elapsed", "attempts"])
+#
+def stationfile(station):
+# Observation file name for a four letter airport code ('ksby', 'KSBY' or 'KSBY.TXT')
+    station = station.upper()
+    return station if station.endswith(".TXT") else station + ".TXT"
+#
+def stationcode(station):
+    return stationfile(station)[:-4]
+#
+def fetchstation(station, rooturl=rooturl, timeout=defaultTimeout, client=None):
+# Retrieve one station's observation file; errors are returned in the result rather than raised
+    url = rooturl + stationfile(station)
+    client = client or defaultclient()
+    start = time.perf_counter()
+    metrics.count("fetches")
+    try:
+        with metrics.span("fetch"):
+            resp = client.get(url, timeout=timeout)
+    except (OSError, ValueError) as e:
+        metrics.count("fetch_errors")
+        return FetchResult(stationcode(station), url, None, str(getattr(e, "reason", e)),
+                           time.perf_counter() - start, False)
+    if resp.notModified:
+        metrics.count("not_modified")
+    return FetchResult(stationcode(station), url, resp.data, None, time.perf_counter() - start, resp.notModified)
+#
+def fetchstations(stations, rooturl=rooturl, maxWorkers=defaultWorkers, timeout=defaultTimeout, client=None):
+# Retrieve many station files concurrently, yielding FetchResults in order of completion
+    stations = list(stations)
+    if not stations:
+        return
+    client = client or defaultclient()
+    with ThreadPoolExecutor(max_workers=min(maxWorkers, len(stations))) as pool:
+        futures = [pool.submit(fetchstation, station, rooturl, timeout, client) for station in stations]
+        for future in as_completed(futures):
+            yield future.result()
+#
+def _attempt(url, timeout, client, parse):
+# One request of a hedged retrieval: (data, value, error, permanent).  Permanent failures -- a
+# missing file or a report that cannot be parsed -- are not retried.
+    metrics.count("fetches")
+    try:
+        with metrics.span("fetch"):
+            resp = client.get(url, timeout=timeout)
+    except HTTPError as e:
+        metrics.count("fetch_errors")
+        return None, None, e.reason, 400 <= e.status < 500
+    except (OSError, ValueError) as e:
+        metrics.count("fetch_errors")
+        return None, None, str(getattr(e, "reason", e) or "timed out"), False
+    if resp.notModified:
+        metrics.count("not_modified")
+    try:
+        return resp.data, parse(resp.data) if parse else None, None, False
+    except ValueError as e:
+        metrics.count("parse_failures")
+        return resp.data, None, str(e), True
+#
+def fetchhedged(urls, deadline=defaultDeadline, hedgeAfter=defaultHedgeAfter, backoff=defaultBackoff,
+                parse=None, client=None, rng=random):
+# First good answer from any of several equivalent files, in order of preference, within deadline
+# seconds.  urls[0] is requested first; the next URL is requested as well whenever hedgeAfter seconds
+# pass without an answer, or at once when a request fails.  Failed requests are retried after a
+# jittered exponential backoff while time remains.  parse (one function, or a list with one per URL)
+# turns a file into the result's value and raises ValueError to reject it.  The result is returned by
+# the deadline (every wait is bounded by the time remaining); requests still running then are abandoned.
+# Each request's socket timeout is the time remaining when it starts, but that bounds each connect &
+# read separately, so an abandoned request may hold its worker thread past the deadline.
+    urls = list(urls)
+    if not urls:
+        return HedgedResult(None, None, None, None, "no files to request", 0.0, 0)
+    parsers = parse if isinstance(parse, (list, tuple)) else [parse] * len(urls)
+    client = client or defaultclient()
+    start = time.monotonic()
+    end = start + deadline
+    pool = ThreadPoolExecutor(max_workers=len(urls))   # at most one request per URL at a time
+    pending = {}        # future -> index of its URL
+    retries = []        # heap of (time, index) of failed requests waiting to be retried
+    failures = [0] * len(urls)
+    attempts = launched = 0
+    lastLaunch = start
+    error = None
+
+    def launch(i):
+        nonlocal attempts
+        attempts += 1
+        timeout = max(end - time.monotonic(), 0.001)
+        pending[pool.submit(_attempt, urls[i], timeout, client, parsers[i])] = i
+
+    try:
+        while True:
+            now = time.monotonic()
+            if now >= end:
+                break
+            while retries and retries[0][0] <= now:
+                metrics.count("fetch_retries")
+                launch(heapq.heappop(retries)[1])
+            if launched < len(urls) and (not launched or now >= lastLaunch + hedgeAfter or not pending):
+                if launched:
+                    metrics.count("fetch_hedges")
+                launch(launched)
+                launched += 1
+                lastLaunch = now
+                continue
+            if not pending and not retries:
+                break       # every file failed for good
+            wakeup = min(end, retries[0][0] if retries else end,
+                         lastLaunch + hedgeAfter if launched < len(urls) else end)
+            if not pending:
+                time.sleep(max(wakeup - now, 0))
+                continue
+            for future in wait(pending, timeout=max(wakeup - now, 0), return_when=FIRST_COMPLETED)[0]:
+                i = pending.pop(future)
+                data, value, error, permanent = future.result()
+                if error is None:
+                    return HedgedResult(urls[i], i, data, value, None, time.monotonic() - start, attempts)
+                if not permanent:
+                    failures[i] += 1
+                    when = time.monotonic() + backoff * 2 ** (failures[i] - 1) * rng.uniform(0.5, 1.0)
+                    if when < end:
+                        heapq.heappush(retries, (when, i))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    if time.monotonic() >= end:
+        metrics.count("fetch_deadlines")
+        error = f"no answer within {deadline:g} s" + (f" ({error})" if error else "")
+    return HedgedResult(None, None, None, None, error, time.monotonic() - start, attempts)
+#
+def main(argv=None):
+    stations = sys.argv[1:] if argv is None else argv
+    if not stations:
+        print("Usage: python -m economizer.fetch STATION [STATION ...]")
+        return 1
+    failures = 0
+    for result in fetchstations(stations):
+        if result.error:
+            failures += 1
+            print(f" *** Error... WEATHER OBSERVATION FILE [{result.station}] NOT RETRIEVED: {result.error}")
+        else:
+            print(f" *** Retrieved {len(result.data)} bytes from {result.url} in {result.elapsed:.3f} s")
+            print(result.data.decode("ascii", "replace").strip())
+    return 2 if failures else 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
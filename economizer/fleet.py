@@ -0,0 +1,173 @@
+# Multi-core fleet evaluation
+#
+# Evaluates a portfolio of buildings -- a zone file as read by economizer.batch (zones may be placed by
+# latitude & longitude), with an extra "building" column (zones without one are their own building) --
+# on a pool of worker processes:
+#
+#   * the parent reads the zones, groups them by building and retrieves every station's observation
+#     once (concurrently, through the observation cache, trying --fallback nearby stations for any
+#     that are unavailable); zones whose station has no observation are counted as unevaluated;
+#   * each worker receives the saturation table, the observations & the buildings once, when it starts
+#     (inherited outright where processes are forked, pickled once per worker otherwise), so a task is
+#     just a range of buildings -- nothing is re-pickled per task;
+#   * tasks are shards of whole buildings (about shardZones zones each); a worker evaluates its shard
+#     in one vectorized call and sends back the formatted result rows & per-building totals;
+#   * the parent writes shards in order as they complete and merges the building totals.
+#
+# Usage: python -m economizer.fleet zones.csv [--processes 8] [--output zones.csv] [--summary buildings.csv]
+#
+import argparse
+import csv
+import io
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from economizer import fetch, sattable
+from economizer.batch import Evaluator, _chunks, chunkSize, locate, makezone, readrecords, writeresults
+from economizer.obscache import ObservationCache
+from economizer.stationindex import defaultStationsFileName, loadstations
+#
+shardZones = 5000       # zones per task
+#
+BuildingTotals = namedtuple("BuildingTotals", ["building", "zones", "economizerZones", "coolingBtuHr",
+                                               "heatingBtuHr", "unevaluatedZones"])
+#
+_evaluator = None       # each worker's Evaluator, holding the parent's observations
+_buildings = None       # each worker's list of (building, zones) pairs
+#
+def _initworker(table, observations, buildings):
+# Runs once in each worker: install the parent's table (so it's never re-read), observations & buildings
+    global _evaluator, _buildings
+    sattable.settable(table)
+    _evaluator = Evaluator()
+    _evaluator.observations = observations
+    _buildings = buildings
+#
+def _evaluateshard(shard, format):
+# Result rows (text) & BuildingTotals for the buildings shard (start, stop) of the worker's list
+    start, stop = shard
+    zones = [zone for building, buildingZones in _buildings[start:stop] for zone in buildingZones]
+    decisions = _evaluator.evaluate(zones)
+    rows = io.StringIO()
+    writeresults(decisions, rows, format, header=False)
+    totals = []
+    first = 0
+    for building, buildingZones in _buildings[start:stop]:
+        mine = decisions[first:first + len(buildingZones)]
+        first += len(buildingZones)
+        cooling = [d.Q for d in mine if d.mode == "cooling"]
+        totals.append(BuildingTotals(building, len(mine), len(cooling), sum(cooling),
+                                     sum(-d.Q for d in mine if d.Q < 0),
+                                     sum(1 for d in mine if d.Q != d.Q)))
+    return rows.getvalue(), totals
+#
+def readbuildings(fileName, errors=None, stationIndex=None):
+# {building: [Zone, ...]} in file order; invalid zones are skipped (messages appended to errors).  With a
+# StationIndex, zones with latitude & longitude but no station are placed as economizer.batch.readzones does.
+    buildings = {}
+    for chunk in _chunks(readrecords(fileName, errors), chunkSize):
+        if stationIndex is not None:
+            locate([record for _, record in chunk], stationIndex)
+        for lineNumber, record in chunk:
+            try:
+                zone = makezone(record, lineNumber)
+            except ValueError as e:
+                if errors is not None:
+                    errors.append(str(e))
+                continue
+            buildings.setdefault(str(record.get("building") or zone.name), []).append(zone)
+    return buildings
+#
+def shards(buildings, size=shardZones):
+# (start, stop) ranges of a list of (building, zones) pairs holding about size zones each (buildings
+# are never split)
+    start = 0
+    count = 0
+    for i, (building, zones) in enumerate(buildings):
+        count += len(zones)
+        if count >= size:
+            yield start, i + 1
+            start = i + 1
+            count = 0
+    if start < len(buildings):
+        yield start, len(buildings)
+#
+def evaluatefleet(buildings, observations, output, format="csv", processes=None, size=shardZones):
+# Evaluate every building ({building: [Zone, ...]}), writing zone results to output; returns
+# {building: BuildingTotals}.  observations maps each station to its parsed observation (None when
+# unavailable).
+    table = sattable.loadtable()
+    buildings = list(buildings.items())
+    processes = processes or os.cpu_count() or 1
+    if format == "csv":
+        writeresults([], output, format)
+    totals = {}
+    if processes == 1:
+        _initworker(table, observations, buildings)
+        results = map(_evaluateshard, shards(buildings, size), repeat(format))
+        for rows, shardTotals in results:
+            output.write(rows)
+            totals.update((t.building, t) for t in shardTotals)
+        return totals
+    with ProcessPoolExecutor(processes, initializer=_initworker, initargs=(table, observations, buildings)) as pool:
+        for rows, shardTotals in pool.map(_evaluateshard, shards(buildings, size), repeat(format)):
+            output.write(rows)
+            totals.update((t.building, t) for t in shardTotals)
+    return totals
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.fleet",
+                                     description="Evaluate a portfolio of buildings on a pool of processes")
+    parser.add_argument("zones", help="CSV or JSON zone file with an optional building column")
+    parser.add_argument("--output", "-o", default="-", help="zone results file (default stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="zone results format")
+    parser.add_argument("--summary", default=None, help="write per-building totals (CSV) here")
+    parser.add_argument("--processes", "-j", type=int, default=None, help="worker processes (default: all CPUs)")
+    parser.add_argument("--shard-size", type=int, default=shardZones, help="zones per task")
+    parser.add_argument("--source", choices=("stations", "decoded"), default="stations",
+                        help="NOAA observation directory to read")
+    parser.add_argument("--rooturl", default=None, help="alternate URL of the observation directory")
+    parser.add_argument("--workers", type=int, default=fetch.defaultWorkers, help="concurrent station downloads")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the on-disk observation cache")
+    parser.add_argument("--stations", default=defaultStationsFileName,
+                        help="station metadata CSV used to place zones given by latitude & longitude")
+    parser.add_argument("--fallback", type=int, default=0,
+                        help="nearest stations to try when a station's observation is missing (default none)")
+    args = parser.parse_args(argv)
+
+    zoneErrors = []
+    stationIndex = loadstations(args.stations)
+    buildings = readbuildings(args.zones, zoneErrors, stationIndex)
+    evaluator = Evaluator(args.source, None if args.no_cache else ObservationCache(), args.rooturl, args.workers,
+                          stationIndex, args.fallback)
+    evaluator.prefetch(zone.station for zones in buildings.values() for zone in zones)
+    if args.output == "-":
+        totals = evaluatefleet(buildings, evaluator.observations, sys.stdout, args.format, args.processes,
+                               args.shard_size)
+    else:
+        with open(args.output, 'w', newline='') as output:
+            totals = evaluatefleet(buildings, evaluator.observations, output, args.format, args.processes,
+                                   args.shard_size)
+    if args.summary:
+        with open(args.summary, 'w', newline='') as summary:
+            writer = csv.writer(summary, lineterminator="\n")
+            writer.writerow(["building", "zones", "economizer_zones", "cooling_btu_hr", "heating_btu_hr",
+                             "unevaluated_zones"])
+            for t in totals.values():
+                writer.writerow([t.building, t.zones, t.economizerZones, round(t.coolingBtuHr, 1),
+                                 round(t.heatingBtuHr, 1), t.unevaluatedZones])
+    for message in zoneErrors:
+        print(f" *** Skipped {message}", file=sys.stderr)
+    for station, message in sorted(evaluator.errors.items()):
+        print(f" *** {message}", file=sys.stderr)
+    for station, neighbor in sorted(evaluator.substitutes.items()):
+        print(f" *** Using {neighbor} observations for {station}", file=sys.stderr)
+    print(f" *** {sum(t.zones for t in totals.values())} zones in {len(totals)} buildings evaluated against "
+          f"{len(evaluator.observations)} stations", file=sys.stderr)
+    return 2 if zoneErrors or evaluator.errors else 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+# Pooled keep-alive HTTP client with conditional GET
+#
+# Every station file retrieved from tgftp.nws.noaa.gov used to cost a fresh TCP (and TLS) connection
+# and a full download.  HTTPClient keeps idle connections per host for reuse and remembers the ETag &
+# Last-Modified validators of each URL.  Repeat requests send If-None-Match / If-Modified-Since, and a
+# 304 Not Modified answer is served from the remembered body -- one round trip and no body transfer.
+#
+import http.client
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from economizer import metrics
+#
+defaultTimeout = 10         # seconds
+maxIdlePerHost = 16         # idle keep-alive connections kept per host
+#
+Response = namedtuple("Response", ["url", "status", "data", "notModified", "bytesReceived", "elapsed"])
+#
+class HTTPError(OSError):
+# Non-success HTTP status (the reason is kept in the message for display)
+    def __init__(self, status, reason, url):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.status = status
+        self.reason = reason
+        self.url = url
+#
+_retryErrors = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionResetError,
+                BrokenPipeError, ConnectionAbortedError)
+#
+class HTTPClient:
+# Thread-safe pool of keep-alive connections with per-URL validator memory
+    def __init__(self, timeout=defaultTimeout, maxIdlePerHost=maxIdlePerHost, conditional=True):
+        self.timeout = timeout
+        self.maxIdlePerHost = maxIdlePerHost
+        self.conditional = conditional
+        self._idle = {}         # (scheme, host, port) -> [connection, ...]
+        self._validators = {}   # url -> (etag, lastModified, data)
+        self._lock = threading.Lock()
+        self.connectionsOpened = 0
+        self.requests = 0
+        self.notModified = 0
+
+    def _acquire(self, key, timeout):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.connectionsOpened += 1
+        metrics.count("connections_opened")
+        scheme, host, port = key
+        connClass = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return connClass(host, port, timeout=timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxIdlePerHost:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def get(self, url, timeout=None):
+    # GET url, revalidating any previously retrieved copy; raises HTTPError or OSError on failure
+        timeout = self.timeout if timeout is None else timeout
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        target = parts.path + ("?" + parts.query if parts.query else "")
+        headers = {"Connection": "keep-alive"}
+        cached = self._validators.get(url) if self.conditional else None
+        if cached:
+            etag, lastModified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if lastModified:
+                headers["If-Modified-Since"] = lastModified
+
+        start = time.perf_counter()
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request("GET", target, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except _retryErrors:
+                conn.close()
+                if not reused:
+                    raise
+                metrics.count("http_retries")
+                # The server closed an idle keep-alive connection -- retry once on a fresh one
+            except BaseException:
+                conn.close()
+                raise
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+
+        with self._lock:
+            self.requests += 1
+        elapsed = time.perf_counter() - start
+        if resp.status == 304 and cached:
+            with self._lock:
+                self.notModified += 1
+            return Response(url, 304, cached[2], True, len(data), elapsed)
+        if resp.status != 200:
+            raise HTTPError(resp.status, resp.reason, url)
+        if self.conditional:
+            etag = resp.getheader("ETag")
+            lastModified = resp.getheader("Last-Modified")
+            if etag or lastModified:
+                self._validators[url] = (etag, lastModified, data)
+        return Response(url, 200, data, False, len(data), elapsed)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+#
+_defaultClient = None
+#
+def defaultclient():
+# Process-wide shared client so connections & validators are reused across calls
+    global _defaultClient
+    if _defaultClient is None:
+        _defaultClient = HTTPClient()
+    return _defaultClient
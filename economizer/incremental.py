@@ -0,0 +1,138 @@
+# Change-detection pipeline
+#
+# Most polls return the same report as last time.  The pipeline fingerprints each station's raw report
+# file and keeps, per station, the fingerprint, the parsed observation and the last decision for each
+# of its zones:
+#
+#   * an unchanged fingerprint stops there -- nothing is parsed or evaluated;
+#   * a changed fingerprint is parsed, and the zones of every station that changed in the same round
+#     of reports are evaluated in one vectorized call;
+#   * a zone whose indoor conditions or window openings change is evaluated on its own against the
+#     station's memoized observation.
+#
+# Only decisions that differ from the memoized ones are returned and passed to subscribers.  Zones are
+# identified by station & name; a later zone with the same name replaces an earlier one.
+#
+import hashlib
+
+import numpy as np
+
+from economizer import metrics
+from economizer.decision import Decision, Zone, evaluatearrays, observationarrays, observationpressures
+from economizer.obscache import sources
+from economizer.sattable import loadtable
+#
+def fingerprint(raw):
+# Digest identifying a raw report file
+    return hashlib.blake2b(raw, digest_size=16).digest()
+#
+def _samedecision(old, new):
+# Whether a memoized decision (or None) equals a new one, counting NaN (out of range) values as equal
+    return old is not None and all(a == b or (a != a and b != b) for a, b in zip(old, new))
+#
+class Pipeline:
+# Memoized observations & decisions per station, recomputed only on change
+    def __init__(self, zones=(), source="stations", table=None):
+        self.source = source
+        self.parse = sources[source][1]
+        self.table = table
+        self.zones = {}         # station -> {zone name: Zone}
+        self.fingerprints = {}  # station -> fingerprint of the last parsed report
+        self.observations = {}  # station -> parsed observation
+        self.decisions = {}     # station -> {zone name: Decision}
+        self.subscribers = []
+        self.reports = self.unchanged = self.parses = self.evaluations = self.published = 0
+        for zone in zones:
+            self.zones.setdefault(zone.station, {})[zone.name] = zone
+
+    def subscribe(self, callback):
+    # callback(decisions) receives each non-empty list of changed decisions
+        self.subscribers.append(callback)
+
+    def stations(self):
+        return list(self.zones)
+
+    def update(self, station, raw):
+    # A station's raw report file; returns the decisions that changed.  Raises ValueError (leaving the
+    # memoized state alone) when the report cannot be parsed.
+        errors = {}
+        decisions = self.updates({station: raw}, errors)
+        if errors:
+            raise ValueError(errors[station])
+        return decisions
+
+    def updates(self, reports, errors=None):
+    # {station: raw report file}; returns the decisions that changed.  Reports that cannot be parsed
+    # leave their station's memoized state alone and are added to errors (station -> message).
+        changed = []
+        for station, raw in reports.items():
+            self.reports += 1
+            digest = fingerprint(raw)
+            if digest == self.fingerprints.get(station):
+                self.unchanged += 1
+                metrics.count("unchanged_reports")
+                continue
+            try:
+                with metrics.span("parse" if self.source == "stations" else "decode"):
+                    parsed = self.parse(raw)
+            except ValueError as e:
+                metrics.count("parse_failures")
+                if errors is not None:
+                    errors[station] = str(e)
+                continue
+            self.parses += 1
+            self.fingerprints[station] = digest
+            self.observations[station] = parsed
+            changed.extend(self.zones.get(station, {}).values())
+        return self._evaluate(changed)
+
+    def setzone(self, zone):
+    # Add or change a zone; it is re-evaluated only if its inputs differ.  Returns the changed decisions.
+        zones = self.zones.setdefault(zone.station, {})
+        if zones.get(zone.name) == zone:
+            return []
+        zones[zone.name] = zone
+        return self._evaluate([zone])
+
+    def setzones(self, zones):
+    # Replace the zone list: new & changed zones are evaluated (per station, one call), removed zones
+    # are forgotten, unchanged zones keep their decisions
+        wanted = {}
+        for zone in zones:
+            wanted.setdefault(zone.station, {})[zone.name] = zone
+        for station, old in list(self.zones.items()):
+            for name in set(old) - set(wanted.get(station, ())):
+                self.decisions.get(station, {}).pop(name, None)
+        changed = []
+        for station, new in wanted.items():
+            old = self.zones.get(station, {})
+            changed.extend(z for name, z in new.items() if old.get(name) != z)
+        self.zones = wanted
+        return self._evaluate(changed)
+
+    def _evaluate(self, zones):
+    # Evaluate zones (of any stations) against their stations' memoized observations in one call and
+    # publish the decisions that changed
+        zones = [z for z in zones if z.station in self.observations]
+        if not zones:
+            return []
+        self.evaluations += len(zones)
+        observations = [self.observations[z.station] for z in zones]
+        outdoorT, dewPoint, speeds, dirs = observationarrays(observations)
+        arrays = Zone("", None, *(np.array([getattr(z, f) for z in zones], dtype=float) for f in Zone._fields[2:]))
+        outdoorH, indoorH, massFlowRate, Q, mode = evaluatearrays(
+            outdoorT, dewPoint, speeds, dirs, arrays, self.table if self.table is not None else loadtable(),
+            observationpressures(observations))
+        changed = []
+        columns = (a.tolist() for a in (outdoorT, dewPoint, outdoorH, indoorH, massFlowRate, Q))
+        for zone, observation, t, d, h, hi, m, q, md in zip(zones, observations, *columns, mode):
+            decision = Decision(zone.name, zone.station, observation.get("observed"), t, d, h, hi, m, q, md)
+            memo = self.decisions.setdefault(zone.station, {})
+            if not _samedecision(memo.get(zone.name), decision):
+                memo[zone.name] = decision
+                changed.append(decision)
+        if changed:
+            self.published += len(changed)
+            for callback in self.subscribers:
+                callback(changed)
+        return changed
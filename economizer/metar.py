@@ -0,0 +1,128 @@
+# Parsing of weather observation files
+#
+# parseraw() reads the raw METAR files served from metar/stations/ (and the records of the hourly
+# cycle files in metar/cycles/):
+#
+#     2021/06/15 12:53
+#     KSBY 151253Z 21008KT 10SM CLR 24/18 A3002 RMK AO2 SLP165 T02390178
+#
+# The report is tokenized in a single forward pass by compiled regular expressions run directly over the
+# bytes -- or over the start:end span of a larger buffer such as a memoryview or mmap of a cycle file,
+# without copying it.  The body is matched group by group in METAR order, then trend & remark groups are
+# searched from where the body ended.  There are no fixed offsets, nothing is scanned twice and only the
+# extracted fields are converted to text.
+#
+# parsedecoded() reads the plain language files served from metar/decoded/.
+#
+# Both return a dictionary of plain values (so it can be cached as JSON) and raise ValueError for
+# weather data that cannot be interpreted.
+#
+import re
+#
+knotsPerMps = 1.943844
+#
+# The groups of a METAR report body appear in a fixed order; groups the evaluator does not use
+# (visibility, weather, sky condition, ...) are skipped without being examined.
+_report = re.compile(rb"""
+    \s*(?:(?P<date>\d{4}/\d\d/\d\d)\s+(?P<hhmm>\d\d:\d\d)\s+)?                 # station file header line
+    (?:METAR\s+|SPECI\s+)?
+    (?P<station>[A-Z][A-Z0-9]{3})\s+(?P<ddhhmm>\d{6})Z
+    (?P<flags>(?:\s+(?:COR|AUTO))*)
+    (?:\s+(?P<wdir>\d{3}|VRB)(?P<wspd>\d{2,3})(?:G(?P<gust>\d{2,3}))?(?P<wunit>KT|MPS)(?=\s))?
+    (?:\s+(?P<vfrom>\d{3})V(?P<vto>\d{3})(?=\s))?
+    (?:\s+(?!RMK\s)\S+)*?                                                          # visibility, weather, sky
+    \s+(?P<tm>M)?(?P<t>\d\d)/(?:(?P<dm>M)?(?P<d>\d\d))?(?=\s|$)                  # temperature / dew point
+    (?:\s+(?:A(?P<alt>\d{4})|Q(?P<qnh>\d{4}))(?=\s|$))?                            # altimeter
+    """, re.VERBOSE)
+_tail = re.compile(rb"""
+    \s(?:(?P<flag>NOSIG|TEMPO|BECMG|RMK)
+      | T(?P<rts>[01])(?P<rt>\d{3})(?P<rds>[01])(?P<rd>\d{3}))                      # remark: tenths of deg C
+    (?=\s|$)
+    """, re.VERBOSE)
+#
+def parseraw(data, start=0, end=None):
+# Parse a raw METAR report (bytes, bytearray, memoryview, mmap or str), optionally only
+# between the start & end offsets of a larger buffer
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    if end is None:
+        end = len(data)
+    m = _report.match(data, start, end)
+    if m is None:
+        text = bytes(data[start:min(end, start + 60)]).decode('latin-1').split()
+        raise ValueError(f"Invalid weather data [{' '.join(text[:4])}] (no station or temperature/dew point)")
+    (date, hhmm, station, ddhhmm, flags, wdir, wspd, gust, wunit, vfrom, vto,
+     tm, t, dm, d, alt, qnh) = m.groups()
+    station = station.decode()
+    if d is None:
+        raise ValueError(f"Invalid weather data [{station}] (temperature/dew point)")
+    if wunit is None:
+        raise ValueError(f"Invalid weather data [{station}] (wind)")
+    windSpeedKnots = float(wspd)
+    gustKnots = float(gust) if gust else None
+    if wunit == b"MPS":
+        windSpeedKnots = round(windSpeedKnots * knotsPerMps, 1)
+        gustKnots = round(gustKnots * knotsPerMps, 1) if gustKnots is not None else None
+    if alt:
+        altimeterInHg = int(alt) / 100
+    elif qnh:
+        altimeterInHg = round(int(qnh) / 33.8639, 2)
+    else:
+        altimeterInHg = None
+    flags = [flag.decode() for flag in flags.split()] if flags else []
+    #
+    # Trend & remark groups follow the altimeter -- continue from where the body match stopped
+    remarkTemperatureC = remarkDewPointC = None
+    for tail in _tail.finditer(data, m.end(), end):
+        flag, rts, rt, rds, rd = tail.groups()
+        if flag:
+            flags.append(flag.decode())
+        elif "RMK" in flags:
+            remarkTemperatureC = (-1 if rts == b"1" else 1) * int(rt) / 10
+            remarkDewPointC = (-1 if rds == b"1" else 1) * int(rd) / 10
+    return {
+        "station": station,
+        "observed": (date + b" " + hhmm).decode() if date else None,
+        "ddhhmm": ddhhmm.decode(),
+        "temperatureC": -float(t) if tm else float(t),
+        "dewPointC": -float(d) if dm else float(d),
+        "windDir": "VRB" if wdir == b"VRB" else float(wdir),
+        "windSpeedKnots": windSpeedKnots,
+        "gustKnots": gustKnots,
+        "windVariable": [float(vfrom), float(vto)] if vto else None,
+        "altimeterInHg": altimeterInHg,
+        "remarkTemperatureC": remarkTemperatureC,
+        "remarkDewPointC": remarkDewPointC,
+        "flags": flags,
+    }
+#
+def _number(text, name):
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError(f"Invalid weather data [{text}] ({name})") from None
+#
+def parsedecoded(data):
+# Parse a decoded (plain language) station file (bytes or str)
+    text = data.decode("latin-1") if isinstance(data, bytes) else data
+    lines = text.splitlines()
+    if len(lines) < 2:
+        raise ValueError("Invalid weather data [empty decoded observation]")
+    fields = {}
+    for line in lines[2:]:
+        name, sep, value = line.partition(": ")
+        if sep:
+            fields[name] = value
+    localStamp, _, utcStamp = lines[1].partition(" / ")
+    if "Temperature" not in fields or "ob" not in fields:
+        raise ValueError("Invalid weather data [missing temperature or ob line]")
+    parsed = parseraw(utcStamp[:10].replace(".", "/") + " " + utcStamp[11:13] + ":" + utcStamp[13:15]
+                      + "\n" + fields["ob"] + "\n")
+    parsed.update({
+        "header": lines[0][:lines[0].rfind(")") + 1],
+        "localDate": localStamp[:localStamp.rfind(" - ")],
+        "localTime": localStamp[localStamp.rfind(" - ") + 3:],
+        "temperatureF": _number(fields["Temperature"].split(" ")[0], "temperature"),
+        "relativeHumidity": _number(fields.get("Relative Humidity", "").rstrip("%"), "relative humidity"),
+    })
+    return parsed
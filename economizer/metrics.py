@@ -0,0 +1,170 @@
+# Timing spans & counters
+#
+# Stages of an evaluation are timed with spans and notable events are counted, all in one process-wide
+# registry:
+#
+#     with metrics.span("fetch"):          # or @metrics.timed("parse") on a function
+#         ...
+#     metrics.count("cache_hits")
+#
+# Span names used by the package: fetch, parse (raw METAR), decode (NOAA decoded files), evaluate
+# (decision.evaluatearrays) and its lookup, enthalpy & airflow stages, forecast.  Counters: fetches,
+# fetch_errors, not_modified, http_retries, connections_opened, cache_hits, cache_misses, parse_failures.
+#
+# A span costs about a microsecond, so parsing is timed per fetched observation or per batch of a
+# streamed file (cycles, replay) rather than per report, and each evaluation stage once per vectorized
+# evaluatearrays() call (however many rows it has) rather than per psychrometric function call.
+#
+# snapshot() returns everything as a dict (JSON-ready); prometheus() renders the Prometheus text
+# exposition format; write() saves either atomically, e.g. for node_exporter's textfile collector.
+# disable() turns spans & counters into no-ops.
+#
+import threading
+import time
+from functools import wraps
+#
+prefix = "economizer"
+#
+class Registry:
+# Span totals (count, seconds, slowest) and counters, safe to update from several threads
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}         # name -> [count, total seconds, max seconds]
+        self.counters = {}      # name -> count
+        self.started = time.time()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            totals = self.spans.get(name)
+            if totals is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                totals[0] += 1
+                totals[1] += seconds
+                if seconds > totals[2]:
+                    totals[2] = seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+            self.counters = {}
+            self.started = time.time()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "time": time.time(),
+                "spans": {name: {"count": c, "seconds": s, "max": m} for name, (c, s, m) in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def prometheus(self):
+    # Prometheus text exposition format
+        snap = self.snapshot()
+        lines = [f"# HELP {prefix}_stage_seconds Time spent in each evaluation stage",
+                 f"# TYPE {prefix}_stage_seconds summary"]
+        for name, s in snap["spans"].items():
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {s["seconds"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        lines.append(f"# HELP {prefix}_stage_seconds_max Slowest single span of each stage")
+        lines.append(f"# TYPE {prefix}_stage_seconds_max gauge")
+        for name, s in snap["spans"].items():
+            lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {s["max"]:.9f}')
+        for name, value in snap["counters"].items():
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        lines.append(f"# TYPE {prefix}_start_time_seconds gauge")
+        lines.append(f"{prefix}_start_time_seconds {snap['started']:.3f}")
+        return "\n".join(lines) + "\n"
+#
+class _Span:
+    __slots__ = ("registry", "name", "start")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start)
+#
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+#
+registry = Registry()
+enabled = True
+_noSpan = _NoSpan()
+#
+def span(name):
+# Context manager timing a stage (a no-op when disabled)
+    return _Span(registry, name) if enabled else _noSpan
+#
+def timed(name, failures=None):
+# Decorator timing every call of a function as a span (and counting calls that raise as failures)
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                if failures:
+                    registry.count(failures)
+                raise
+            finally:
+                registry.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+#
+def count(name, n=1):
+    if enabled:
+        registry.count(name, n)
+#
+def enable():
+    global enabled
+    enabled = True
+#
+def disable():
+    global enabled
+    enabled = False
+#
+def snapshot():
+    return registry.snapshot()
+#
+def prometheus():
+    return registry.prometheus()
+#
+def write(fileName, format=None):
+# Save a snapshot atomically -- Prometheus text for .prom/.txt files (or format="prometheus"), else JSON
+    # imported here rather than at the top so importing the instrumented parsers stays cheap
+    import json
+    import os
+    import tempfile
+    from os import path
+    format = format or ("prometheus" if fileName.endswith((".prom", ".txt")) else "json")
+    text = prometheus() if format == "prometheus" else json.dumps(snapshot(), indent=1) + "\n"
+    fd, tmpFileName = tempfile.mkstemp(dir=path.dirname(path.abspath(fileName)), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as metricsFile:
+            metricsFile.write(text)
+        os.replace(tmpFileName, fileName)
+    except BaseException:
+        if path.exists(tmpFileName):
+            os.remove(tmpFileName)
+        raise
@@ -0,0 +1,301 @@
+# Columnar, memory-mapped observation archive
+#
+# Replaying years of observations from text archives spends most of its time re-parsing METAR.  This
+# archive stores the parsed fields once, in fixed-width binary columns, partitioned by station:
+#
+#     <directory>/archive.json                 format version & column layout
+#     <directory>/<STATION>/minutes.bin        int64 minutes since 1970-01-01 UTC, ascending
+#     <directory>/<STATION>/temperatureC.bin   float32 (one file per column below)
+#     ...
+#
+# Every column of a station holds the same number of rows in time order, so a query for one station
+# and time range is a binary search of that station's minutes column followed by one contiguous slice
+# of each memory-mapped column -- only the pages holding those rows are read.  Missing values (VRB
+# wind direction, no gust) are NaN.
+#
+# Appends are incremental: new observations are appended to the end of each station's columns.
+# Observations at or before a station's latest time that are already archived are skipped; older
+# observations that are missing (a late or back-filled report) are merged in by rewriting only that
+# station's columns.
+#
+# A station's row count is the length of its minutes column, which is always written last: appends
+# take an advisory lock on <STATION>/.lock, write the other columns and then minutes, and readers map
+# every column only up to that count, so rows left by an interrupted append are never read (and are
+# truncated by the next append).  A merge writes every rewritten column to a .tmp file and then a
+# merge.pending marker before replacing the columns, so an interrupted merge is completed by the next
+# append or query rather than leaving some columns old & some new.
+#
+# Usage: python -m economizer.obsarchive ingest DIRECTORY ARCHIVE [ARCHIVE ...]
+#        python -m economizer.obsarchive query DIRECTORY STATION [--start 2020-06-01] [--end 2020-09-01]
+#        python -m economizer.obsarchive replay DIRECTORY [--station KSBY ...] [--start ...] [--end ...] [--indoor-temp 72] ...
+#
+import argparse
+import csv
+import json
+import os
+import sys
+from contextlib import contextmanager
+from os import path
+
+try:
+    import fcntl
+except ImportError:  # Windows -- no locking between appending processes
+    fcntl = None
+
+import numpy as np
+
+from economizer.decision import Zone, evaluatearrays, fahrenheit
+from economizer.psychrometrics import stationpressure
+from economizer.replay import _Accumulator, _minutes, archiveobservations, maxGapHours
+from economizer.sattable import loadtable
+from economizer.stationindex import loadstations
+#
+formatVersion = 1
+#
+# column -> (dtype, parsed observation field)
+columns = {
+    "minutes": ("<i8", "observed"),
+    "temperatureC": ("<f4", "temperatureC"),
+    "dewPointC": ("<f4", "dewPointC"),
+    "windDir": ("<f4", "windDir"),
+    "windSpeedKnots": ("<f4", "windSpeedKnots"),
+    "gustKnots": ("<f4", "gustKnots"),
+    "altimeterInHg": ("<f4", "altimeterInHg"),
+}
+writeOrder = [column for column in columns if column != "minutes"] + ["minutes"]   # minutes commits the rows
+#
+def _value(value):
+    return np.nan if value is None or value == "VRB" else value
+#
+def tominutes(text):
+# "2020-06-01", "2020-06-01 12:00" or "2020/06/01 12:53" as minutes since the epoch
+    return int(np.datetime64(text.replace("/", "-").replace(" ", "T"), "m").astype(np.int64))
+#
+class ObservationArchive:
+# Station-partitioned column files under one directory
+    def __init__(self, directory, create=True):
+        self.directory = directory
+        layoutFileName = path.join(directory, "archive.json")
+        if path.exists(layoutFileName):
+            with open(layoutFileName, 'r') as layoutFile:
+                layout = json.load(layoutFile)
+            if layout.get("version") != formatVersion or layout.get("columns") != {k: v[0] for k, v in columns.items()}:
+                raise ValueError(f"{directory}: unsupported observation archive layout")
+        elif create:
+            os.makedirs(directory, exist_ok=True)
+            with open(layoutFileName, 'w') as layoutFile:
+                json.dump({"version": formatVersion, "columns": {k: v[0] for k, v in columns.items()}}, layoutFile)
+        else:
+            raise FileNotFoundError(f"{directory}: not an observation archive")
+
+    def filename(self, station, column):
+        return path.join(self.directory, station, column + ".bin")
+
+    def stations(self):
+        return sorted(entry for entry in os.listdir(self.directory) if path.isdir(path.join(self.directory, entry)))
+
+    def count(self, station):
+    # Rows committed for a station (the length of its minutes column)
+        fileName = self.filename(station, "minutes")
+        return path.getsize(fileName) // 8 if path.exists(fileName) else 0
+
+    def column(self, station, column, count=None):
+    # Column as a read-only memory map of the station's committed rows (an empty array for an empty or
+    # unknown station)
+        dtype = np.dtype(columns[column][0])
+        fileName = self.filename(station, column)
+        count = self.count(station) if count is None else count
+        if not count or not path.exists(fileName) or path.getsize(fileName) < dtype.itemsize:
+            return np.empty(0, dtype)
+        return np.memmap(fileName, dtype, mode='r')[:count]
+
+    def query(self, station, start=None, end=None, fields=None):
+    # {column: array} for a station's observations with start <= time < end (minutes since the epoch or
+    # date/time text); the arrays are slices of the memory maps, so only the pages they cover are read
+        if path.exists(self._pendingname(station)):
+            with self.lock(station):
+                self._recover(station)
+        with self.lock(station, shared=True):
+            minutes = self.column(station, "minutes")
+            first = 0 if start is None else int(np.searchsorted(minutes, _asminutes(start), "left"))
+            last = len(minutes) if end is None else int(np.searchsorted(minutes, _asminutes(end), "left"))
+            return {column: self.column(station, column, len(minutes))[first:last] for column in (fields or columns)}
+
+    @contextmanager
+    def lock(self, station, shared=False):
+    # Advisory lock on a station's columns: exclusive while appending, shared while mapping them
+        if fcntl is None or not path.isdir(path.join(self.directory, station)):
+            yield
+            return
+        with open(path.join(self.directory, station, ".lock"), 'a') as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+    def _pendingname(self, station):
+        return path.join(self.directory, station, "merge.pending")
+
+    def _recover(self, station):
+    # Finish an interrupted merge (or discard one that never wrote its marker) and cut every column, minutes
+    # included (a partly written minutes row is not counted), to the committed rows; the station's lock
+    # must be held
+        pending = path.exists(self._pendingname(station))
+        for column in writeOrder:
+            tmpFileName = self.filename(station, column) + ".tmp"
+            if path.exists(tmpFileName) and pending:
+                os.replace(tmpFileName, self.filename(station, column))
+            elif path.exists(tmpFileName):
+                os.remove(tmpFileName)
+        if pending:
+            os.remove(self._pendingname(station))
+        count = self.count(station)
+        for column in writeOrder:
+            fileName = self.filename(station, column)
+            size = count * np.dtype(columns[column][0]).itemsize
+            if path.exists(fileName) and path.getsize(fileName) > size:
+                os.truncate(fileName, size)
+
+    def append(self, observations):
+    # Add parsed observations (with "station" & "observed"); returns the number of new rows
+        byStation = {}
+        for observation in observations:
+            byStation.setdefault(observation["station"], []).append(observation)
+        added = 0
+        for station, group in byStation.items():
+            added += self._appendstation(station, group)
+        return added
+
+    def _appendstation(self, station, group):
+        new = {column: np.array([_value(o[field]) for o in group] if column != "minutes"
+                                else _minutes([o[field] for o in group]), dtype)
+               for column, (dtype, field) in columns.items()}
+        order = np.argsort(new["minutes"], kind="stable")
+        new = {column: values[order] for column, values in new.items()}
+        # one row per time -- the last observation given for a time wins
+        keep = np.append(new["minutes"][1:] != new["minutes"][:-1], True)
+        new = {column: values[keep] for column, values in new.items()}
+
+        os.makedirs(path.join(self.directory, station), exist_ok=True)
+        with self.lock(station):
+            self._recover(station)
+            return self._merge(station, new)
+
+    def _merge(self, station, new):
+        existing = self.column(station, "minutes")
+        latest = existing[-1] if len(existing) else np.iinfo(np.int64).min
+        later = new["minutes"] > latest
+        # the minutes column is sorted, so archived times are found by binary search
+        found = np.searchsorted(existing, new["minutes"]).clip(0, max(len(existing) - 1, 0))
+        earlier = ~later & ((existing[found] != new["minutes"]) if len(existing) else True)
+        if earlier.any():
+            # back-filled observations: merge & rewrite this station's columns
+            merged = {column: np.concatenate([np.asarray(self.column(station, column)), values[earlier | later]])
+                      for column, values in new.items()}
+            order = np.argsort(merged["minutes"], kind="stable")
+            for column in writeOrder:
+                merged[column][order].tofile(self.filename(station, column) + ".tmp")
+            with open(self._pendingname(station), 'w'):
+                pass
+            for column in writeOrder:
+                os.replace(self.filename(station, column) + ".tmp", self.filename(station, column))
+            os.remove(self._pendingname(station))
+            return int((earlier | later).sum())
+        for column in writeOrder:
+            with open(self.filename(station, column), 'ab') as columnFile:
+                columnFile.write(new[column][later].tobytes())
+        return int(later.sum())
+#
+def _asminutes(value):
+    return tominutes(value) if isinstance(value, str) else int(value)
+#
+def ingest(archive, fileNames, chunkSize=100000, errors=None):
+# Append every observation in text archives (see economizer.replay) a chunk at a time
+    added = 0
+    for fileName in fileNames:
+        chunk = []
+        for observation in archiveobservations(fileName, errors):
+            chunk.append(observation)
+            if len(chunk) >= chunkSize:
+                added += archive.append(chunk)
+                chunk = []
+        added += archive.append(chunk)
+    return added
+#
+def replaycolumns(archive, zone, stations=None, start=None, end=None, maxGapHours=maxGapHours, table=None,
+                  stationIndex=None):
+# economizer.replay totals per station from the columnar archive -- no report is re-parsed, and only
+# the requested stations & time range are read
+    table = table if table is not None else loadtable()
+    stationIndex = stationIndex if stationIndex is not None else loadstations()
+    accumulator = _Accumulator(maxGapHours)
+    for station in (archive.stations() if stations is None else stations):
+        rows = archive.query(station, start, end, ("minutes", "temperatureC", "dewPointC", "windSpeedKnots", "windDir",
+                                                   "altimeterInHg"))
+        if not len(rows["minutes"]):
+            continue
+        speeds = rows["windSpeedKnots"].astype(float)
+        dirs = rows["windDir"].astype(float)
+        _, _, _, Q, mode = evaluatearrays(fahrenheit(rows["temperatureC"]), fahrenheit(rows["dewPointC"]),
+                                          speeds, dirs, zone, table,
+                                          stationpressure(rows["altimeterInHg"], stationIndex.elevation(station)))
+        accumulator.add(accumulator.index([station] * len(Q)), np.asarray(rows["minutes"]),
+                        Q, mode == "cooling", mode == "out of range")
+    return accumulator.finish()
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.obsarchive",
+                                     description="Columnar, memory-mapped observation archive")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingestParser = commands.add_parser("ingest", help="append text archives (IEM CSV or station/cycle records)")
+    ingestParser.add_argument("directory")
+    ingestParser.add_argument("archives", nargs="+")
+    queryParser = commands.add_parser("query", help="write a station's observations in a time range as CSV")
+    queryParser.add_argument("directory")
+    queryParser.add_argument("station")
+    queryParser.add_argument("--start", default=None, help="first date/time (UTC), e.g. 2020-06-01")
+    queryParser.add_argument("--end", default=None, help="date/time (UTC) to stop before, e.g. 2020-09-01")
+    replayParser = commands.add_parser("replay", help="economizer hours & BTU totals (see economizer.replay)")
+    replayParser.add_argument("directory")
+    replayParser.add_argument("--station", action="append", default=None, help="station to replay (repeatable; default all)")
+    replayParser.add_argument("--start", default=None, help="first date/time (UTC)")
+    replayParser.add_argument("--end", default=None, help="date/time (UTC) to stop before")
+    replayParser.add_argument("--indoor-temp", type=float, default=72.0, help="indoor dry bulb temperature (deg F)")
+    replayParser.add_argument("--indoor-rh", type=float, default=50.0, help="indoor relative humidity (%%)")
+    replayParser.add_argument("--window-width", type=float, default=30.0, help="window opening width (inches)")
+    replayParser.add_argument("--window-height", type=float, default=20.0, help="window opening height (inches)")
+    replayParser.add_argument("--quantity", type=int, default=1, help="quantity of window openings")
+    replayParser.add_argument("--window-dir", type=float, default=180.0, help="window compass direction (degrees)")
+    replayParser.add_argument("--max-gap", type=float, default=maxGapHours, help="longest hours one observation represents")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        archive = ObservationArchive(args.directory)
+        errors = []
+        added = ingest(archive, args.archives, errors=errors)
+        print(f" *** {added} observations added ({len(archive.stations())} stations)")
+        if errors:
+            print(f" *** {len(errors)} reports could not be parsed")
+        return 0
+    archive = ObservationArchive(args.directory, create=False)
+    if args.command == "replay":
+        zone = Zone("", None, args.indoor_temp, args.indoor_rh, args.window_width, args.window_height,
+                    args.quantity, args.window_dir)
+        stations = [s.upper() for s in args.station] if args.station else None
+        totals = replaycolumns(archive, zone, stations, args.start, args.end, args.max_gap)
+        print(f"{'Station':<8}{'From':>18}{'To':>18}{'Obs':>8}{'Hours':>9}{'Econ hrs':>10}"
+              f"{'Free cooling BTU':>18}{'Heating penalty BTU':>21}")
+        for t in sorted(totals.values()):
+            print(f"{t.station:<8}{t.first:>18}{t.last:>18}{t.observations:>8}{t.hours:>9.0f}{t.economizerHours:>10.0f}"
+                  f"{t.coolingBtu:>18,.0f}{t.heatingBtu:>21,.0f}")
+        return 0
+    result = archive.query(args.station.upper(), args.start, args.end)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    writer.writerow(["observed"] + list(columns)[1:])
+    for row in zip(result["minutes"].astype("datetime64[m]"), *(result[c] for c in list(columns)[1:])):
+        writer.writerow([str(row[0]).replace("T", " ")] + [None if v != v else round(float(v), 2) for v in row[1:]])
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
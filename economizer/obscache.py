@@ -0,0 +1,188 @@
+# Persistent on-disk observation cache
+#
+# Station observations are issued roughly hourly, so there is no reason to download & parse the same
+# report on every launch or menu retry.  Each cache entry holds the raw observation file, the time it
+# was fetched and its parsed fields, stored as one JSON file per station & source:
+#
+#     <cache directory>/KSBY.stations.json
+#
+# Entries expire after a fixed TTL or, by default, at the next expected METAR issuance.  Files are
+# written to a temporary name & renamed into place so readers in other processes never see a partial
+# entry, and fetches for the same station are serialized with an advisory lock (where the platform
+# provides one) so several processes don't all download the same file at once.
+#
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from os import path
+
+try:
+    import fcntl
+except ImportError:  # Windows -- rely on atomic renames alone
+    fcntl = None
+
+from economizer import fetch, metar, metrics
+#
+issuanceMinute = 56     # routine METARs are issued shortly before the top of the hour (UTC)
+issuanceLag = 5 * 60    # seconds for a new report to appear on the server after issuance
+#
+sources = {
+    "stations": (fetch.rooturl, metar.parseraw),
+    "decoded": (fetch.decodedurl, metar.parsedecoded),
+}
+#
+Observation = namedtuple("Observation", ["station", "source", "raw", "parsed", "fetched", "cached"])
+#
+def defaultdirectory():
+# $ECONOMIZER_CACHE_DIR, else the user's cache directory
+    if os.environ.get("ECONOMIZER_CACHE_DIR"):
+        return os.environ["ECONOMIZER_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or path.join(path.expanduser("~"), ".cache")
+    return path.join(base, "economizer")
+#
+def nextissuance(t, minute=issuanceMinute, lag=issuanceLag):
+# Epoch time at which the next routine METAR after time t should be available on the server
+    hourStart = t - t % 3600
+    available = hourStart + minute * 60 + lag
+    while available <= t:
+        available += 3600
+    return available
+#
+class ObservationCache:
+# Station observations cached on disk with TTL or METAR-cycle expiry
+    def __init__(self, directory=None, ttl=None):
+        self.directory = directory or defaultdirectory()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def filename(self, station, source="stations"):
+        return path.join(self.directory, f"{fetch.stationcode(station)}.{source}.json")
+
+    def expires(self, fetched):
+        return fetched + self.ttl if self.ttl is not None else nextissuance(fetched)
+
+    def get(self, station, source="stations", now=None):
+    # Cached entry as an Observation, or None when missing, expired or unreadable
+        now = time.time() if now is None else now
+        try:
+            with open(self.filename(station, source), 'r', encoding='utf-8') as entryFile:
+                entry = json.load(entryFile)
+        except (OSError, ValueError):
+            self.misses += 1
+            metrics.count("cache_misses")
+            return None
+        if now >= entry["expires"] or (self.ttl is not None and now >= entry["fetched"] + self.ttl):
+            self.misses += 1
+            metrics.count("cache_misses")
+            return None
+        self.hits += 1
+        metrics.count("cache_hits")
+        return Observation(entry["station"], source, entry["raw"].encode("latin-1"), entry["parsed"],
+                           entry["fetched"], True)
+
+    def put(self, station, source, raw, parsed, fetched=None):
+    # Store an entry atomically (write to a temporary file, then rename over the old entry)
+        fetched = time.time() if fetched is None else fetched
+        entry = {
+            "station": fetch.stationcode(station),
+            "source": source,
+            "fetched": fetched,
+            "expires": self.expires(fetched),
+            "raw": raw.decode("latin-1"),
+            "parsed": parsed,
+        }
+        fd, tmpFileName = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as entryFile:
+                json.dump(entry, entryFile)
+            os.replace(tmpFileName, self.filename(station, source))
+        except BaseException:
+            if path.exists(tmpFileName):
+                os.remove(tmpFileName)
+            raise
+        return Observation(entry["station"], source, raw, parsed, fetched, False)
+
+    @contextmanager
+    def lock(self, station, source="stations"):
+    # Advisory lock serializing fetches of one station across processes
+        if fcntl is None:
+            yield
+            return
+        with open(self.filename(station, source) + ".lock", 'a') as lockFile:
+            fcntl.flock(lockFile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockFile, fcntl.LOCK_UN)
+#
+def getobservation(station, source="stations", cache=None, rooturl=None, client=None, timeout=fetch.defaultTimeout,
+                   deadline=None, alternates=(), rooturls=None):
+# Current observation for a station: served from the cache when fresh (no network, no re-parsing),
+# otherwise fetched, parsed & cached.  Raises OSError when the file cannot be retrieved and
+# ValueError when it cannot be parsed.  With a deadline (seconds), the whole retrieval must finish in
+# time and alternates -- (station, source) pairs to try as well when the first request is slow or
+# fails -- are hedged against it (fetch.fetchhedged); the Observation names whichever answered.
+    defaultRoot, parse = sources[source]
+    if cache is not None:
+        observation = cache.get(station, source)
+        if observation is not None:
+            return observation
+    with (cache.lock(station, source) if cache is not None else _nolock()):
+        if cache is not None:
+            # Another process may have refreshed the entry while we waited for the lock
+            observation = cache.get(station, source)
+            if observation is not None:
+                return observation
+        if deadline is not None:
+            roots = {s: url for s, (url, _) in sources.items()}
+            roots.update(rooturls or {})
+            if rooturl:
+                roots[source] = rooturl
+            return _gethedged(station, source, cache, roots, client, deadline, alternates)
+        result = fetch.fetchstation(station, rooturl or defaultRoot, timeout, client)
+        if result.error:
+            raise OSError(f"WEATHER OBSERVATION FILE [{result.station}] NOT RETRIEVED: {result.error}")
+        try:
+            with metrics.span("parse" if source == "stations" else "decode"):
+                parsed = parse(result.data)
+        except ValueError:
+            metrics.count("parse_failures")
+            raise
+        if cache is None:
+            return Observation(result.station, source, result.data, parsed, time.time(), False)
+        return cache.put(station, source, result.data, parsed)
+#
+def alternatesources(station, source="stations", stationIndex=None, neighbors=1):
+# (station, source) pairs carrying the same or the nearest observation: the station in the other
+# NOAA directory, then the nearest listed stations (from a StationIndex) in this one
+    station = fetch.stationcode(station)
+    pairs = [(station, other) for other in sources if other != source]
+    if stationIndex is not None and neighbors:
+        pairs += [(neighbor, source) for neighbor in stationIndex.neighbors(station, neighbors)]
+    return pairs
+#
+def _gethedged(station, source, cache, roots, client, deadline, alternates):
+    candidates = [(fetch.stationcode(station), source)] + [(fetch.stationcode(s), src) for s, src in alternates]
+    result = fetch.fetchhedged([roots[src] + fetch.stationfile(code) for code, src in candidates], deadline,
+                               parse=[_parser(src) for _, src in candidates], client=client)
+    if result.error:
+        raise OSError(f"WEATHER OBSERVATION FILE [{candidates[0][0]}] NOT RETRIEVED: {result.error}")
+    code, src = candidates[result.index]
+    if cache is None:
+        return Observation(code, src, result.data, result.value, time.time(), False)
+    return cache.put(code, src, result.data, result.value)
+#
+def _parser(source):
+    def parse(data):
+        with metrics.span("parse" if source == "stations" else "decode"):
+            return sources[source][1](data)
+    return parse
+#
+@contextmanager
+def _nolock():
+    yield
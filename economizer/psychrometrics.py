@@ -0,0 +1,108 @@
+# Vectorized psychrometric engine
+#
+# Specific enthalpy of moist air in Imperial units:
+#
+# h = (0.240 Btu/lb F) t + x [(0.444 Btu/lb F) t + (1061 Btu/lb)]
+#
+# where
+#
+# h = enthalpy (Btu/lb)
+# x = mass of water vapor (lb/lb of dry air)
+# t = temperature (F)
+#
+# Every function in this module accepts scalars or NumPy arrays (of broadcast-compatible shapes)
+# so that hundreds of zones can be evaluated against dozens of stations in a single call.
+#
+# Humidity ratios are at standard pressure unless a pressure (psia) is given -- stationpressure()
+# gives it from a METAR altimeter setting.
+#
+from collections import namedtuple
+
+import numpy as np
+
+from economizer.sattable import loadtable, standardPressure
+#
+# Specific heat of dry air, specific heat of water vapor & evaporation heat of water
+cpAir = 0.240       # BTU/lb F
+cpVapor = 0.444     # BTU/lb F
+hEvap = 1061        # BTU/lb
+#
+grainsPerLb = 7000  # convert from gr/LB to LB/LB
+#
+# Wind speed conversion (knots to feet per minute) &
+# conversion factor: lb/hr to CFM = 60 min/hr * 0.075 lb/ft^3 = 4.5
+fpmPerKnot = 101.27
+cfmFactor = 4.5
+#
+Evaluation = namedtuple("Evaluation", [
+    "outdoorHumidityRatio", "outdoorEnthalpy",
+    "indoorHumidityRatio", "indoorEnthalpy",
+    "massFlowRate", "Q",
+])
+#
+inHgToPsi = 0.4911541
+#
+def stationpressure(altimeterInHg, elevationFt=0.0):
+# Station pressure (psia) from altimeter settings (inHg; None or NaN for standard pressure) at a field
+# elevation (ft) -- the altimeter setting itself is taken as the pressure at elevation 0
+    altimeter = np.array(altimeterInHg, dtype=float)
+    elevationM = np.asarray(elevationFt, dtype=float) * 0.3048
+    pressure = altimeter * inHgToPsi * ((288 - 0.0065 * elevationM) / 288) ** 5.2561
+    return np.where(np.isnan(pressure), standardPressure, pressure)
+#
+def saturation(dbTemp, table=None, pressure=None):
+# Saturated humidity ratio (gr/LB) for each dry bulb temperature (deg F)
+    return (table if table is not None else loadtable()).lookup(dbTemp, pressure)
+#
+def humidityratio(dbTemp, rh=None, dewPoint=None, table=None, pressure=None):
+# Humidity ratio (lb/lb of dry air) from dry bulb temperature (deg F) and either
+# relative humidity (0-1) or dew point (deg F)
+    if dewPoint is not None:
+        # rh = sat(dewPoint) / sat(dbTemp), so x = sat(dbTemp) * rh = sat(dewPoint)
+        x = saturation(dewPoint, table, pressure) * np.ones_like(np.asarray(dbTemp, dtype=float))
+    elif rh is not None:
+        x = saturation(dbTemp, table, pressure) * np.asarray(rh, dtype=float)
+    else:
+        raise ValueError("Either relative humidity or dew point is required")
+    return x / grainsPerLb
+#
+def enthalpy(dbTemp, x):
+# Specific enthalpy of moist air (BTU per lb of dry air)
+    t = np.asarray(dbTemp, dtype=float)
+    return (cpAir * t) + x * (cpVapor * t + hEvap)
+#
+def windcosine(windDir, windowDir):
+# Cosine of the offset between wind & window directions (compass degrees), 0 at 90 degrees or more
+#
+# The offset is wrapped onto 0-180 degrees, so wind from 350 degrees striking a window facing
+# 10 degrees is a 20 degree offset.
+    offset = np.abs(np.asarray(windDir, dtype=float) - np.asarray(windowDir, dtype=float)) % 360
+    offset = np.minimum(offset, 360 - offset)
+    return np.where(offset < 90, np.cos(np.radians(offset)), 0.0)
+#
+def airflow(windSpeedKnots, windDir, windowDir, windowArea):
+# Air flow through window openings (lb/hr) from outdoor wind speed & direction
+# relative to window opening direction (compass degrees) & area (sqft).  Wind more than
+# 90 degrees off the window's direction produces no air flow.
+    cosine = windcosine(windDir, windowDir)
+    windSpeedFpm = np.asarray(windSpeedKnots, dtype=float) * fpmPerKnot
+    return windSpeedFpm * cosine * np.asarray(windowArea, dtype=float) / cfmFactor
+#
+def heatflow(massFlowRate, indoorEnthalpy, outdoorEnthalpy):
+# Q = m(h2-h1) in BTU/hr -- negative values of Q are heating BTUs/hr
+    return massFlowRate * (indoorEnthalpy - outdoorEnthalpy)
+#
+def evaluate(outdoorDBTemp, indoorDBTemp, indoorRh, windSpeedKnots, windDir, windowDir, windowArea,
+             outdoorRh=None, outdoorDewPoint=None, table=None, pressure=None):
+# Evaluate economizer heat flow for arrays of outdoor & indoor conditions in a single call
+#
+# Relative humidities are fractions (0-1); temperatures & dew points are deg F; pressure (psia,
+# indoors & out) defaults to standard.  Outdoor moisture may be given as either relative humidity
+# or dew point.
+    outdoorX = humidityratio(outdoorDBTemp, rh=outdoorRh, dewPoint=outdoorDewPoint, table=table, pressure=pressure)
+    outdoorH = enthalpy(outdoorDBTemp, outdoorX)
+    indoorX = humidityratio(indoorDBTemp, rh=indoorRh, table=table, pressure=pressure)
+    indoorH = enthalpy(indoorDBTemp, indoorX)
+    massFlowRate = airflow(windSpeedKnots, windDir, windowDir, windowArea)
+    Q = heatflow(massFlowRate, indoorH, outdoorH)
+    return Evaluation(outdoorX, outdoorH, indoorX, indoorH, massFlowRate, Q)
@@ -0,0 +1,180 @@
+# Historical replay & annual economizer-hours simulation
+#
+# Replays archived METAR observations through the same enthalpy & window air flow calculations as the
+# interactive evaluator and totals, per station:
+#
+#     economizer hours     hours in which opening the windows would have provided cooling
+#     free cooling (BTU)   heat removed during those hours
+#     heating penalty (BTU) heat that open windows would have added during the other hours
+#
+# Each observation stands for the time until the station's next observation (at most maxGapHours, so
+# gaps in the archive are not counted), which weights special (SPECI) reports correctly.
+#
+# Archives are read a chunk of records at a time, and each chunk is parsed & evaluated with one
+# vectorized call.  Two archive layouts are accepted:
+#
+#   * CSV with "valid" (YYYY-MM-DD HH:MM UTC) and "metar" columns, as downloaded from the Iowa
+#     Environmental Mesonet ASOS archive (station,valid,metar)
+#   * Station or cycle file records: a "YYYY/MM/DD HH:MM" line followed by the report, blank line separated
+#
+# Usage: python -m economizer.replay ARCHIVE [ARCHIVE ...] [--indoor-temp 72] [--indoor-rh 50] ...
+#
+import argparse
+import csv
+import io
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from economizer import cycles, metrics
+from economizer.decision import Zone, evaluatearrays, observationarrays, observationpressures
+from economizer.metar import parseraw
+from economizer.sattable import loadtable
+#
+chunkSize = 8192        # records parsed & evaluated per vectorized call
+maxGapHours = 1.0       # longest time one observation is taken to represent
+#
+Totals = namedtuple("Totals", ["station", "observations", "hours", "economizerHours", "coolingBtu",
+                               "heatingBtu", "outOfRangeHours", "first", "last"])
+#
+def archiveobservations(fileName, errors=None):
+# Parsed observations (with "observed" set) from one archive file
+    with open(fileName, 'rb') as archive:
+        firstLine = archive.readline()
+        archive.seek(0)
+        if b"metar" in firstLine.lower() and b"," in firstLine:
+            reader = csv.DictReader(io.TextIOWrapper(archive, encoding="latin-1", newline=""))
+            for row in reader:
+                try:
+                    observation = parseraw(row["metar"].encode("latin-1"))
+                except ValueError as e:
+                    metrics.count("parse_failures")
+                    if errors is not None:
+                        errors.append(str(e))
+                    continue
+                observation["observed"] = row["valid"]
+                yield observation
+        else:
+            yield from cycles.observations(archive, errors)
+#
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+#
+def _minutes(observed):
+# Observation times as minutes since the epoch ("2021/06/15 12:53" or "2021-06-15 12:53")
+    stamps = [o.replace("/", "-").replace(" ", "T")[:16] for o in observed]
+    return np.array(stamps, dtype="datetime64[m]").astype(np.int64)
+#
+class _Accumulator:
+# Running per-station totals; the last observation of each station waits for the next chunk to learn
+# how long it lasted
+    def __init__(self, maxGap):
+        self.maxGap = maxGap * 60
+        self.stations = {}
+        self.totals = np.zeros((0, 6))   # observations, hours, econ hours, cooling BTU, heating BTU, out of range
+        self.first = np.zeros(0, dtype=np.int64)
+        self.last = np.zeros(0, dtype=np.int64)
+        self.carry = None
+
+    def index(self, stations):
+        for station in set(stations):
+            if station not in self.stations:
+                self.stations[station] = len(self.stations)
+        grow = len(self.stations) - len(self.first)
+        if grow:
+            self.totals = np.vstack([self.totals, np.zeros((grow, 6))])
+            self.first = np.concatenate([self.first, np.full(grow, np.iinfo(np.int64).max)])
+            self.last = np.concatenate([self.last, np.full(grow, np.iinfo(np.int64).min)])
+        return np.fromiter((self.stations[s] for s in stations), np.int64, len(stations))
+
+    def add(self, stationIdx, minutes, Q, cooling, outOfRange):
+        if self.carry is not None:
+            stationIdx, minutes, Q, cooling, outOfRange = (
+                np.concatenate([c, a]) for c, a in zip(self.carry, (stationIdx, minutes, Q, cooling, outOfRange)))
+        order = np.lexsort((minutes, stationIdx))
+        stationIdx, minutes, Q, cooling, outOfRange = (a[order] for a in (stationIdx, minutes, Q, cooling, outOfRange))
+        lastOfStation = np.append(stationIdx[1:] != stationIdx[:-1], True)
+        self.carry = tuple(a[lastOfStation] for a in (stationIdx, minutes, Q, cooling, outOfRange))
+        done = ~lastOfStation
+        gaps = np.minimum(np.diff(minutes, append=minutes[-1]), self.maxGap)[done] / 60
+        self._total(stationIdx[done], minutes[done], gaps, Q[done], cooling[done], outOfRange[done])
+
+    def _total(self, stationIdx, minutes, hours, Q, cooling, outOfRange):
+        size = len(self.stations)
+        Qh = np.nan_to_num(Q) * hours
+        self.totals[:, 0] += np.bincount(stationIdx, minlength=size)
+        self.totals[:, 1] += np.bincount(stationIdx, hours, minlength=size)
+        self.totals[:, 2] += np.bincount(stationIdx, hours * cooling, minlength=size)
+        self.totals[:, 3] += np.bincount(stationIdx, np.where(cooling, Qh, 0.0), minlength=size)
+        self.totals[:, 4] += np.bincount(stationIdx, np.where(Qh < 0, -Qh, 0.0), minlength=size)
+        self.totals[:, 5] += np.bincount(stationIdx, hours * outOfRange, minlength=size)
+        np.minimum.at(self.first, stationIdx, minutes)
+        np.maximum.at(self.last, stationIdx, minutes)
+
+    def finish(self):
+    # The final observation of each station is taken to last maxGapHours
+        if self.carry is not None:
+            stationIdx, minutes, Q, cooling, outOfRange = self.carry
+            self._total(stationIdx, minutes, np.full(len(stationIdx), self.maxGap / 60), Q, cooling, outOfRange)
+            self.carry = None
+        results = {}
+        for station, i in self.stations.items():
+            t = self.totals[i]
+            results[station] = Totals(station, int(t[0]), *(float(v) for v in t[1:]),
+                                      str(np.datetime64(int(self.first[i]), "m")),
+                                      str(np.datetime64(int(self.last[i]), "m")))
+        return results
+#
+def replay(fileNames, zone, chunkSize=chunkSize, maxGapHours=maxGapHours, errors=None, table=None):
+# Totals per station for every observation in the archive files
+    table = table if table is not None else loadtable()
+    accumulator = _Accumulator(maxGapHours)
+    for fileName in ([fileNames] if isinstance(fileNames, str) else fileNames):
+        chunks = _chunks(archiveobservations(fileName, errors), chunkSize)
+        while True:
+            with metrics.span("parse"):     # reading & parsing the next chunk
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            outdoorT, dewPoint, speeds, dirs = observationarrays(chunk)
+            _, _, _, Q, mode = evaluatearrays(outdoorT, dewPoint, speeds, dirs, zone, table, observationpressures(chunk))
+            accumulator.add(accumulator.index([o["station"] for o in chunk]), _minutes([o["observed"] for o in chunk]),
+                            Q, mode == "cooling", mode == "out of range")
+    return accumulator.finish()
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.replay",
+                                     description="Replay archived METAR observations through the economizer evaluation")
+    parser.add_argument("archives", nargs="+", help="archive files (IEM CSV or station/cycle file records)")
+    parser.add_argument("--indoor-temp", type=float, default=72.0, help="indoor dry bulb temperature (deg F)")
+    parser.add_argument("--indoor-rh", type=float, default=50.0, help="indoor relative humidity (%%)")
+    parser.add_argument("--window-width", type=float, default=30.0, help="window opening width (inches)")
+    parser.add_argument("--window-height", type=float, default=20.0, help="window opening height (inches)")
+    parser.add_argument("--quantity", type=int, default=1, help="quantity of window openings")
+    parser.add_argument("--window-dir", type=float, default=180.0, help="window compass direction (degrees)")
+    parser.add_argument("--max-gap", type=float, default=maxGapHours, help="longest hours one observation represents")
+    args = parser.parse_args(argv)
+
+    zone = Zone("", None, args.indoor_temp, args.indoor_rh, args.window_width, args.window_height,
+                args.quantity, args.window_dir)
+    errors = []
+    totals = replay(args.archives, zone, maxGapHours=args.max_gap, errors=errors)
+    print(f"{'Station':<8}{'From':>18}{'To':>18}{'Obs':>8}{'Hours':>9}{'Econ hrs':>10}"
+          f"{'Free cooling BTU':>18}{'Heating penalty BTU':>21}")
+    for t in sorted(totals.values()):
+        print(f"{t.station:<8}{t.first:>18}{t.last:>18}{t.observations:>8}{t.hours:>9.0f}{t.economizerHours:>10.0f}"
+              f"{t.coolingBtu:>18,.0f}{t.heatingBtu:>21,.0f}")
+    if errors:
+        print(f"\n *** {len(errors)} reports could not be parsed")
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
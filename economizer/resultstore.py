@@ -0,0 +1,319 @@
+# SQLite store of evaluation results
+#
+# Every decision (economizer.decision.Decision) written by the batch or daemon runs (--store) can be kept in a
+# local SQLite database as well as being written out:
+#
+#     results (zone, station, observed, outdoor_temp_f, outdoor_dew_point_f, outdoor_enthalpy,
+#              indoor_enthalpy, mass_flow_lb_hr, q_btu_hr, mode, hours)
+#
+# observed is minutes since 1970-01-01 UTC.  hours is the time the result stands for -- until the zone's
+# next observation, at most maxGapHours (as in economizer.replay) -- so totals such as "hours of free
+# cooling per station last month" are plain sums: (station, zone, observed) is unique and (observed) is
+# indexed, and the same totals are kept per station, zone & UTC day in
+#
+#     daily (station, zone, day, observations, hours, economizer_hours, cooling_btu, heating_btu,
+#            out_of_range_hours, first, last)
+#
+# indexed by (station, zone, day) & (day).  A summary reads the whole days of its range from daily and
+# only the partial days at either end from results, so a month of many stations is a few thousand rows.
+#
+# The database is opened in WAL mode and results are buffered and inserted a batch per transaction, so
+# bulk runs don't pay a commit (and fsync) per row and readers are never blocked by the writer.  One
+# process should write to a database at a time; a zone's first result for an observation time is kept
+# (zones are identified by station & name).
+#
+# Usage: python -m economizer.resultstore results.db summary [--start 2021-06-01] [--end 2021-07-01] [--station KSBY]
+#        python -m economizer.resultstore results.db query STATION [--start ...] [--end ...] [--format csv|jsonl]
+#
+import argparse
+import sqlite3
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from economizer.decision import Decision
+from economizer.obsarchive import tominutes
+from economizer.replay import _minutes, maxGapHours
+#
+schemaVersion = 1
+defaultBatchSize = 5000     # results inserted per transaction
+minutesPerDay = 24 * 60
+#
+schema = """
+CREATE TABLE IF NOT EXISTS results (
+    zone TEXT NOT NULL,
+    station TEXT NOT NULL,
+    observed INTEGER NOT NULL,
+    outdoor_temp_f REAL,
+    outdoor_dew_point_f REAL,
+    outdoor_enthalpy REAL,
+    indoor_enthalpy REAL,
+    mass_flow_lb_hr REAL,
+    q_btu_hr REAL,
+    mode TEXT NOT NULL,
+    hours REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS results_station ON results (station, zone, observed);
+CREATE INDEX IF NOT EXISTS results_observed ON results (observed);
+CREATE TABLE IF NOT EXISTS daily (
+    station TEXT NOT NULL,
+    zone TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    observations INTEGER NOT NULL,
+    hours REAL NOT NULL,
+    economizer_hours REAL NOT NULL,
+    cooling_btu REAL NOT NULL,
+    heating_btu REAL NOT NULL,
+    out_of_range_hours REAL NOT NULL,
+    first INTEGER NOT NULL,
+    last INTEGER NOT NULL,
+    PRIMARY KEY (station, zone, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS daily_day ON daily (day);
+"""
+#
+_insert = "INSERT OR IGNORE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+_sethours = "UPDATE results SET hours = ? WHERE station = ? AND zone = ? AND observed = ?"
+_rollup = ("INSERT INTO daily VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (station, zone, day) DO UPDATE SET"
+           " observations = observations + excluded.observations, hours = hours + excluded.hours,"
+           " economizer_hours = economizer_hours + excluded.economizer_hours,"
+           " cooling_btu = cooling_btu + excluded.cooling_btu, heating_btu = heating_btu + excluded.heating_btu,"
+           " out_of_range_hours = out_of_range_hours + excluded.out_of_range_hours,"
+           " first = min(first, excluded.first), last = max(last, excluded.last)")
+_totals = ("count(*), total(hours), total(CASE WHEN mode = 'cooling' THEN hours END),"
+           " total(CASE WHEN mode = 'cooling' THEN q_btu_hr * hours END),"
+           " total(CASE WHEN q_btu_hr < 0 THEN -q_btu_hr * hours END),"
+           " total(CASE WHEN mode = 'out of range' THEN hours END), min(observed), max(observed)")
+_dailyTotals = ("sum(observations), total(hours), total(economizer_hours), total(cooling_btu), total(heating_btu),"
+                " total(out_of_range_hours), min(first), max(last)")
+#
+Summary = namedtuple("Summary", ["zone", "station", "observations", "hours", "economizerHours", "coolingBtu",
+                                 "heatingBtu", "outOfRangeHours", "first", "last"])
+#
+def _text(minutes):
+    return str(np.datetime64(int(minutes), "m")).replace("-", "/").replace("T", " ")
+#
+def _value(value):
+    return None if value is None or value != value else value    # NaN is stored as NULL
+#
+class ResultStore:
+# Batched writer & indexed queries over one SQLite results database
+    def __init__(self, fileName, batchSize=defaultBatchSize, maxGapHours=maxGapHours):
+        self.fileName = fileName
+        self.batchSize = batchSize
+        self.maxGap = int(round(maxGapHours * 60))
+        self.connection = sqlite3.connect(fileName)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")     # durable at each WAL checkpoint
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, schemaVersion):
+            raise ValueError(f"{fileName}: results schema version {version}, expected {schemaVersion}")
+        with self.connection:
+            self.connection.executescript(schema)
+            self.connection.execute(f"PRAGMA user_version = {schemaVersion}")
+        self.pending = []
+        self.latest = {}        # (station, zone) -> (observed, mode, Q, hours) of the latest result stored
+        self.written = 0
+
+    def add(self, decisions):
+    # Buffer decisions (those without an observation are skipped), writing a batch whenever one is full
+        for d in decisions:
+            if d.observed is not None and d.mode != "no observation":
+                self.pending.append(d)
+                if len(self.pending) >= self.batchSize:
+                    self.flush()
+
+    def stored(self, decisions):
+    # Pass decisions through unchanged, adding each to the store (to write & store them in one pass)
+        for d in decisions:
+            self.add([d])
+            yield d
+
+    def _latest(self, key):
+        if key not in self.latest:
+            self.latest[key] = self._row("SELECT observed, mode, q_btu_hr, hours FROM results"
+                                         " WHERE station = ? AND zone = ? ORDER BY observed DESC LIMIT 1", key)
+        return self.latest[key]
+
+    def _row(self, query, parameters):
+        row = self.connection.execute(query, parameters).fetchone()
+        return row and (row[0], row[1], float("nan") if row[2] is None else row[2], row[3])
+
+    def flush(self):
+    # Write the buffered decisions & their daily totals in one transaction.  Each result stands for
+    # maxGapHours until the zone's next result arrives, which then shortens it to the gap between them.
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        minutes = _minutes([d.observed for d in pending]).tolist()
+        order = sorted(range(len(pending)), key=lambda i: (pending[i].station, pending[i].zone, minutes[i]))
+        rows, updates, late = [], [], []
+        days = {}               # (station, zone, day) -> totals added by this batch
+        for i in order:
+            d, observed = pending[i], minutes[i]
+            key = (d.station, d.zone)
+            latest = self._latest(key)
+            if latest is not None and observed <= latest[0]:
+                if observed < latest[0]:
+                    late.append((d, observed))      # older than the zone's latest result
+                continue
+            if latest is not None:
+                gap = min(observed - latest[0], self.maxGap) / 60
+                updates.append((gap, d.station, d.zone, latest[0]))
+                self._total(days, key, latest[0], latest[1], latest[2], gap - latest[3], 0)
+            hours = self.maxGap / 60
+            rows.append(self._values(d, observed, hours))
+            self._total(days, key, observed, d.mode, d.Q, hours, 1)
+            self.latest[key] = (observed, d.mode, d.Q, hours)
+        with self.connection:
+            self.connection.executemany(_insert, rows)
+            self.connection.executemany(_sethours, updates)
+            written = len(rows) + sum(self._insertlate(d, observed, days) for d, observed in late)
+            self.connection.executemany(_rollup, [(*key, *totals) for key, totals in days.items()])
+        self.written += written
+        return written
+
+    def _values(self, d, observed, hours):
+        return (d.zone, d.station, observed, _value(d.outdoorDBTemp), _value(d.outdoorDewPoint),
+                _value(d.outdoorEnthalpy), _value(d.indoorEnthalpy), _value(d.massFlowRate), _value(d.Q), d.mode, hours)
+
+    def _total(self, days, key, observed, mode, Q, hours, count):
+    # Add one result's share (or a change of its hours, with count 0) to its day's totals
+        totals = days.get((*key, observed // minutesPerDay))
+        if totals is None:
+            totals = days[(*key, observed // minutesPerDay)] = [0, 0.0, 0.0, 0.0, 0.0, 0.0, observed, observed]
+        totals[0] += count
+        totals[1] += hours
+        if mode == "cooling":
+            totals[2] += hours
+            totals[3] += Q * hours
+        elif mode == "out of range":
+            totals[5] += hours
+        if Q < 0:
+            totals[4] -= Q * hours
+        totals[6] = min(totals[6], observed)
+        totals[7] = max(totals[7], observed)
+
+    def _insertlate(self, d, observed, days):
+    # Insert a result between two stored ones (or before the first), fixing the hours of the one before
+        key = (d.station, d.zone)
+        after = self.connection.execute(
+            "SELECT min(observed) FROM results WHERE station = ? AND zone = ? AND observed > ?",
+            (*key, observed)).fetchone()[0]
+        hours = min(after - observed, self.maxGap) / 60
+        if not self.connection.execute(_insert, self._values(d, observed, hours)).rowcount:
+            return 0
+        self._total(days, key, observed, d.mode, d.Q, hours, 1)
+        before = self._row("SELECT observed, mode, q_btu_hr, hours FROM results"
+                           " WHERE station = ? AND zone = ? AND observed < ? ORDER BY observed DESC LIMIT 1",
+                           (*key, observed))
+        if before is not None:
+            gap = min(observed - before[0], self.maxGap) / 60
+            self.connection.execute(_sethours, (gap, *key, before[0]))
+            self._total(days, key, before[0], before[1], before[2], gap - before[3], 0)
+        return 1
+
+    def _where(self, column, start, end, stations, zone):
+        clauses, parameters = [], []
+        if stations:
+            clauses.append(f"station IN ({', '.join('?' * len(stations))})")
+            parameters += stations
+        if zone is not None:
+            clauses.append("zone = ?")
+            parameters.append(zone)
+        if start is not None:
+            clauses.append(f"{column} >= ?")
+            parameters.append(start)
+        if end is not None:
+            clauses.append(f"{column} < ?")
+            parameters.append(end)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), parameters
+
+    def summary(self, start=None, end=None, stations=None, zone=None):
+    # Summary (economizer hours, free cooling & heating penalty BTU as in economizer.replay) of each
+    # zone & station for results observed from start up to end (UTC date/time text, e.g. 2021-06-01)
+        self.flush()
+        start = tominutes(start) if start is not None else None
+        end = tominutes(end) if end is not None else None
+        firstDay = None if start is None else -(-start // minutesPerDay)
+        endDay = None if end is None else end // minutesPerDay
+        parts = []
+        if firstDay is None or endDay is None or firstDay < endDay:
+            # whole days from the daily totals, the rest of the range from the results themselves
+            parts.append(("daily", _dailyTotals, "day", firstDay, endDay))
+            if start is not None and start < firstDay * minutesPerDay:
+                parts.append(("results", _totals, "observed", start, firstDay * minutesPerDay))
+            if end is not None and endDay * minutesPerDay < end:
+                parts.append(("results", _totals, "observed", endDay * minutesPerDay, end))
+        else:
+            parts.append(("results", _totals, "observed", start, end))
+        combined = {}
+        for table, totals, column, low, high in parts:
+            where, parameters = self._where(column, low, high, stations, zone)
+            for row in self.connection.execute(f"SELECT station, zone, {totals} FROM {table}{where}"
+                                               " GROUP BY station, zone", parameters):
+                previous = combined.get(row[:2])
+                if previous is None:
+                    combined[row[:2]] = list(row[2:])
+                else:
+                    combined[row[:2]] = [a + b for a, b in zip(previous[:6], row[2:8])] + [
+                        min(previous[6], row[8]), max(previous[7], row[9])]
+        return [Summary(zone, station, *totals[:6], _text(totals[6]), _text(totals[7]))
+                for (station, zone), totals in sorted(combined.items())]
+
+    def results(self, station=None, start=None, end=None, zone=None):
+    # Stored results as Decisions, in time order
+        self.flush()
+        where, parameters = self._where("observed", tominutes(start) if start is not None else None,
+                                        tominutes(end) if end is not None else None,
+                                        [station.upper()] if station else None, zone)
+        for row in self.connection.execute(
+                "SELECT zone, station, observed, outdoor_temp_f, outdoor_dew_point_f, outdoor_enthalpy,"
+                f" indoor_enthalpy, mass_flow_lb_hr, q_btu_hr, mode FROM results{where} ORDER BY observed, station, zone",
+                parameters):
+            yield Decision(row[0], row[1], _text(row[2]),
+                           *(float("nan") if v is None else v for v in row[3:9]), row[9])
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.resultstore",
+                                     description="Query a SQLite database of evaluation results")
+    parser.add_argument("database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summaryParser = commands.add_parser("summary", help="economizer hours & BTU totals per station & zone")
+    summaryParser.add_argument("--station", action="append", default=None, help="station (repeatable; default all)")
+    summaryParser.add_argument("--zone", default=None, help="only this zone")
+    queryParser = commands.add_parser("query", help="write a station's results as CSV or JSON lines")
+    queryParser.add_argument("station")
+    queryParser.add_argument("--zone", default=None, help="only this zone")
+    queryParser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="results format")
+    for commandParser in (summaryParser, queryParser):
+        commandParser.add_argument("--start", default=None, help="first date/time (UTC), e.g. 2021-06-01")
+        commandParser.add_argument("--end", default=None, help="date/time (UTC) to stop before, e.g. 2021-07-01")
+    args = parser.parse_args(argv)
+
+    from economizer.batch import writeresults   # batch imports this module
+    with ResultStore(args.database) as store:
+        if args.command == "query":
+            writeresults(store.results(args.station, args.start, args.end, args.zone), sys.stdout, args.format)
+            return 0
+        stations = [s.upper() for s in args.station] if args.station else None
+        print(f"{'Station':<8}{'Zone':<16}{'From':>18}{'To':>18}{'Obs':>8}{'Hours':>9}{'Econ hrs':>10}"
+              f"{'Free cooling BTU':>18}{'Heating penalty BTU':>21}")
+        for s in store.summary(args.start, args.end, stations, args.zone):
+            print(f"{s.station:<8}{s.zone:<16}{s.first:>18}{s.last:>18}{s.observations:>8}{s.hours:>9.0f}"
+                  f"{s.economizerHours:>10.0f}{s.coolingBtu:>18,.0f}{s.heatingBtu:>21,.0f}")
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
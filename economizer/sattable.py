@@ -0,0 +1,172 @@
+# Saturated humidity ratio table
+#
+# The humidityratio.csv lookup table lists the saturated humidity ratio (grains per pound of dry air)
+# for whole-degree dry bulb temperatures.  It is held here as a contiguous float array indexed by
+# offset from the first temperature, and looked up with linear interpolation so fractional
+# temperatures no longer need to be rounded to a whole degree.
+#
+# Parsing the CSV is skipped on later runs: the array is cached as a precompiled .npy file next to
+# the CSV and reloaded from there as long as it is newer than the CSV.
+#
+# The default table is not read from the CSV at all: it is generated from the Hyland-Wexler saturation
+# pressure of water vapor over ice & liquid water (as given in the ASHRAE Handbook of Fundamentals) every
+# 0.1 deg F from -40 to 120 deg F at standard pressure, and cached as humidityratio-generated.npy.  Any
+# table can be looked up at another (station) pressure: the tabulated humidity ratio is converted back
+# to the saturation pressure it came from and then to the humidity ratio at the given pressure.
+#
+import csv
+import os
+from os import path
+
+import numpy as np
+#
+defaultTableFileName = path.join(path.dirname(path.dirname(path.abspath(__file__))), "humidityratio.csv")
+generatedCacheFileName = path.join(path.dirname(path.dirname(path.abspath(__file__))), "humidityratio-generated.npy")
+#
+# Generated table range & resolution (deg F)
+generatedFirstTemp = -40.0
+generatedLastTemp = 120.0
+generatedStep = 0.1
+#
+standardPressure = 14.696   # psia
+molarRatio = 0.621945       # molecular weight ratio of water vapor to dry air
+enhancementFactor = 1.004   # moist air vs. pure water vapor saturation pressure (as in the ASHRAE tables)
+grainsPerLb = 7000
+#
+# Hyland-Wexler coefficients for ln(pws) = C1/T + C2 + C3 T + C4 T^2 + C5 T^3 + C6 T^4 + C7 ln(T)
+# (T in deg R, pws in psia) over ice (below 32 deg F) & over liquid water
+iceCoefficients = (-1.0214165e4, -4.8932428, -5.3765794e-3, 1.9202377e-7, 3.5575832e-10, -9.0344688e-14,
+                   4.1635019)
+waterCoefficients = (-1.0440397e4, -1.1294650e1, -2.7022355e-2, 1.2890360e-5, -2.4780681e-9, 0.0, 6.5459673)
+#
+_tables = {}
+#
+class SatTable:
+# Saturated humidity ratio (gr/LB) at firstTemp, firstTemp + step, firstTemp + 2*step, ... deg F
+    __slots__ = ("firstTemp", "step", "values")
+
+    def __init__(self, firstTemp, step, values):
+        self.firstTemp = float(firstTemp)
+        self.step = float(step)
+        self.values = np.ascontiguousarray(values, dtype=float)
+
+    @property
+    def lastTemp(self):
+        return self.firstTemp + self.step * (self.values.size - 1)
+
+    def lookup(self, dbTemp, pressure=None):
+    # Saturated humidity ratio (gr/LB) for each dry bulb temperature (deg F), linearly interpolated;
+    # at standard pressure unless a pressure (psia) is given
+        pos = (np.asarray(dbTemp, dtype=float) - self.firstTemp) / self.step
+        if pos.size and (np.nanmin(pos) < 0 or np.nanmax(pos) > self.values.size - 1):
+            raise ValueError(f"Temperature outside of lookup table range "
+                             f"({self.firstTemp:g} - {self.lastTemp:g} deg F)")
+        idx = np.minimum(pos.astype(np.intp), self.values.size - 2)
+        frac = pos - idx
+        lower = self.values[idx]
+        ratio = lower + frac * (self.values[idx + 1] - lower)
+        return ratio if pressure is None else atpressure(ratio, pressure)
+
+    def tobinary(self):
+    # Header (firstTemp, step) followed by the table values, as stored in the .npy cache
+        return np.concatenate(([self.firstTemp, self.step], self.values))
+
+    @classmethod
+    def frombinary(cls, data):
+        return cls(data[0], data[1], data[2:])
+#
+def saturationpressure(dbTemp):
+# Saturation pressure of water vapor (psia) over ice below 32 deg F & over liquid water above
+    t = np.asarray(dbTemp, dtype=float) + 459.67
+    lnT = np.log(t)
+    def pressure(c):
+        return np.exp(c[0] / t + c[1] + t * (c[2] + t * (c[3] + t * (c[4] + t * c[5]))) + c[6] * lnT)
+    return np.where(t < 491.67, pressure(iceCoefficients), pressure(waterCoefficients))
+#
+def saturationratio(dbTemp, pressure=standardPressure):
+# Saturated humidity ratio (gr/LB) at each dry bulb temperature (deg F) & pressure (psia)
+    pws = enhancementFactor * saturationpressure(dbTemp)
+    return grainsPerLb * molarRatio * pws / (pressure - pws)
+#
+def atpressure(ratio, pressure):
+# Saturated humidity ratios (gr/LB) tabulated at standard pressure, at another pressure (psia)
+    x = np.asarray(ratio, dtype=float) / grainsPerLb
+    pws = standardPressure * x / (molarRatio + x)
+    return grainsPerLb * molarRatio * pws / (np.asarray(pressure, dtype=float) - pws)
+#
+def generatetable(firstTemp=generatedFirstTemp, lastTemp=generatedLastTemp, step=generatedStep):
+# SatTable computed from first principles every step deg F at standard pressure
+    temps = firstTemp + step * np.arange(round((lastTemp - firstTemp) / step) + 1)
+    return SatTable(firstTemp, step, saturationratio(temps))
+#
+def cachefilename(fileName):
+    return path.splitext(fileName)[0] + ".npy"
+#
+def readcsv(fileName):
+# Parse the humidityratio CSV formatted lookup table into a SatTable
+    temps = []
+    ratios = []
+    with open(fileName, 'r', newline='', encoding='utf-8-sig') as lookupTable:
+        reader = csv.reader(lookupTable)
+        next(reader)  # skip header row
+        for rows in reader:
+            temps.append(float(rows[0]))
+            ratios.append(float(rows[1]))
+    step = temps[1] - temps[0]
+    if not np.allclose(np.diff(temps), step):
+        raise ValueError(f"{fileName}: temperatures must be evenly spaced")
+    return SatTable(temps[0], step, ratios)
+#
+def loadtable(fileName=None, useCache=True):
+# Load (and memoize) the saturated humidity ratio table, preferring the precompiled binary cache;
+# the generated table unless a CSV table file is given
+    if fileName in _tables:
+        return _tables[fileName]
+    if fileName is None:
+        _tables[None] = loadgenerated(useCache)
+        return _tables[None]
+    cacheFileName = cachefilename(fileName)
+    table = None
+    if useCache and path.exists(cacheFileName) and path.getmtime(cacheFileName) >= path.getmtime(fileName):
+        try:
+            table = SatTable.frombinary(np.load(cacheFileName))
+        except (OSError, ValueError):
+            table = None  # Unreadable cache -- fall back to the CSV
+    if table is None:
+        table = readcsv(fileName)
+        if useCache:
+            writecache(table, cacheFileName)
+    _tables[fileName] = table
+    return table
+#
+def settable(table, fileName=None):
+# Make table the one loadtable(fileName) returns (e.g. a table passed to a worker process, so the
+# worker never reads or generates its own)
+    _tables[fileName] = table
+#
+def loadgenerated(useCache=True):
+# The generated table, from its binary cache when that matches the generated range & resolution
+    size = round((generatedLastTemp - generatedFirstTemp) / generatedStep) + 1
+    if useCache and path.exists(generatedCacheFileName):
+        try:
+            table = SatTable.frombinary(np.load(generatedCacheFileName))
+            if (table.firstTemp, table.step, table.values.size) == (generatedFirstTemp, generatedStep, size):
+                return table
+        except (OSError, ValueError):
+            pass    # Unreadable cache -- generate again
+    table = generatetable()
+    if useCache:
+        writecache(table, generatedCacheFileName)
+    return table
+#
+def writecache(table, cacheFileName):
+# Write the binary cache atomically so concurrent readers never see a partial file
+    tmpFileName = f"{cacheFileName}.{os.getpid()}.tmp"
+    try:
+        with open(tmpFileName, 'wb') as cacheFile:
+            np.save(cacheFile, table.tobinary())
+        os.replace(tmpFileName, cacheFileName)
+    except OSError:
+        # Read-only install location -- run without the cache
+        if path.exists(tmpFileName):
+            os.remove(tmpFileName)
@@ -0,0 +1,206 @@
+# Nearest weather station lookup
+#
+# stations.csv lists reporting stations with their coordinates & field elevation:
+#
+#     icao,name,latitude,longitude,elevation_ft
+#     KSBY,"Wicomico Regional Airport, Salisbury, MD",38.3405,-75.5103,52
+#
+# (any file with those columns can be used -- thousands of stations are handled the same way).  The
+# elevation (StationIndex.elevation()) gives the station pressure from a METAR altimeter setting.
+# StationIndex buckets the stations in a grid of cellDegrees latitude/longitude cells, held as one
+# sorted array of station numbers & an array of cell offsets.  A k-nearest query gathers the stations of
+# the cells around each query point and widens the block (doubling its size) only for the points whose
+# k-th nearest station could still lie outside it, so whole arrays of building coordinates are answered
+# together; single points are answered the same way in plain Python.  Distances are great-circle
+# statute miles.
+#
+# Usage: python -m economizer.stationindex LATITUDE LONGITUDE [-k 3] [--stations stations.csv]
+#
+import argparse
+import csv
+import math
+import sys
+from os import path
+
+import numpy as np
+#
+defaultStationsFileName = path.join(path.dirname(path.dirname(path.abspath(__file__))), "stations.csv")
+earthRadiusMiles = 3958.8
+defaultCellDegrees = 1.0
+bruteForceBlock = 1 << 22   # distances computed per block when searching all stations
+#
+_indexes = {}
+#
+def unitvectors(latitudes, longitudes):
+# (n, 3) points on the unit sphere -- chord length between them orders them by great-circle distance
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+#
+def chordmiles(squaredChord):
+    return 2 * np.arcsin(np.minimum(np.sqrt(np.maximum(squaredChord, 0.0)) / 2, 1.0)) * earthRadiusMiles
+#
+class StationIndex:
+# Grid-bucketed station coordinates answering k-nearest queries for arrays of points
+    def __init__(self, codes, latitudes, longitudes, elevations=None, names=None, cellDegrees=defaultCellDegrees):
+        self.codes = np.asarray(codes, dtype=object)
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.longitudes = np.asarray(longitudes, dtype=float)
+        self.elevations = np.zeros(len(self.codes)) if elevations is None else np.asarray(elevations, dtype=float)
+        self.names = np.asarray(names if names is not None else [""] * len(self.codes), dtype=object)
+        if np.any(np.abs(self.latitudes) > 90) or np.any(np.abs(self.longitudes) > 180):
+            raise ValueError("Station coordinates out of range")
+        self.cellDegrees = float(cellDegrees)
+        self.rows = int(np.ceil(180 / self.cellDegrees))
+        self.cols = int(np.ceil(360 / self.cellDegrees))
+        self.vectors = unitvectors(self.latitudes, self.longitudes)
+        row, col = self._cells(self.latitudes, self.longitudes)
+        cell = row * self.cols + col
+        self.order = np.argsort(cell, kind="stable").astype(np.int32)
+        self.starts = np.searchsorted(cell[self.order], np.arange(self.rows * self.cols + 1)).astype(np.int32)
+        self.positions = {code: i for i, code in enumerate(self.codes)}
+        self._points = None     # station vectors as tuples, for single point lookups
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _cells(self, latitudes, longitudes):
+        row = np.minimum(((latitudes + 90) // self.cellDegrees).astype(np.intp), self.rows - 1)
+        col = ((longitudes + 180) // self.cellDegrees).astype(np.intp) % self.cols
+        return row, col
+
+    def nearest(self, latitudes, longitudes, k=1):
+    # (station numbers, miles) arrays of shape (points, k), nearest first, for arrays of coordinates
+        lat = np.atleast_1d(np.asarray(latitudes, dtype=float))
+        lon = np.atleast_1d(np.asarray(longitudes, dtype=float))
+        k = min(k, len(self.codes))
+        found = np.full((len(lat), k), -1, dtype=np.intp)
+        chords = np.full((len(lat), k), np.inf)
+        if k == 0:
+            return found, chords
+        points = unitvectors(lat, lon)
+        row, col = self._cells(lat, lon)
+        pending = np.arange(len(lat))
+        radius = 1
+        while pending.size and 2 * radius + 1 < self.cols and radius * self.cellDegrees < 45:
+            count = self._gather(pending, points, row, col, radius, k, found, chords)
+            # Anything outside the block is at least radius cells of latitude away, and beyond the
+            # meridians radius cells east & west of the point
+            margin = np.radians(radius * self.cellDegrees)
+            safe = np.minimum(margin, np.arcsin(np.cos(np.radians(lat[pending])) * np.sin(margin)))
+            done = (count >= k) & (chords[pending, k - 1] <= (2 * np.sin(safe / 2)) ** 2)
+            pending = pending[~done]
+            radius *= 2
+        for start in range(0, len(pending), max(1, bruteForceBlock // len(self.codes))):
+            block = pending[start:start + max(1, bruteForceBlock // len(self.codes))]
+            distances = 2 - 2 * points[block] @ self.vectors.T     # squared chord lengths
+            best = np.argpartition(distances, k - 1, axis=1)[:, :k] if k < len(self.codes) else \
+                np.broadcast_to(np.arange(len(self.codes)), distances.shape)
+            ranked = np.take_along_axis(best, np.argsort(np.take_along_axis(distances, best, 1), 1), 1)
+            found[block] = ranked
+            chords[block] = np.take_along_axis(distances, ranked, 1)
+        return found, chordmiles(chords)
+
+    def _gather(self, pending, points, row, col, radius, k, found, chords):
+    # Fill found & chords (as squared chord lengths) for the pending points from the stations in the block of
+    # cells within radius of each point's cell; returns the number of stations in each block
+        offsets = np.arange(-radius, radius + 1)
+        rows = row[pending, None] + np.repeat(offsets, len(offsets))[None, :]
+        cols = (col[pending, None] + np.tile(offsets, len(offsets))[None, :]) % self.cols
+        inside = (rows >= 0) & (rows < self.rows)
+        cells = np.where(inside, rows * self.cols + cols, 0)
+        first = self.starts[cells]
+        lengths = np.where(inside, self.starts[cells + 1] - first, 0).ravel()
+        count = lengths.reshape(len(pending), -1).sum(axis=1)
+        # station numbers of every (point, cell) range, flattened
+        total = int(lengths.sum())
+        owner = np.repeat(np.arange(len(lengths)) // rows.shape[1], lengths)
+        within = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        candidates = self.order[np.repeat(first.ravel(), lengths) + within]
+        difference = self.vectors[candidates] - points[pending[owner]]
+        distances = np.einsum("ij,ij->i", difference, difference)
+        ranking = np.argsort(owner * 8.0 + distances)      # by point, then distance (squared chords are < 4)
+        owner, candidates, distances = owner[ranking], candidates[ranking], distances[ranking]
+        rank = np.arange(total) - np.searchsorted(owner, owner)
+        keep = rank < k
+        found[pending[owner[keep]], rank[keep]] = candidates[keep]
+        chords[pending[owner[keep]], rank[keep]] = distances[keep]
+        return count
+
+    def lookup(self, latitude, longitude, k=1):
+    # [(station code, miles), ...] nearest first for one point
+        if self._points is None:
+            self._points = [tuple(v) for v in self.vectors.tolist()]
+        lat, lon = math.radians(latitude), math.radians(longitude)
+        x, y, z = math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)
+        row = min(int((latitude + 90) // self.cellDegrees), self.rows - 1)
+        col = int((longitude + 180) // self.cellDegrees) % self.cols
+        radius = 1
+        while 2 * radius + 1 < self.cols and radius * self.cellDegrees < 45:
+            ranked = []
+            for r in range(max(row - radius, 0), min(row + radius + 1, self.rows)):
+                for c in range(col - radius, col + radius + 1):
+                    cell = r * self.cols + c % self.cols
+                    for i in self.order[self.starts[cell]:self.starts[cell + 1]].tolist():
+                        px, py, pz = self._points[i]
+                        ranked.append(((px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2, i))
+            ranked.sort()
+            margin = math.radians(radius * self.cellDegrees)
+            safe = min(margin, math.asin(math.cos(lat) * math.sin(margin)))
+            if len(ranked) >= k and (k == 0 or ranked[k - 1][0] <= (2 * math.sin(safe / 2)) ** 2):
+                return [(self.codes[i], float(chordmiles(d))) for d, i in ranked[:k]]
+            radius *= 2
+        found, miles = self.nearest(latitude, longitude, k)
+        return [(self.codes[i], float(m)) for i, m in zip(found[0], miles[0]) if i >= 0]
+
+    def elevation(self, code, default=0.0):
+    # Field elevation (ft) of a listed station, or default for one that isn't listed
+        i = self.positions.get(code)
+        return default if i is None else float(self.elevations[i])
+
+    def neighbors(self, code, k=1):
+    # Codes of the k stations nearest to a listed station (excluding itself), nearest first
+        i = self.positions.get(code)
+        if i is None:
+            return []
+        found, _ = self.nearest(self.latitudes[i], self.longitudes[i], k + 1)
+        return [self.codes[j] for j in found[0] if j >= 0 and j != i][:k]
+#
+def readstations(fileName, cellDegrees=defaultCellDegrees):
+# StationIndex of a stations CSV file (icao, latitude, longitude, optional elevation_ft & name)
+    codes, latitudes, longitudes, elevations, names = [], [], [], [], []
+    with open(fileName, 'r', newline='', encoding='utf-8-sig') as stationsFile:
+        for lineNumber, record in enumerate(csv.DictReader(stationsFile), 2):
+            try:
+                latitudes.append(float(record["latitude"]))
+                longitudes.append(float(record["longitude"]))
+                elevations.append(float(record.get("elevation_ft") or 0))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{fileName}: line {lineNumber}: invalid station coordinates") from None
+            codes.append(record["icao"].strip().upper())
+            names.append(record.get("name") or "")
+    return StationIndex(codes, latitudes, longitudes, elevations, names, cellDegrees)
+#
+def loadstations(fileName=defaultStationsFileName):
+# Load (and memoize) a station index
+    if fileName not in _indexes:
+        _indexes[fileName] = readstations(fileName)
+    return _indexes[fileName]
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.stationindex",
+                                     description="Nearest weather reporting stations to a location")
+    parser.add_argument("latitude", type=float)
+    parser.add_argument("longitude", type=float)
+    parser.add_argument("-k", type=int, default=3, help="number of stations")
+    parser.add_argument("--stations", default=defaultStationsFileName, help="station metadata CSV file")
+    args = parser.parse_args(argv)
+
+    index = loadstations(args.stations)
+    for code, miles in index.lookup(args.latitude, args.longitude, args.k):
+        i = index.positions[code]
+        print(f"{code:<6}{miles:8.1f} mi  {index.elevations[i]:6.0f} ft  {index.names[i]}")
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# Window orientation & opening size sweep
+#
+# For retrofit design: replays a year (or any span) of archived observations against every window
+# orientation (0-359 degrees by default) and a grid of opening widths, heights & quantities, and ranks
+# the combinations by net free cooling -- free cooling BTU less heating penalty BTU, totalled as in
+# economizer.replay (each observation standing for the time until the station's next one).
+#
+# Air flow is wind speed x cos(wind/window offset) x opening area, so for a fixed orientation every
+# total is proportional to the opening area.  The sweep therefore reduces the observations to per-sqft
+# totals for each orientation with one matrix product (observations x orientations, a block of
+# observations at a time), then scales them by the grid of areas -- millions of combinations in well
+# under a second instead of one scalar evaluation per combination per observation.  Offsets wrap
+# around north (wind 350 degrees on a window facing 10 degrees is a 20 degree offset).
+#
+# Usage: python -m economizer.sweep ARCHIVE [ARCHIVE ...] [--station KSBY] [--indoor-temp 72]
+#            [--widths 20:60:4] [--heights 1:30:1] [--quantities 1:9] [--step 1] [--top 20]
+#
+import argparse
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+from economizer import psychrometrics
+from economizer.decision import Zone, evaluatearrays, observationarrays, observationpressures
+from economizer.replay import _minutes, archiveobservations, maxGapHours
+from economizer.sattable import loadtable
+#
+blockSize = 4096        # observations per orientation matrix block
+#
+Design = namedtuple("Design", ["station", "windowDir", "windowWidthInches", "windowHeightInches", "windowQuantity",
+                               "windowArea", "economizerHours", "coolingBtu", "heatingBtu", "netBtu"])
+#
+StationSweep = namedtuple("StationSweep", ["station", "hours", "orientations", "economizerHours",
+                                           "coolingPerSqft", "heatingPerSqft"])
+#
+def hoursrepresented(stations, minutes, maxGapHours=maxGapHours):
+# Hours each observation stands for: the time until the same station's next observation, at most
+# maxGapHours (the last observation of each station is taken to last maxGapHours)
+    order = np.lexsort((minutes, stations))
+    sortedStations, sortedMinutes = stations[order], minutes[order]
+    gaps = np.diff(sortedMinutes, append=sortedMinutes[-1] if len(sortedMinutes) else 0).astype(float)
+    last = np.append(sortedStations[1:] != sortedStations[:-1], True)
+    gaps[last] = maxGapHours * 60
+    hours = np.empty(len(order))
+    hours[order] = np.minimum(gaps, maxGapHours * 60) / 60
+    return hours
+#
+def orientationtotals(speeds, dirs, deltaH, hours, orientations):
+# Per-sqft cooling & heating BTU and economizer hours for each orientation.  deltaH is indoor less
+# outdoor enthalpy; NaN deltaH (conditions outside the table) & VRB (NaN) directions contribute nothing.
+    use = ~np.isnan(deltaH) & ~np.isnan(dirs) & (speeds > 0)
+    speeds, dirs, deltaH, hours = speeds[use], dirs[use], deltaH[use], hours[use]
+    # lb/hr per sqft of opening per unit cosine, weighted by the hours each observation represents
+    flow = speeds * psychrometrics.fpmPerKnot / psychrometrics.cfmFactor * hours
+    coolingWeight = flow * np.maximum(deltaH, 0.0)
+    heatingWeight = flow * np.maximum(-deltaH, 0.0)
+    hoursWeight = hours * (deltaH >= 0)
+    cooling = np.zeros(len(orientations))
+    heating = np.zeros(len(orientations))
+    economizerHours = np.zeros(len(orientations))
+    for start in range(0, len(speeds), blockSize):
+        block = slice(start, start + blockSize)
+        cosine = psychrometrics.windcosine(dirs[block, None], orientations[None, :])
+        cooling += coolingWeight[block] @ cosine
+        heating += heatingWeight[block] @ cosine
+        economizerHours += hoursWeight[block] @ (cosine > 0)
+    return cooling, heating, economizerHours
+#
+def sweepstations(fileNames, zone, orientations=np.arange(360.0), stations=None, maxGapHours=maxGapHours,
+                  errors=None, table=None):
+# StationSweep (per-sqft totals for every orientation) for each station in the archive files
+    table = table if table is not None else loadtable()
+    observations = []
+    for fileName in ([fileNames] if isinstance(fileNames, str) else fileNames):
+        for observation in archiveobservations(fileName, errors):
+            if stations is None or observation["station"] in stations:
+                observations.append(observation)
+    if not observations:
+        return {}
+    outdoorT, dewPoint, speeds, dirs = observationarrays(observations)
+    outdoorH, indoorH, _, _, _ = evaluatearrays(outdoorT, dewPoint, speeds, dirs, zone, table,
+                                                observationpressures(observations))
+    deltaH = indoorH - outdoorH
+    names = np.array([o["station"] for o in observations])
+    codes, stationIdx = np.unique(names, return_inverse=True)
+    hours = hoursrepresented(stationIdx, _minutes([o["observed"] for o in observations]), maxGapHours)
+    orientations = np.asarray(orientations, dtype=float)
+    results = {}
+    for i, code in enumerate(codes):
+        mine = stationIdx == i
+        cooling, heating, economizerHours = orientationtotals(speeds[mine], dirs[mine], deltaH[mine], hours[mine],
+                                                              orientations)
+        results[str(code)] = StationSweep(str(code), float(hours[mine].sum()), orientations, economizerHours,
+                                          cooling, heating)
+    return results
+#
+def rank(result, widths, heights, quantities, top=20):
+# The top designs (orientation x width x height x quantity) of one StationSweep by net free cooling
+    widths, heights, quantities = (np.asarray(v, dtype=float) for v in (widths, heights, quantities))
+    w, h, q = (a.ravel() for a in np.meshgrid(widths, heights, quantities, indexing="ij"))
+    areas = w / 12 * h / 12 * q
+    net = np.outer(result.coolingPerSqft - result.heatingPerSqft, areas)
+    top = min(top, net.size)
+    best = np.argpartition(net.ravel(), net.size - top)[-top:]
+    best = best[np.argsort(net.ravel()[best])[::-1]]
+    designs = []
+    for flat in best:
+        o, a = divmod(int(flat), len(areas))
+        designs.append(Design(result.station, float(result.orientations[o]), float(w[a]), float(h[a]), int(q[a]),
+                              float(areas[a]), float(result.economizerHours[o]),
+                              float(result.coolingPerSqft[o] * areas[a]), float(result.heatingPerSqft[o] * areas[a]),
+                              float(net.ravel()[flat])))
+    return designs
+#
+def orientationranking(result, top=5):
+# (orientation, net BTU per sqft of opening, economizer hours) for the best orientations of a StationSweep
+    net = result.coolingPerSqft - result.heatingPerSqft
+    best = np.argsort(net)[::-1][:top]
+    return [(float(result.orientations[o]), float(net[o]), float(result.economizerHours[o])) for o in best]
+#
+def gridvalues(text):
+# "20:60:4" -> 20, 24, ... 60 (inclusive); "30" -> 30; "20,30,40" -> 20, 30, 40
+    if ":" in text:
+        parts = [float(p) for p in text.split(":")]
+        start, stop, step = parts[0], parts[1], parts[2] if len(parts) > 2 else 1.0
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(p) for p in text.split(",")])
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.sweep",
+                                     description="Rank window orientations & opening sizes by net free cooling")
+    parser.add_argument("archives", nargs="+", help="archive files (IEM CSV or station/cycle file records)")
+    parser.add_argument("--station", action="append", help="only these stations (repeatable)")
+    parser.add_argument("--indoor-temp", type=float, default=72.0, help="indoor dry bulb temperature (deg F)")
+    parser.add_argument("--indoor-rh", type=float, default=50.0, help="indoor relative humidity (%%)")
+    parser.add_argument("--widths", type=gridvalues, default="20:60:4", help="opening widths, inches (start:stop:step)")
+    parser.add_argument("--heights", type=gridvalues, default="1:30:1", help="opening heights, inches")
+    parser.add_argument("--quantities", type=gridvalues, default="1:9", help="quantities of openings")
+    parser.add_argument("--step", type=float, default=1.0, help="orientation step (degrees)")
+    parser.add_argument("--top", type=int, default=20, help="designs listed per station")
+    parser.add_argument("--max-gap", type=float, default=maxGapHours, help="longest hours one observation represents")
+    args = parser.parse_args(argv)
+
+    zone = Zone("", None, args.indoor_temp, args.indoor_rh)
+    errors = []
+    orientations = np.arange(0.0, 360.0, args.step)
+    results = sweepstations(args.archives, zone, orientations, set(args.station) if args.station else None,
+                            args.max_gap, errors)
+    combinations = len(orientations) * len(args.widths) * len(args.heights) * len(args.quantities)
+    for station, result in sorted(results.items()):
+        print(f"\n *** {station}: {result.hours:,.0f} hours, {combinations:,} combinations\n")
+        print(f"{'Dir':>5}{'Width':>7}{'Height':>8}{'Qty':>5}{'Sqft':>8}{'Econ hrs':>10}"
+              f"{'Free cooling BTU':>18}{'Heating penalty BTU':>21}{'Net BTU':>16}")
+        for d in rank(result, args.widths, args.heights, args.quantities, args.top):
+            print(f"{d.windowDir:>5.0f}{d.windowWidthInches:>7.0f}{d.windowHeightInches:>8.0f}{d.windowQuantity:>5}"
+                  f"{d.windowArea:>8.1f}{d.economizerHours:>10.0f}{d.coolingBtu:>18,.0f}{d.heatingBtu:>21,.0f}"
+                  f"{d.netBtu:>16,.0f}")
+        print(f"\n{'Dir':>5}{'Net BTU per sqft':>18}{'Econ hrs':>10}")
+        for windowDir, netPerSqft, economizerHours in orientationranking(result):
+            print(f"{windowDir:>5.0f}{netPerSqft:>18,.0f}{economizerHours:>10.0f}")
+    if errors:
+        print(f"\n *** {len(errors)} reports could not be parsed")
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())
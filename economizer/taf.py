@@ -0,0 +1,247 @@
+# Forecast horizon evaluation from TAF forecasts
+#
+# parsetaf() reads the terminal aerodrome forecast files served from forecasts/taf/stations/:
+#
+#     2021/06/15 11:38
+#     TAF KSBY 151138Z 1512/1612 21006KT P6SM SKC
+#           FM151600 22012G20KT P6SM FEW050
+#           FM160000 19005KT P6SM SKC TX31/1519Z TN19/1610Z
+#
+# into the forecast's prevailing wind changes -- the initial conditions, FM groups (from their time) and
+# BECMG groups (complete by the end of their period; TEMPO & PROB groups are not prevailing conditions and
+# are skipped) -- and any TX/TN maximum & minimum temperature groups.
+#
+# A TAF has no hourly temperature or moisture, so hourly() builds the series from what is known: the
+# temperature follows a half-cosine between the station's current observation and the TX/TN groups (and
+# holds at the last known value beyond them), while the dew point & altimeter setting persist from the
+# current observation.  schedule() then evaluates every zone against every forecast hour of its station in
+# one vectorized call, giving an hour by hour economizer schedule as parallel columns.
+#
+# Usage: python -m economizer.taf TAFDIR --observations STATIONDIR [--zones zones.csv] [--hours 30]
+#
+import argparse
+import csv
+import glob
+import re
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta
+from os import path
+
+import numpy as np
+
+from economizer import metrics
+from economizer.batch import _round, readzones
+from economizer.decision import Zone, evaluatearrays, fahrenheit
+from economizer.metar import knotsPerMps, parseraw
+from economizer.psychrometrics import stationpressure
+from economizer.sattable import loadtable
+from economizer.stationindex import loadstations
+#
+defaultHours = 30       # forecast hours evaluated (a TAF covers 24 or 30)
+#
+_header = re.compile(r"\s*(?:(?P<date>\d{4}/\d\d/\d\d)\s+\d\d:\d\d\s+)?TAF(?:\s+(?:AMD|COR))*\s+"
+                     r"(?P<station>[A-Z][A-Z0-9]{3})\s+(?P<issued>\d{6})Z\s+(?P<valid>\d{4}/\d{4})\s")
+_wind = re.compile(r"(?P<dir>\d{3}|VRB)(?P<speed>\d{2,3})(?:G(?P<gust>\d{2,3}))?(?P<unit>KT|MPS)")
+_extreme = re.compile(r"T(?P<kind>[XN])(?P<m>M)?(?P<t>\d\d)/(?P<ddhh>\d{4})Z")
+#
+# One row per zone & forecast hour (times as minutes since the epoch; mode "no forecast" where the
+# temperature or dew point is unknown)
+Schedule = namedtuple("Schedule", ["zone", "station", "time", "outdoorDBTemp", "outdoorDewPoint", "windDir",
+                                   "windSpeedKnots", "Q", "mode"])
+#
+def tominutes(when):
+# datetime (or "YYYY/MM/DD HH:MM" text) as minutes since the epoch
+    if isinstance(when, str):
+        return int(np.datetime64(when.replace("/", "-").replace(" ", "T")[:16], "m").astype(np.int64))
+    return int(np.datetime64(when.replace(tzinfo=None), "m").astype(np.int64))
+#
+def _resolve(day, hour, minute, reference):
+# Day of month/hour/minute nearest after (or just before) reference, crossing month ends as needed
+    when = reference.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if day < reference.day - 15:        # the next month
+        when = (when + timedelta(days=32)).replace(day=1)
+    elif day > reference.day + 15:      # the previous month
+        when = (when - timedelta(days=1)).replace(day=1)
+    return tominutes(when + timedelta(days=day - 1, hours=hour, minutes=minute))
+#
+def parsetaf(data, reference=None):
+# Parse a TAF file (bytes or str).  The forecast's month & year are taken from the file's date line or
+# from reference (a datetime).  Returns a dict of plain values, with times as minutes since the epoch:
+#
+#     station, issued, validFrom, validTo,
+#     winds: [[from time, direction (None when VRB), speed knots, gust knots or None], ...]
+#     extremes: [[time, temperature deg C], ...] from TX & TN groups
+    text = data.decode("latin-1") if isinstance(data, (bytes, bytearray, memoryview)) else data
+    m = _header.match(text)
+    if m is None:
+        raise ValueError(f"Invalid forecast data [{' '.join(text.split()[:4])}] (no TAF header)")
+    station = m.group("station")
+    if m.group("date"):
+        reference = datetime.strptime(m.group("date"), "%Y/%m/%d")
+    elif reference is None:
+        raise ValueError(f"Invalid forecast data [{station}] (no date)")
+    issuedText = m.group("issued")
+    issued = _resolve(int(issuedText[:2]), int(issuedText[2:4]), int(issuedText[4:]), reference)
+    issuedDate = datetime(1970, 1, 1) + timedelta(minutes=issued)
+
+    def ddhh(group):
+        return _resolve(int(group[:2]), int(group[2:4]), 0, issuedDate)
+
+    fromGroup, toGroup = m.group("valid").split("/")
+    validFrom, validTo = ddhh(fromGroup), ddhh(toGroup)
+    winds = []
+    extremes = []
+    start = validFrom       # time the wind group being read takes effect (None inside TEMPO/PROB)
+    tokens = text[m.end():].split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if token.startswith("FM") and len(token) == 8 and token[2:].isdigit():
+            start = _resolve(int(token[2:4]), int(token[4:6]), int(token[6:8]), issuedDate)
+        elif token == "BECMG" and i < len(tokens) and "/" in tokens[i]:
+            start = ddhh(tokens[i].split("/")[1])
+            i += 1
+        elif token == "TEMPO" or token.startswith("PROB"):
+            start = None
+        elif (w := _wind.fullmatch(token)) is not None:
+            if start is not None:
+                scale = knotsPerMps if w.group("unit") == "MPS" else 1.0
+                gust = w.group("gust")
+                winds.append([start, None if w.group("dir") == "VRB" else float(w.group("dir")),
+                              round(int(w.group("speed")) * scale, 1), round(int(gust) * scale, 1) if gust else None])
+                start = None
+        elif (x := _extreme.fullmatch(token)) is not None:
+            extremes.append([ddhh(x.group("ddhh")), -float(x.group("t")) if x.group("m") else float(x.group("t"))])
+    if not winds or winds[0][0] != validFrom:
+        raise ValueError(f"Invalid forecast data [{station}] (no initial wind)")
+    winds.sort(key=lambda w: w[0])
+    return {"station": station, "issued": issued, "validFrom": validFrom, "validTo": validTo,
+            "winds": winds, "extremes": sorted(extremes)}
+#
+def hourly(taf, observation=None, hours=defaultHours):
+# Hourly forecast arrays (time minutes, temperature deg F, dew point deg F, wind speed knots, wind
+# direction with NaN for VRB, altimeter inHg) from the first whole hour of the forecast period; values
+# that cannot be known (no observation & no TX/TN) are NaN
+    first = -(-taf["validFrom"] // 60) * 60
+    times = np.arange(first, min(taf["validTo"], first + hours * 60), 60, dtype=np.int64)
+    winds = taf["winds"]
+    change = np.searchsorted(np.array([w[0] for w in winds]), times, "right") - 1
+    speeds = np.array([w[2] for w in winds], dtype=float)[change]
+    dirs = np.array([np.nan if w[1] is None else w[1] for w in winds], dtype=float)[change]
+
+    anchors = list(taf["extremes"])
+    if observation is not None and observation.get("observed"):
+        anchors.append([tominutes(observation["observed"]), observation["temperatureC"]])
+    anchors.sort()
+    if anchors:
+        anchorTimes = np.array([a[0] for a in anchors], dtype=float)
+        anchorTemps = np.array([a[1] for a in anchors], dtype=float)
+        # half-cosine between consecutive anchors, held beyond the first & last
+        pos = np.interp(times, anchorTimes, np.arange(len(anchors), dtype=float))
+        lower = np.minimum(pos.astype(np.intp), len(anchors) - 1)
+        upper = np.minimum(lower + 1, len(anchors) - 1)
+        ease = (1 - np.cos(np.pi * (pos - lower))) / 2
+        tempsC = anchorTemps[lower] + ease * (anchorTemps[upper] - anchorTemps[lower])
+    else:
+        tempsC = np.full(len(times), np.nan)
+    if observation is not None:
+        dewPointsC = np.minimum(np.full(len(times), observation["dewPointC"]), tempsC)
+        altimeter = np.nan if observation.get("altimeterInHg") is None else observation["altimeterInHg"]
+    else:
+        dewPointsC = np.full(len(times), np.nan)
+        altimeter = np.nan
+    return times, fahrenheit(tempsC), fahrenheit(dewPointsC), speeds, dirs, np.full(len(times), altimeter)
+#
+def schedule(tafs, observations, zones, hours=defaultHours, table=None, stationIndex=None):
+# Schedule columns for every hour of each zone's station forecast, evaluated in one vectorized call.
+# tafs & observations map station -> parsed TAF / METAR; zones without a forecast are skipped.
+    table = table if table is not None else loadtable()
+    stationIndex = stationIndex if stationIndex is not None else loadstations()
+    series = {}
+    for station in {z.station for z in zones}:
+        if station in tafs:
+            series[station] = hourly(tafs[station], observations.get(station), hours)
+    zones = [z for z in zones if z.station in series]
+    if not zones:
+        return Schedule(*(np.empty(0, dtype) for dtype in (object, object, np.int64) + (float,) * 5 + (object,)))
+    counts = np.array([len(series[z.station][0]) for z in zones])
+    times, outdoorT, dewPoint, speeds, dirs, altimeters = (np.concatenate(c) for c in
+                                                           zip(*(series[z.station] for z in zones)))
+    arrays = Zone("", None, *(np.repeat(np.array([getattr(z, f) for z in zones], dtype=float), counts)
+                              for f in Zone._fields[2:]))
+    elevations = np.repeat([stationIndex.elevation(z.station) for z in zones], counts)
+    known = ~(np.isnan(outdoorT) | np.isnan(dewPoint))
+    with metrics.span("forecast"):
+        _, _, _, Q, mode = evaluatearrays(np.where(known, outdoorT, 0.0), np.where(known, dewPoint, 0.0), speeds, dirs,
+                                          arrays, table, stationpressure(altimeters, elevations))
+    mode[~known] = "no forecast"
+    Q = np.where(known, Q, np.nan)
+    names = np.repeat(np.array([z.name for z in zones], dtype=object), counts)
+    stations = np.repeat(np.array([z.station for z in zones], dtype=object), counts)
+    return Schedule(names, stations, times, outdoorT, dewPoint, dirs, speeds, Q, mode)
+#
+def readdirectory(directory, parse, errors=None):
+# {station: parsed} for every .TXT file in a local directory
+    parsed = {}
+    for fileName in sorted(glob.glob(path.join(directory, "*.TXT"))):
+        with open(fileName, 'rb') as dataFile:
+            data = dataFile.read()
+        try:
+            result = parse(data)
+        except ValueError as e:
+            if errors is not None:
+                errors.append(f"{path.basename(fileName)}: {e}")
+            continue
+        parsed[result["station"]] = result
+    return parsed
+#
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m economizer.taf",
+                                     description="Hour by hour economizer schedule from TAF forecasts")
+    parser.add_argument("tafs", help="directory of TAF station files (forecasts/taf/stations/*.TXT)")
+    parser.add_argument("--observations", default=None, help="directory of METAR station files (metar/stations/*.TXT)")
+    parser.add_argument("--zones", default=None, help="CSV or JSON zone file (see economizer.batch); "
+                                                      "default one zone per forecast with the options below")
+    parser.add_argument("--hours", type=int, default=defaultHours, help="forecast hours to evaluate")
+    parser.add_argument("--output", "-o", default="-", help="schedule CSV file (default stdout)")
+    parser.add_argument("--indoor-temp", type=float, default=72.0, help="indoor dry bulb temperature (deg F)")
+    parser.add_argument("--indoor-rh", type=float, default=50.0, help="indoor relative humidity (%%)")
+    parser.add_argument("--window-width", type=float, default=30.0, help="window opening width (inches)")
+    parser.add_argument("--window-height", type=float, default=20.0, help="window opening height (inches)")
+    parser.add_argument("--quantity", type=int, default=1, help="quantity of window openings")
+    parser.add_argument("--window-dir", type=float, default=180.0, help="window compass direction (degrees)")
+    args = parser.parse_args(argv)
+
+    errors = []
+    tafs = readdirectory(args.tafs, parsetaf, errors)
+    observations = readdirectory(args.observations, parseraw, errors) if args.observations else {}
+    if args.zones:
+        zones = list(readzones(args.zones, errors))
+    else:
+        zones = [Zone(station, station, args.indoor_temp, args.indoor_rh, args.window_width, args.window_height,
+                      args.quantity, args.window_dir) for station in tafs]
+    for message in errors:
+        print(f" *** Skipped {message}", file=sys.stderr)
+    result = schedule(tafs, observations, zones, args.hours)
+    output = sys.stdout if args.output == "-" else open(args.output, 'w', newline='')
+    try:
+        writer = csv.writer(output, lineterminator="\n")
+        writer.writerow(["zone", "station", "time", "outdoor_temp", "dew_point", "wind_dir", "wind_knots",
+                         "q_btuh", "mode"])
+        stamps = np.char.replace(result.time.astype("datetime64[m]").astype(str), "T", " ")
+        for row in zip(result.zone, result.station, stamps, result.outdoorDBTemp.tolist(),
+                       result.outdoorDewPoint.tolist(), result.windDir.tolist(), result.windSpeedKnots.tolist(),
+                       result.Q.tolist(), result.mode):
+            writer.writerow(list(row[:3]) + [_round(row[3], 1), _round(row[4], 1), _round(row[5], 0),
+                                             _round(row[6], 1), _round(row[7], 1), row[8]])
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f" *** {len(result.zone)} zone-hours for {len(set(result.zone))} zones, "
+          f"{int((result.mode == 'cooling').sum())} economizer hours", file=sys.stderr)
+    return 0
+#
+if __name__ == "__main__":
+    sys.exit(main())